@@ -12,9 +12,24 @@ class Settings(BaseSettings):
 
     # Database Configuration
     DATABASE_URL: str = os.getenv('DATABASE_URL') or f"sqlite:///{BACKEND_ROOT / 'app' / 'data' / 'database' / 'nexguard.db'}"
+    DATABASE_READ_URL: str = os.getenv('DATABASE_READ_URL', '')  # Optional replica for read-only sessions
+
+    # Connection Pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+
+    # SQLite Tuning (applied per connection)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 MiB
+    SQLITE_CACHE_SIZE_KB: int = 65536  # 64 MiB
 
     # Firebase Configuration
     FIREBASE_SERVICE_ACCOUNT: Path = BACKEND_ROOT / "app" / "service_key.json"
+    FCM_TRANSPORT_URL: str = os.getenv('FCM_TRANSPORT_URL', '')  # Send through an HTTP stand-in instead of Firebase
+    FCM_MULTICAST_CHUNK_SIZE: int = 500  # FCM rejects multicasts above 500 tokens
+    FCM_MAX_PARALLEL_CHUNKS: int = 4
 
     # Application Settings
     LOG_LEVEL: str = "INFO"
@@ -25,6 +40,7 @@ class Settings(BaseSettings):
 
     STORAGE_IMG_DIR: Path = STORAGE_DIR / "images"
     STORAGE_VIDEO_DIR: Path = STORAGE_DIR / "videos"
+    STORAGE_UPLOAD_DIR: Path = STORAGE_DIR / "uploads"
     MODELS_DIR: Path = DATA_DIR / "models"
 
     # API Settings
@@ -35,12 +51,51 @@ class Settings(BaseSettings):
     DEFAULT_FPS: int = 15
     DEFAULT_RESOLUTION: Tuple[int, int] = (640, 480)
     BUFFER_SIZE: int = 10
+    CAMERA_OPEN_TIMEOUT_MS: int = 5000  # FFmpeg open/read timeouts; its defaults stall for ~30s
+    CAMERA_READ_TIMEOUT_MS: int = 5000
+    CAMERA_RECONNECT_BASE_SECONDS: float = 1.0  # Backoff doubles per failed open up to the max
+    CAMERA_RECONNECT_MAX_SECONDS: float = 60.0
+    CAMERA_MAX_READ_FAILURES: int = 5  # Consecutive failed reads before the stream is reopened
+    CAMERA_OFFLINE_AFTER_ATTEMPTS: int = 6  # Failed opens in a row before a camera is reported offline
+    CAMERA_OFFLINE_RETRY_SECONDS: float = 300.0  # Probe interval for offline cameras
+    CAMERA_CAPTURE_BACKEND: str = "opencv"  # "opencv" or "pyav" (threaded decode, stream PTS, packet passthrough)
+    CAMERA_DECODE_THREADS: int = 0  # PyAV decoder threads per camera; 0 lets FFmpeg pick one per core
+    INFERENCE_IMAGE_SIZE: int = 640  # Model input size; frames are letterboxed to it once
+    INFERENCE_TILING: bool = False  # SAHI-style tiles at native resolution for small, distant objects
+    INFERENCE_TILE_OVERLAP: float = 0.2
+    INFERENCE_TILE_MERGE_THRESHOLD: float = 0.5  # Intersection-over-smaller above which tile boxes merge
+    VIDEO_ANALYSIS_MAX_JOBS: int = 1  # Offline analysis jobs that may run at the same time
+    VIDEO_ANALYSIS_BATCH_SIZE: int = 8
+    VIDEO_ANALYSIS_DEFAULT_STRIDE: int = 5  # Analyse every Nth decoded frame
+    VIDEO_ANALYSIS_DECODE_THREADS: int = 0  # FFmpeg decoder threads; 0 lets FFmpeg pick one per core
+    INFERENCE_RATE_CONTROL: bool = True  # Share inference fps between cameras by activity and load
+    INFERENCE_LATENCY_SLO_MS: int = 500  # Capture-to-results latency the controller defends
+    INFERENCE_CPU_TARGET: float = 0.85
+    INFERENCE_MIN_FPS: float = 1.0
+    INFERENCE_ACTIVE_WEIGHT: float = 4.0
+    INFERENCE_ACTIVITY_WINDOW_SECONDS: float = 30.0
+    INFERENCE_CONTROL_INTERVAL_SECONDS: float = 1.0
 
     # Detection and Alert Settings
     MIN_CONFIDENCE: float = 0.5
     DETECTION_COOLDOWN: int = 30
     ENABLE_ALERT_NOTIFICATIONS: bool = True
     ALERT_NOTIFICATION_TIMEOUT: int = 10
+    DETECTION_FLUSH_INTERVAL_MS: int = 200  # Batch window for detection/media inserts
+    DETECTION_FLUSH_MAX_BATCH: int = 256
+    TRACKING_ENABLED: bool = True  # One detection event per tracked object instead of per cooldown
+    TRACK_IOU_THRESHOLD: float = 0.3
+    TRACK_LOW_CONFIDENCE: float = 0.1  # Model threshold while tracking; boxes below the detection threshold only extend tracks
+    TRACK_MIN_HITS: int = 2
+    TRACK_MAX_AGE_SECONDS: float = 2.0
+    TRACK_UPDATE_INTERVAL_SECONDS: float = 10.0  # How often an open event's end time is written
+    TRACK_SNAPSHOT_MIN_GAIN: float = 0.05  # Confidence gain needed to replace an event's snapshot
+    ALERT_COALESCE_WINDOW_SECONDS: float = 2.0  # Alerts arriving within this window share one send
+    ALERT_TOPIC_MIN_INTERVAL_SECONDS: float = 10.0  # Minimum gap between alerts for the same camera
+    ALERT_MAX_RETRIES: int = 3
+    ALERT_RETRY_BACKOFF_SECONDS: float = 1.0
+    ALERT_DELIVERY_MODE: str = "topic"  # "topic": one publish per topic condition, "token": multicast to every token
+    NOTIFICATION_LOG_FLUSH_INTERVAL_MS: int = 1000
     
     # WebRTC Configuration
     ICE_SERVERS: str = "stun:stun.l.google.com:19302,stun:stun1.l.google.com:19302"
@@ -49,7 +104,19 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your_secret_key_here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    AUTH_CACHE_TTL_SECONDS: int = 60  # How long a verified token skips the users table
+    AUTH_CACHE_MAX_ENTRIES: int = 1024
     
+    # Observability
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # "text" or "json" (one JSON object per line)
+    LOG_RATE_LIMIT_SECONDS: float = 10.0  # A repeated message key logs at most once per interval after its burst
+    LOG_RATE_LIMIT_BURST: int = 5
+    LOG_QUEUE_SIZE: int = 10000  # Records beyond this are dropped instead of blocking the caller
+    METRICS_ENABLED: bool = True  # Serve Prometheus metrics at /metrics (needs prometheus-client)
+    PROFILING_SPANS_ENABLED: bool = False  # Time hot-path spans; can also be toggled at runtime
+    PROFILING_MAX_SAMPLE_SECONDS: float = 60.0  # Upper bound for one sampling profiler run
+
     # Debug Settings
     DEBUG: bool = False
 
@@ -59,7 +126,7 @@ class Settings(BaseSettings):
 
     def __init__(self, **values):
         super().__init__(**values)
-        for path in [self.DATA_DIR, self.MODELS_DIR, self.STORAGE_DIR, self.STORAGE_IMG_DIR, self.STORAGE_VIDEO_DIR]:
+        for path in [self.DATA_DIR, self.MODELS_DIR, self.STORAGE_DIR, self.STORAGE_IMG_DIR, self.STORAGE_VIDEO_DIR, self.STORAGE_UPLOAD_DIR]:
             path.mkdir(parents=True, exist_ok=True)
     
     def get_absolute_path(self, relative_path: str) -> Path:
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from .routes import System, webrtc_stream, cameras, inference, detections, zone , auth, notifications
+from .routes import System, webrtc_stream, cameras, inference, detections, zone , auth, notifications, rules
 
 api_router = APIRouter()
 
@@ -10,5 +10,6 @@ api_router.include_router(zone.router, prefix="/zones", tags=["zones"])
 api_router.include_router(webrtc_stream.router, prefix="/webrtc", tags=["webrtc"])
 api_router.include_router(inference.router, prefix="/inference", tags=["inference"])
 api_router.include_router(detections.router, prefix="/detections", tags=["detections"])
+api_router.include_router(rules.router, prefix="/rules", tags=["rules"])
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
\ No newline at end of file
@@ -1,5 +1,8 @@
 from turtle import st
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from datetime import datetime
 from typing import Dict, Any, Optional
 
@@ -7,7 +10,11 @@ from ...services.sys_config_service import SysConfigService
 from ...services.cleanup_service import cleanup_service
 from ...schema.sysconfig import SysInferenceConfig
 
-from ...dependencies import DatabaseDep, get_sys_config_service, ensure_inference_engine
+from ...dependencies import DatabaseDep, ReadDatabaseDep, get_sys_config_service, ensure_inference_engine
+from ...middleware.middleware import require_admin
+from ...schema.user import UserResponse
+from ...Settings import settings
+from ...utils.profiling import ProfilerBusyError, sample_stacks, spans
 
 #TODO: Refactor the settings endpoint to use a settings service 
 # instead of direct database access
@@ -15,16 +22,18 @@ from ...dependencies import DatabaseDep, get_sys_config_service, ensure_inferenc
 from ...schema.settings import StorageSettings
 from ...core.models import StorageSettings as storage_model
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/inference", response_model=SysInferenceConfig)
 async def get_system_config(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     sys_config_service: SysConfigService = Depends(get_sys_config_service)
 ) -> SysInferenceConfig:
     try:
         inference_settings = sys_config_service.get_inference_config(db)
-        print(f"this the inference_config: {inference_settings}")
+        logger.debug(f"this the inference_config: {inference_settings}")
         return inference_settings
     except Exception as e:
         raise HTTPException(
@@ -33,7 +42,7 @@ async def get_system_config(
 
 @router.get("/storage", response_model=StorageSettings)
 async def get_storage_config(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
 ):
     try:
         storage_settings = db.query(storage_model).first()
@@ -125,3 +134,49 @@ async def get_cleanup_status() -> Dict[str, Any]:
         "check_interval_seconds": cleanup_service.check_interval,
         "check_interval_hours": cleanup_service.check_interval / 3600
     }
+
+
+@router.get("/profiling/spans")
+async def get_profiling_spans(admin_user: UserResponse = Depends(require_admin)) -> Dict[str, Any]:
+    """Latency percentiles of the instrumented hot-path spans over the last minute"""
+    return {"enabled": spans.enabled, "spans": spans.snapshot()}
+
+
+@router.put("/profiling/spans")
+async def set_profiling_spans(
+    enabled: bool,
+    reset: bool = False,
+    admin_user: UserResponse = Depends(require_admin),
+) -> Dict[str, Any]:
+    """Turn span timing on or off at runtime, optionally clearing collected spans"""
+    spans.enabled = enabled
+    if reset:
+        spans.reset()
+    return {"enabled": spans.enabled, "spans": spans.snapshot()}
+
+
+@router.post("/profiling/sample", response_class=PlainTextResponse)
+async def run_sampling_profiler(
+    duration: float = Query(10.0, gt=0, le=settings.PROFILING_MAX_SAMPLE_SECONDS, description="Seconds to sample"),
+    interval_ms: float = Query(10.0, ge=1, le=1000, description="Milliseconds between samples"),
+    admin_user: UserResponse = Depends(require_admin),
+):
+    """
+    Sample every thread's stack for ``duration`` seconds.
+
+    Returns a collapsed-stack file ("thread;outer;...;inner count" per line)
+    that flamegraph.pl, speedscope or inferno render as a flamegraph.
+    """
+    try:
+        stacks, rounds = await asyncio.to_thread(sample_stacks, duration, interval_ms / 1000)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    filename = f"nexguard-{datetime.now():%Y%m%d-%H%M%S}.folded"
+    return PlainTextResponse(
+        stacks,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(rounds),
+        },
+    )
@@ -4,7 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from typing import Optional, List
 import logging
 
-from ...dependencies import DatabaseDep
+from ...dependencies import DatabaseDep, ReadDatabaseDep
 from ...services.auth_service import auth_service
 from ...schema.user import (
     UserCreate, UserUpdate, UserResponse, UserLogin, 
@@ -26,7 +26,7 @@ def register_user(
 ):
     """Endpoint to register a new user (with pending status by default)"""
     try:
-        print(f"Registering user: {user.username}")
+        logger.info(f"Registering user: {user.username}")
         logger.info(f"Registering new user: {user.username}")
         
         user.status = UserStatus.PENDING
@@ -41,7 +41,7 @@ def register_user(
         logger.warning(f"Registration failed for {user.username}: {e.detail}")
         raise
     except Exception as e:
-        print(f"❌ Error during registration: {e}")
+        logger.error(f"❌ Error during registration: {e}")
         logger.error(f"Unexpected error during registration: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -107,7 +107,7 @@ def login_user(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error during login: {e}")
+        logger.error(f"❌ Error during login: {e}")
         logger.error(f"Unexpected error during login: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -173,7 +173,7 @@ def refresh_token(
 
 @router.get("/admin/users", response_model=List[UserResponse])
 def get_all_users(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     user: UserResponse = Depends(require_approved_user),
     status_filter: Optional[UserStatus] = Query(None, description="Filter users by status"),
     role_filter: Optional[UserRole] = Query(None, description="Filter users by role"),
@@ -206,7 +206,7 @@ def get_all_users(
 
 @router.get("/admin/users/pending", response_model=List[UserResponse])
 def get_pending_users(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     admin_user: UserResponse = Depends(require_admin),
     limit: int = Query(50, ge=1, le=200, description="Number of pending users to return"),
     offset: int = Query(0, ge=0, description="Number of pending users to skip")
@@ -422,7 +422,7 @@ def delete_user(
 
 @router.get("/admin/stats")
 def get_user_stats(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     admin_user: UserResponse = Depends(require_admin)
 ):
     """Get user statistics dashboard"""
@@ -6,6 +6,7 @@ Camera API endpoints with validation
 #TODO:Automatically start and stop without having to restart the server
 
 
+import asyncio
 from typing import List, Optional
 from fastapi import APIRouter, HTTPException, status
 from sqlalchemy.orm import Session
@@ -14,20 +15,25 @@ from ...schema import (
     Camera, CameraCreate, CameraUpdate, CameraWithRelations
 )
 from ...dependencies import (
+    AsyncReadDatabaseDep,
+    AsyncCameraServiceDep,
     DatabaseDep,
     CameraServiceDep,
     VideoCaptureServiceDep,
     InferenceEngineDep,
 )
 from ...services.video_capture import CameraConfig
+from ...utils.detection_rules import detection_rules
+from ...utils.metadata_cache import camera_cache
+from ...utils.roi import roi_masks
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[Camera])
 async def get_cameras(
-    db: DatabaseDep,
-    camera_service: CameraServiceDep,
+    db: AsyncReadDatabaseDep,
+    camera_service: AsyncCameraServiceDep,
     skip: int = 0,
     limit: int = 100,
     zone_id: Optional[int] = None,
@@ -36,11 +42,11 @@ async def get_cameras(
     """Get all cameras with optional filtering"""
     try:
         if zone_id:
-            cameras = camera_service.get_by_zone(db, zone_id)
+            cameras = await camera_service.get_by_zone(db, zone_id)
         elif enabled_only:
-            cameras = camera_service.get_active_cameras(db)
+            cameras = await camera_service.get_active_cameras(db)
         else:
-            cameras = camera_service.get_multi(db, skip=skip, limit=limit)
+            cameras = await camera_service.get_multi(db, skip=skip, limit=limit)
         
         return cameras
     except Exception as e:
@@ -53,11 +59,11 @@ async def get_cameras(
 @router.get("/{camera_id}", response_model=CameraWithRelations)
 async def get_camera(
     camera_id: int,
-    db: DatabaseDep,
-    camera_service: CameraServiceDep
+    db: AsyncReadDatabaseDep,
+    camera_service: AsyncCameraServiceDep
 ):
     """Get a specific camera by ID"""
-    camera = camera_service.get_by_camera_id(db, camera_id)
+    camera = await camera_service.get_by_camera_id(db, camera_id)
     if not camera:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -77,15 +83,9 @@ async def create_camera(
     """Create a new camera with validation"""
     try:
         camera = camera_service.create_camera(db, camera_data)
+        camera_cache.invalidate(camera.id)
         if camera.enabled and video_capture:
-            config = CameraConfig(
-                camera_id=camera.id,
-                url=camera.url,
-                fps_target=camera.fps_target,
-                resolution=(camera.resolution_width, camera.resolution_height),
-                enabled=camera.enabled,
-                location=camera.location,
-            )
+            config = CameraConfig.from_camera(camera)
 
             added = video_capture.add_camera(config)
             if not added:
@@ -124,6 +124,9 @@ async def update_camera(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Camera with ID {camera_id} not found"
             )
+        camera_cache.invalidate(camera_id)
+        detection_rules.invalidate_camera(camera_id)
+        roi_masks.invalidate(camera_id)
             
         if any([
             camera_data.url is not None,
@@ -131,6 +134,8 @@ async def update_camera(
             camera_data.resolution_width is not None,
             camera_data.resolution_height is not None,
             camera_data.enabled is not None,
+            camera_data.substream_url is not None,
+            camera_data.stream_options is not None,
         ]):
             inference_engine.stop_processing([camera_id])
 
@@ -139,14 +144,7 @@ async def update_camera(
                 video_capture.remove_camera(camera_id)
 
                 if updated_camera.enabled:
-                    config = CameraConfig(
-                        camera_id=updated_camera.id,
-                        url=updated_camera.url,
-                        fps_target=updated_camera.fps_target,
-                        resolution=(updated_camera.resolution_width, updated_camera.resolution_height),
-                        enabled=updated_camera.enabled,
-                        location=updated_camera.location,
-                    )
+                    config = CameraConfig.from_camera(updated_camera)
 
                     added = video_capture.add_camera(config)
                     if not added:
@@ -190,6 +188,9 @@ async def delete_camera(
         inference_engine.stop_processing([camera_id])
         video_capture.remove_camera(camera_id)
         camera_service.delete(db, camera)
+        camera_cache.invalidate(camera_id)
+        detection_rules.invalidate_camera(camera_id)
+        roi_masks.invalidate(camera_id)
 
     except Exception as e:
         raise HTTPException(
@@ -213,16 +214,10 @@ async def enable_camera(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Camera with ID {camera_id} not found"
         )
+    camera_cache.invalidate(camera_id)
     
     try:
-        config = CameraConfig(
-            camera_id=camera.id,
-            url=camera.url,
-            fps_target=camera.fps_target,
-            resolution=(camera.resolution_width, camera.resolution_height),
-            enabled=camera.enabled,
-            location=camera.location,
-        )
+        config = CameraConfig.from_camera(camera)
 
         added = video_capture.add_camera(config)
         if not added:
@@ -255,6 +250,7 @@ async def disable_camera(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Camera with ID {camera_id} not found"
         )
+    camera_cache.invalidate(camera_id)
     
     try:
         inference_engine.stop_processing([camera_id])
@@ -276,12 +272,10 @@ async def disable_camera(
 @router.get("/{camera_id}/status")
 async def get_camera_status(
     camera_id: int,
-    db: DatabaseDep,
-    camera_service: CameraServiceDep,
     video_capture: VideoCaptureServiceDep
 ):
     """Get camera status including video capture state"""
-    camera = camera_service.get_by_camera_id(db, camera_id)
+    camera = await asyncio.to_thread(camera_cache.get, camera_id)
     if not camera:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -295,6 +289,7 @@ async def get_camera_status(
         "name": camera.name,
         "enabled": camera.enabled,
         "video_active": video_active,
+        "health": video_capture.get_camera_health(camera_id),
         "last_active": camera.last_active,
         "url": camera.url,
         "location": camera.location
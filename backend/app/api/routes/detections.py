@@ -8,14 +8,14 @@ import mimetypes
 import logging
 from datetime import datetime
 
-from ...services.detection_service import detection_service
+from ...services.detection_service import async_detection_service
 
 from ...schema import (
     Detection
 )
 
 from ...utils.detection_manager import DetectionEventManager
-from ...dependencies import DatabaseDep, get_db
+from ...dependencies import AsyncReadDatabaseDep, ReadDatabaseDep, get_db
 from ...Settings import Settings
 
 router = APIRouter()
@@ -23,7 +23,7 @@ logger = logging.getLogger("nexguard.detections")
 settings = Settings()
 
 @router.get("/debug/list")
-async def debug_list_detections(db: DatabaseDep):
+async def debug_list_detections(db: ReadDatabaseDep):
     """Debug endpoint to list all detections and their media"""
     from ...core.models import Detection, Media
     
@@ -50,11 +50,11 @@ async def debug_list_detections(db: DatabaseDep):
 @router.get("/date/{date}", response_model=List[Detection])
 async def get_recent_detections(
     date: datetime,
-    db: DatabaseDep
+    db: AsyncReadDatabaseDep
 ):
     """Get recent detections with images by date"""
     try:
-        detections = detection_service.get_by_date(
+        detections = await async_detection_service.get_by_date(
         db=db,
         date=date
     )
@@ -70,13 +70,13 @@ async def get_recent_detections(
 async def get_detection_video(
     detection_id: int,
     request: Request,
-    db: DatabaseDep,
+    db: AsyncReadDatabaseDep,
 ):
     """Stream detection video by ID with proper range support"""
-    print(f"Requesting video for detection_id={detection_id}")
+    logger.debug(f"Requesting video for detection_id={detection_id}")
     
     try:
-        video_path_str = detection_service.get_media_filepath(db=db, id=detection_id, media_type="video")
+        video_path_str = await async_detection_service.get_media_filepath(db=db, id=detection_id, media_type="video")
         
         if not video_path_str:
             raise HTTPException(status_code=404, detail="Video not found")
@@ -85,7 +85,7 @@ async def get_detection_video(
         if not video_path.exists():
             raise HTTPException(status_code=404, detail="Video file does not exist")
         
-        print(f"Serving video from: {video_path}")
+        logger.debug(f"Serving video from: {video_path}")
         
         file_size = video_path.stat().st_size
         range_header = request.headers.get("range") or request.headers.get("Range")
@@ -124,7 +124,7 @@ async def get_detection_video(
                 "Content-Type": "video/mp4",
             }
             
-            print(f"Serving range {start}-{end} of {file_size} bytes")
+            logger.debug(f"Serving range {start}-{end} of {file_size} bytes")
             return StreamingResponse(
                 iter_file(video_path, start, end),
                 status_code=206,
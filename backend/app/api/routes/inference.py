@@ -1,65 +1,218 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
+import json
+import shutil
+import uuid
+from pathlib import Path
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any, Optional
-from pydantic import BaseModel
-import tempfile
+from pydantic import BaseModel, Field
 import os
 
-router = APIRouter(prefix="/inference", tags=["inference"])
+from ...dependencies import (
+    ActiveInferenceEngineDep,
+    InferenceEngineDep,
+    VideoAnalysisServiceDep,
+    VideoCaptureServiceDep,
+)
+from ...Settings import settings
+
+router = APIRouter()
+
+ALLOWED_VIDEO_FORMATS = [".mp4", ".avi", ".mov", ".mkv"]
+PROGRESS_INTERVAL_SECONDS = 0.5
 
 class InferenceStartRequest(BaseModel):
-    camera_ids: Optional[List[str]] = None
+    camera_ids: Optional[List[int]] = None
+
+class AnalysisJobRequest(BaseModel):
+    path: str = Field(..., description="Video path, absolute or relative to the storage directory")
+    camera_id: Optional[int] = None
+    stride: int = Field(settings.VIDEO_ANALYSIS_DEFAULT_STRIDE, ge=1)
+    batch_size: int = Field(settings.VIDEO_ANALYSIS_BATCH_SIZE, ge=1, le=64)
+    start_time: Optional[float] = Field(None, description="Unix time of the first frame; defaults to now")
+    classes: Optional[List[str]] = None
 
 class DetectionResult(BaseModel):
     camera_id: str
     timestamp: str
+    frame_number: int
+    latency_ms: float
     detections: List[Dict[str, Any]]
     processing_stats: Dict[str, Any]
 
+
+def _require_engine(inference_engine):
+    if inference_engine is None:
+        raise HTTPException(status_code=503, detail="Inference engine is not running")
+    return inference_engine
+
+
+def _get_job(analysis_service, job_id: str):
+    job = analysis_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Analysis job {job_id} not found")
+    return job
+
+
+def _save_upload(file: UploadFile, destination: Path) -> None:
+    with destination.open("wb") as out:
+        shutil.copyfileobj(file.file, out, length=1024 * 1024)
+
+
+def _camera_key(inference_engine, camera_id: str):
+    """Match a path camera id against the engine's keys, which are usually ints"""
+    for key in (camera_id, int(camera_id) if camera_id.isdigit() else None):
+        if key is not None and key in inference_engine.processing_threads:
+            return key
+    return None
+
+
 @router.post("/start")
-async def start_inference(request: InferenceStartRequest):
+async def start_inference(
+    request: InferenceStartRequest,
+    inference_engine: InferenceEngineDep,
+    video_capture: VideoCaptureServiceDep,
+):
     """Start inference on specified cameras or all cameras"""
+    try:
+        inference_engine.start_processing(request.camera_ids, video_capture)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    running = [
+        camera_id for camera_id, thread in inference_engine.processing_threads.items()
+        if thread.is_alive()
+    ]
     camera_list = request.camera_ids or "all cameras"
-    return {"message": f"Inference started on {camera_list}"}
+    return {"message": f"Inference started on {camera_list}", "active_cameras": running}
 
 @router.post("/stop")
-async def stop_inference(request: InferenceStartRequest):
+async def stop_inference(request: InferenceStartRequest, inference_engine: ActiveInferenceEngineDep):
     """Stop inference on specified cameras or all cameras"""
+    inference_engine = _require_engine(inference_engine)
+    # Joining the processing threads can take a few seconds
+    await asyncio.to_thread(inference_engine.stop_processing, request.camera_ids)
     camera_list = request.camera_ids or "all cameras"
     return {"message": f"Inference stopped on {camera_list}"}
 
-@router.get("/results/{camera_id}")
-async def get_latest_results(camera_id: str):
+@router.get("/results/{camera_id}", response_model=DetectionResult)
+async def get_latest_results(camera_id: str, inference_engine: ActiveInferenceEngineDep):
     """Get latest detection results for a specific camera"""
-    # Placeholder implementation
+    inference_engine = _require_engine(inference_engine)
+    key = _camera_key(inference_engine, camera_id)
+    snapshot = inference_engine.get_result_snapshot(key) if key is not None else None
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"No inference results for camera {camera_id}")
     return {
-        "camera_id": camera_id,
-        "timestamp": "2025-06-20T12:00:00Z",
-        "detections": [],
-        "processing_stats": {}
+        **snapshot.to_dict(),
+        "processing_stats": inference_engine.processing_stats.get(key, {}),
     }
 
-@router.post("/upload-video")
-async def upload_video(file: UploadFile = File(...)):
-    """Process an uploaded video file"""
+@router.post("/upload-video", status_code=202)
+async def upload_video(
+    inference_engine: InferenceEngineDep,
+    analysis_service: VideoAnalysisServiceDep,
+    file: UploadFile = File(...),
+    camera_id: Optional[int] = Form(None),
+    stride: int = Form(settings.VIDEO_ANALYSIS_DEFAULT_STRIDE, ge=1),
+    batch_size: int = Form(settings.VIDEO_ANALYSIS_BATCH_SIZE, ge=1, le=64),
+    start_time: Optional[float] = Form(None),
+    classes: Optional[str] = Form(None, description="Comma-separated class names to keep"),
+):
+    """Store an uploaded video and queue it for offline analysis"""
     # Validate file format
     file_ext = os.path.splitext(file.filename)[1].lower()
-    allowed_formats = [".mp4", ".avi", ".mov", ".mkv"]
-    if file_ext not in allowed_formats:
+    if file_ext not in ALLOWED_VIDEO_FORMATS:
         raise HTTPException(
             status_code=400, 
-            detail=f"Unsupported file format. Allowed: {allowed_formats}"
+            detail=f"Unsupported file format. Allowed: {ALLOWED_VIDEO_FORMATS}"
         )
-    
+
+    destination = settings.STORAGE_UPLOAD_DIR / f"{uuid.uuid4().hex}_{Path(file.filename).name}"
+    await asyncio.to_thread(_save_upload, file, destination)
+
+    job = analysis_service.submit(
+        inference_engine,
+        destination,
+        source_file=Path(file.filename).name,
+        camera_id=camera_id,
+        stride=stride,
+        batch_size=batch_size,
+        start_time=start_time,
+        classes=[c for c in classes.split(",") if c.strip()] if classes else None,
+    )
     return {
         "message": "Video uploaded successfully",
         "filename": file.filename,
-        "size": file.size
+        "size": destination.stat().st_size,
+        "job": job.to_dict(),
     }
 
+@router.post("/jobs", status_code=202)
+async def create_analysis_job(
+    request: AnalysisJobRequest,
+    inference_engine: InferenceEngineDep,
+    analysis_service: VideoAnalysisServiceDep,
+):
+    """Queue archived footage that already lives under the storage directory"""
+    path = settings.get_absolute_path(request.path).resolve()
+    if not path.is_relative_to(settings.STORAGE_DIR.resolve()):
+        raise HTTPException(status_code=400, detail="Path must be inside the storage directory")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail=f"Video file not found: {request.path}")
+    if path.suffix.lower() not in ALLOWED_VIDEO_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported file format. Allowed: {ALLOWED_VIDEO_FORMATS}")
+
+    job = analysis_service.submit(
+        inference_engine,
+        path,
+        camera_id=request.camera_id,
+        stride=request.stride,
+        batch_size=request.batch_size,
+        start_time=request.start_time,
+        classes=request.classes,
+    )
+    return job.to_dict()
+
+@router.get("/jobs")
+async def list_analysis_jobs(analysis_service: VideoAnalysisServiceDep):
+    """List offline analysis jobs and their progress"""
+    return [job.to_dict() for job in analysis_service.list()]
+
+@router.get("/jobs/{job_id}")
+async def get_analysis_job(job_id: str, analysis_service: VideoAnalysisServiceDep):
+    """Get the progress of one analysis job"""
+    return _get_job(analysis_service, job_id).to_dict()
+
+@router.delete("/jobs/{job_id}")
+async def cancel_analysis_job(job_id: str, analysis_service: VideoAnalysisServiceDep):
+    """Cancel a queued or running analysis job"""
+    _get_job(analysis_service, job_id)
+    return analysis_service.cancel(job_id).to_dict()
+
+@router.get("/jobs/{job_id}/progress")
+async def stream_analysis_progress(job_id: str, analysis_service: VideoAnalysisServiceDep):
+    """Stream job progress as server-sent events until the job finishes"""
+    job = _get_job(analysis_service, job_id)
+
+    async def events():
+        while True:
+            yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.finished:
+                return
+            await asyncio.sleep(PROGRESS_INTERVAL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @router.get("/stats")
-async def get_processing_stats():
+async def get_processing_stats(inference_engine: ActiveInferenceEngineDep):
     """Get processing statistics for all cameras"""
+    if inference_engine is None:
+        return {"processing_stats": {}, "active_cameras": [], "rate_control": None}
+    stats = inference_engine.get_processing_stats()
+    rate_controller = inference_engine.rate_controller
     return {
-        "processing_stats": {},
-        "active_cameras": []
+        "processing_stats": {str(camera_id): value for camera_id, value in stats.items()},
+        "active_cameras": [str(camera_id) for camera_id in stats],
+        "rate_control": rate_controller.summary() if rate_controller else None,
     }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Body
 from sqlalchemy.orm import Session
 from typing import List
 import logging
@@ -9,6 +9,7 @@ from ...dependencies import DatabaseDep, get_alert_service
 from ...services.alert_service import AlertService
 from ...middleware.middleware import require_approved_user
 from ...core.models import UserDeviceToken
+from ...utils.device_token_cache import device_token_cache
 from ...schema.notification import (
     DeviceTokenRequest, 
     DeviceTokenResponse,
@@ -62,7 +63,6 @@ def unregister_device_token(
     """
     try:
         logger.info(f"Unregistering device token for user {current_user.username}: {device_token}")
-        print("Unregistering device token:", device_token)
         
         # Delete the token from database (not just mark inactive)
         token_record = db.query(UserDeviceToken).filter(
@@ -73,16 +73,15 @@ def unregister_device_token(
         if token_record:
             db.delete(token_record)
             db.commit()
+            device_token_cache.discard([device_token])
             logger.info(f"Device token deleted from database for user {current_user.username}")
-            print(f"✓ Device token deleted from database")
         else:
             logger.warning(f"Device token not found for user {current_user.username}")
             
         return {"message": "Device token unregistered successfully"}
     except Exception as e:
         db.rollback()
-        print(f"Error unregistering device token: {e}")
-        logger.exception("Error unregistering device token")
+        logger.exception(f"Error unregistering device token: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error unregistering device token error:"
@@ -119,7 +118,6 @@ async def subscribe_to_topic(
         raise
     except Exception as e:
         logger.error(f"Failed to subscribe to topic: {str(e)}")
-        print(f"Failed to subscribe to topic: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to subscribe to topic: {str(e)}"
@@ -165,7 +163,6 @@ async def unsubscribe_from_topic(
         raise
     except Exception as e:
         logger.error(f"Failed to unsubscribe from topic: {str(e)}")
-        print(f"Failed to unsubscribe from topic: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to unsubscribe from topic: {str(e)}"
@@ -215,34 +212,18 @@ async def get_user_notification_preferences(
             detail=f"Failed to fetch notification preferences: {str(e)}"
         )
 
-@router.put("/preferences")
+@router.put("/preferences", status_code=status.HTTP_202_ACCEPTED)
 async def update_user_notification_preferences(
+    background_tasks: BackgroundTasks,
     preferences: dict[str, bool] = Body(...),
-    db: Session = Depends(get_db),
     current_user: UserResponse = Depends(require_approved_user),
     alert_service: AlertService = Depends(get_alert_service)
 ):
-    """Update notification preferences for the current user"""
-    try:
-        # Get user's device tokens for topic subscription/unsubscription
-        user_tokens = alert_service.get_user_device_tokens(db, current_user.id)
-        active_tokens = [token.device_token for token in user_tokens if token.is_active]
-        
-        success = alert_service.update_user_preferences_bulk(
-            db, current_user.id, preferences, active_tokens
-        )
-        
-        if success:
-            logger.info(f"Updated notification preferences for user {current_user.id}")
-            return {"message": "Notification preferences updated successfully"}
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update notification preferences"
-            )
-    except Exception as e:
-        logger.error(f"Failed to update notification preferences for user {current_user.id}: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update notification preferences: {str(e)}"
-        )
\ No newline at end of file
+    """Update notification preferences for the current user.
+
+    The preference write and topic (un)subscriptions run after the response
+    is sent, so this returns without waiting on Firebase.
+    """
+    background_tasks.add_task(alert_service.update_user_preferences_job, current_user.id, preferences)
+    logger.info(f"Queued notification preference update for user {current_user.id}")
+    return {"message": "Notification preferences update accepted"}
@@ -0,0 +1,84 @@
+"""
+Detection rule endpoints. Every write reloads the compiled rules engine.
+"""
+from typing import List
+from fastapi import APIRouter, HTTPException, status
+
+from ...dependencies import DatabaseDep, ReadDatabaseDep, DetectionRuleServiceDep
+from ...schema import DetectionRule, DetectionRuleCreate, DetectionRuleUpdate
+from ...utils.detection_rules import detection_rules
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[DetectionRule])
+async def get_rules(
+    db: ReadDatabaseDep,
+    rule_service: DetectionRuleServiceDep
+):
+    """Get all detection rules"""
+    try:
+        return rule_service.get_all_rules(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve rules: {str(e)}"
+        )
+
+
+@router.post("/", response_model=DetectionRule, status_code=status.HTTP_201_CREATED)
+async def create_rule(
+    rule_data: DetectionRuleCreate,
+    db: DatabaseDep,
+    rule_service: DetectionRuleServiceDep
+):
+    """Create a detection rule"""
+    try:
+        rule = rule_service.create_rule(db, rule_data)
+        detection_rules.reload(db)
+        return rule
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create rule: {str(e)}"
+        )
+
+
+@router.put("/{rule_id}", response_model=DetectionRule)
+async def update_rule(
+    rule_id: int,
+    rule_data: DetectionRuleUpdate,
+    db: DatabaseDep,
+    rule_service: DetectionRuleServiceDep
+):
+    """Update a detection rule"""
+    try:
+        rule = rule_service.update_rule(db, rule_id, rule_data)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Rule with ID {rule_id} not found"
+        )
+    detection_rules.reload(db)
+    return rule
+
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(
+    rule_id: int,
+    db: DatabaseDep,
+    rule_service: DetectionRuleServiceDep
+):
+    """Delete a detection rule"""
+    rule = rule_service.delete_rule(db, rule_id)
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Rule with ID {rule_id} not found"
+        )
+    detection_rules.reload(db)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
 from aiortc import RTCIceCandidate
 import json
 import asyncio
+import logging
 
 from ...utils.detection_manager import DetectionEventManager
 
@@ -10,6 +11,8 @@ from ...services.video_capture import VideoCapture
 from ...services.inference_engine import YOLOProcessor as inference_engine
 from ...services.webrtc import RTCSessionManager
 
+logger = logging.getLogger(__name__)
+
 # Create a router instance
 router = APIRouter()
 
@@ -25,14 +28,14 @@ async def webrtc_signaling(
     inference_engine: inference_engine = Depends(get_inference_engine)
 ):
     """WebRTC signaling for camera streaming"""
-    print('Connecting WebRTC client to camera:', camera_id)
+    logger.info(f"Connecting WebRTC client to camera {camera_id}", extra={"camera_id": camera_id})
     try:
         await websocket.accept()
-        print(f'WebRTC socket connected for camera {camera_id}')
+        logger.debug(f'WebRTC socket connected for camera {camera_id}', extra={"camera_id": camera_id})
         camera_id = camera_id
         if camera_id not in video_capture.cameras:
-            print('video_capture.cameras:', video_capture.cameras)
-            print(f"Camera {camera_id} not found in video capture service!!")
+            logger.debug(f"Known cameras: {list(video_capture.cameras)}", extra={"camera_id": camera_id})
+            logger.warning(f"Camera {camera_id} not found in video capture service!!", extra={"camera_id": camera_id})
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=f"Camera {camera_id} not found")
             return
             
@@ -65,7 +68,7 @@ async def webrtc_signaling(
                     "type": "answer",
                     "sdp": session_desc
                 })
-                print(f"Sent answer SDP for camera {camera_id} to peer {peer_id}")
+                logger.info(f"Sent answer SDP for camera {camera_id} to peer {peer_id}", extra={"camera_id": camera_id})
                 
             elif msg_type == "ice-candidate":
                 # Convert dict to RTCIceCandidate object
@@ -91,16 +94,16 @@ async def webrtc_signaling(
                             ice_candidate
                         )
                     except Exception as e:
-                        print(f"Error processing ICE candidate: {e}")
-                        print(f"Candidate data: {candidate_dict}")
+                        logger.warning(f"Error processing ICE candidate: {e}", extra={"camera_id": camera_id})
+                        logger.debug(f"Candidate data: {candidate_dict}", extra={"camera_id": camera_id})
                 
             elif msg_type == "disconnect":
                 break
                 
     except WebSocketDisconnect:
-        print(f"WebRTC client disconnected from camera {camera_id}")
+        logger.info(f"WebRTC client disconnected from camera {camera_id}", extra={"camera_id": camera_id})
     except Exception as e:
-        print(f"WebRTC error for camera {camera_id}: {str(e)}")
+        logger.error(f"WebRTC error for camera {camera_id}: {str(e)}", extra={"camera_id": camera_id})
         import traceback
         traceback.print_exc()
     finally:
@@ -108,4 +111,4 @@ async def webrtc_signaling(
         try:
             await rtc_manager.close_peer_connection(camera_id, peer_id)
         except Exception as e:
-            print(f"Error cleaning up peer connection: {e}")
\ No newline at end of file
+            logger.error(f"Error cleaning up peer connection: {e}", extra={"camera_id": camera_id})
\ No newline at end of file
@@ -1,16 +1,20 @@
+import logging
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from ...dependencies import DatabaseDep, ZoneServiceDep
+from ...dependencies import DatabaseDep, ReadDatabaseDep, ZoneServiceDep
+from ...utils.metadata_cache import zone_cache
 
 from ...schema import (
     Zone, ZoneCreate, ZoneUpdate, ZoneWithCameras
 )
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.get("/", response_model=List[Zone])
 async def get_zones(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     zone_service: ZoneServiceDep
 ):
     """Get all zones with optional pagination"""
@@ -30,9 +34,10 @@ async def create_zone(
     zone_service: ZoneServiceDep
 ):
     """Create a new zone"""
-    print(f"creating zone: {zone_data}")
+    logger.debug(f"creating zone: {zone_data}")
     try:
         zone = zone_service.create_zone(db, zone_data)
+        zone_cache.invalidate(zone.id)
         return zone
     except Exception as e:
         raise HTTPException(
@@ -1,19 +1,137 @@
-from sqlalchemy import create_engine
+import logging
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from backend.app.Settings import Settings
 
 
 settings = Settings()
+logger = logging.getLogger(__name__)
 
 print(f"Using DATABASE_URL: {settings.DATABASE_URL}")
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+
+def is_sqlite_url(url: str) -> bool:
+    """Check whether a database URL points at SQLite"""
+    return url.startswith("sqlite")
+
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool) -> None:
+    """Tune a raw SQLite connection for concurrent capture writers and API readers.
+
+    WAL lets readers proceed while a writer holds the lock, and busy_timeout makes
+    writers wait for each other instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # Negative cache_size is expressed in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _pool_kwargs() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+
+
+def _sqlite_connect_args() -> dict:
+    return {
+        "check_same_thread": False,
+        # Python-level lock wait, in seconds, on top of busy_timeout
+        "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }
+
+
+def _attach_sqlite_pragmas(sync_engine: Engine, read_only: bool) -> None:
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _apply_sqlite_pragmas(dbapi_connection, read_only)
+
+
+def create_db_engine(url: str, read_only: bool = False) -> Engine:
+    """Create an engine with a sized connection pool and backend-specific tuning"""
+    if not is_sqlite_url(url):
+        return create_engine(url, pool_recycle=settings.DB_POOL_RECYCLE, **_pool_kwargs())
+
+    if _is_memory_sqlite(url):
+        # In-memory databases are per-connection and cannot use WAL or a pool
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    sqlite_engine = create_engine(url, connect_args=_sqlite_connect_args(), **_pool_kwargs())
+    _attach_sqlite_pragmas(sqlite_engine, read_only)
+    return sqlite_engine
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (aiosqlite / asyncpg)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url
+
+
+def create_async_db_engine(url: str, read_only: bool = False) -> AsyncEngine:
+    """Create an asyncio engine with the same pooling and SQLite tuning as the sync one"""
+    async_url = to_async_url(url)
+
+    if not is_sqlite_url(url):
+        return create_async_engine(async_url, pool_recycle=settings.DB_POOL_RECYCLE, **_pool_kwargs())
+
+    if _is_memory_sqlite(url):
+        return create_async_engine(async_url)
+
+    sqlite_engine = create_async_engine(
+        async_url,
+        connect_args=_sqlite_connect_args(),
+        **_pool_kwargs(),
+    )
+    _attach_sqlite_pragmas(sqlite_engine.sync_engine, read_only)
+    return sqlite_engine
+
+
+engine = create_db_engine(settings.DATABASE_URL)
+
+# Read-only engine for list and stats endpoints. It can point at a replica via
+# DATABASE_READ_URL; on SQLite it shares the WAL file with the writer engine.
+read_engine = create_db_engine(
+    settings.DATABASE_READ_URL or settings.DATABASE_URL,
+    read_only=True,
+)
+
+# Async engines serve the API routes so queries no longer block the event loop
+async_engine = create_async_db_engine(settings.DATABASE_URL)
+async_read_engine = create_async_db_engine(
+    settings.DATABASE_READ_URL or settings.DATABASE_URL,
+    read_only=True,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db():
@@ -24,9 +142,64 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Dependency to get a read-only database session"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    """Dependency to get an asyncio database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_async_read_db():
+    """Dependency to get a read-only asyncio database session"""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 def create_tables():
-    """Create all tables"""
+    """Create all tables, and add columns that existing tables are missing"""
     Base.metadata.create_all(bind=engine)
+    add_missing_columns()
+
+def add_missing_columns(bind: Optional[Engine] = None) -> List[str]:
+    """Add model columns that an existing table lacks, with their indexes.
+
+    create_all only creates missing tables, so a database created before a
+    column was added to a model fails with "no such column". New columns are
+    nullable, which a plain ADD COLUMN handles on SQLite and Postgres alike.
+    Returns the added columns as "table.column".
+    """
+    bind = bind or engine
+    existing = inspect(bind)
+    tables = set(existing.get_table_names())
+    quote = bind.dialect.identifier_preparer.quote
+    added = []
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in tables:
+                continue
+            present = {column["name"] for column in existing.get_columns(table.name)}
+            new_columns = [column for column in table.columns if column.name not in present]
+            for column in new_columns:
+                if not column.nullable and column.server_default is None:
+                    logger.warning(f"Cannot add NOT NULL column {table.name}.{column.name} without a default")
+                    continue
+                column_type = column.type.compile(dialect=bind.dialect)
+                connection.execute(text(
+                    f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+                ))
+                added.append(f"{table.name}.{column.name}")
+            new_names = {column.name for column in new_columns}
+            for index in table.indexes:
+                if new_names.intersection(column.name for column in index.columns):
+                    index.create(connection, checkfirst=True)
+    if added:
+        logger.info(f"Added columns to existing tables: {', '.join(added)}")
+    return added
 
 def drop_tables():
     """Drop all tables"""
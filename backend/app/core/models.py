@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from sqlalchemy import JSON, Column, DateTime, Integer, String, Float, Boolean, ForeignKey, func, Text
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Float, Boolean, ForeignKey, func, Text, Time
 from sqlalchemy.orm import relationship
 from .database.connection import Base
 
@@ -28,6 +28,11 @@ class Camera(Base):
     resolution_width = Column(Integer, default=640)
     resolution_height = Column(Integer, default=480)
     enabled = Column(Boolean, default=True)
+    substream_url = Column(String(500), nullable=True)
+    # Capture mode and FFmpeg options, see schema.camera.StreamOptions
+    stream_options = Column(JSON, nullable=True)
+    # Region-of-interest polygons as [[[x, y], ...], ...] in normalized 0-1 frame coordinates
+    roi_polygons = Column(JSON, nullable=True)
     created_at = Column(DateTime, default=datetime.now)
     last_active = Column(DateTime, nullable=True)
 
@@ -45,6 +50,9 @@ class Detection(Base):
     timestamp = Column(Float, index=True)
     detection_type = Column(String(50), index=True)
     confidence = Column(Float)
+    end_timestamp = Column(Float, nullable=True)
+    track_id = Column(Integer, nullable=True)
+    source_file = Column(String(500), nullable=True, index=True)
     notified = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.now)
     
@@ -69,6 +77,26 @@ class Media(Base):
     # Relationships
     camera = relationship("Camera", back_populates="media")
     detection = relationship("Detection", back_populates="media")
+
+
+class DetectionRule(Base):
+    __tablename__ = "detection_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    detection_type = Column(String(50), nullable=False, index=True)  # YOLO class name, e.g. "person"
+    camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=True, index=True)  # None = any camera
+    zone_id = Column(Integer, ForeignKey("zones.id"), nullable=True, index=True)  # None = any zone
+    min_confidence = Column(Float, default=0.5, nullable=False)
+    cooldown_seconds = Column(Float, default=30.0, nullable=False)
+    start_time = Column(Time, nullable=True)  # Daily schedule window; None = all day
+    end_time = Column(Time, nullable=True)
+    days_of_week = Column(Integer, default=127, nullable=False)  # Bitmask, Monday = 1, Sunday = 64
+    enabled = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
 class InferenceSettings(Base):
     __tablename__ = "inference_settings"
 
@@ -2,8 +2,9 @@
 FastAPI dependencies with database integration
 """
 from pathlib import Path
-from typing import Generator, Annotated, Optional
+from typing import AsyncGenerator, Generator, Annotated, Optional
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from .services.alert_service import AlertService
@@ -13,11 +14,13 @@ from .utils import firebase_fcm_service
 
 
 
-from .core.database.connection import get_db, SessionLocal
-from .services.camera_service import camera_service
+from .core.database.connection import get_db, get_read_db, get_async_db, get_async_read_db, SessionLocal
+from .services.camera_service import camera_service, async_camera_service
 from .services.zone_service import zone_service
-from .services.detection_service import detection_service
+from .services.detection_rule_service import detection_rule_service
+from .services.detection_service import detection_service, async_detection_service
 from .services.video_capture import VideoCapture
+from .services.video_analysis_service import video_analysis_service
 from .services.inference_engine import YOLOProcessor as InferenceEngine
 from .utils.detection_manager import DetectionEventManager
 from .services.sys_config_service import SysConfigService
@@ -80,6 +83,14 @@ def get_inference_engine(force_reload: bool = False) -> InferenceEngine:
     """Get inference engine instance with detection manager."""
     return ensure_inference_engine(force_reload=force_reload)
 
+def get_active_inference_engine() -> Optional[InferenceEngine]:
+    """Return the inference engine if it is already running, without touching the database"""
+    return _inference_engine
+
+def get_video_analysis_service():
+    """Get offline video analysis service instance"""
+    return video_analysis_service
+
 def get_sys_config_service() -> SysConfigService:
     """Get system configuration service instance"""
     return SysConfigService()
@@ -88,10 +99,32 @@ def get_database_session() -> Generator[Session, None, None]:
     """Get database session for FastAPI dependency injection"""
     yield from get_db()
 
+def get_read_database_session() -> Generator[Session, None, None]:
+    """Get read-only database session for list and stats endpoints"""
+    yield from get_read_db()
+
+async def get_async_database_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get asyncio database session for FastAPI dependency injection"""
+    async for db in get_async_db():
+        yield db
+
+async def get_async_read_database_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get read-only asyncio database session for list and stats endpoints"""
+    async for db in get_async_read_db():
+        yield db
+
 def get_camera_service():
     """Get camera service instance"""
     return camera_service
 
+def get_detection_rule_service():
+    """Get detection rule service instance"""
+    return detection_rule_service
+
+def get_async_camera_service():
+    """Get asyncio camera service instance"""
+    return async_camera_service
+
 def get_zone_service():
     """Get zone service instance"""
     return zone_service
@@ -100,6 +133,10 @@ def get_detection_service():
     """Get detection service instance"""
     return detection_service
 
+def get_async_detection_service():
+    """Get asyncio detection service instance"""
+    return async_detection_service
+
 def get_detection_event_manager():
     """Get detection event manager instance"""
     global _detection_manager
@@ -112,7 +149,12 @@ def get_firebase_fcm_service():
     """Get Firebase FCM service instance"""
     global _firebase_fcm_service
     if _firebase_fcm_service is None:
-        _firebase_fcm_service = firebase_fcm_service.Firebase_FCM_Service(settings.FIREBASE_SERVICE_ACCOUNT)
+        transport = None
+        if settings.FCM_TRANSPORT_URL:
+            transport = firebase_fcm_service.HTTPTransport(settings.FCM_TRANSPORT_URL)
+        _firebase_fcm_service = firebase_fcm_service.Firebase_FCM_Service(
+            settings.FIREBASE_SERVICE_ACCOUNT, transport=transport
+        )
     return _firebase_fcm_service
 
 def get_alert_service():
@@ -129,8 +171,16 @@ The _orm.Session is not safe for use in concurrent threads.. See session_faq_thr
 
 The Session's usage paradigm is described at /orm/session."""
 DatabaseDep = Annotated[Session, Depends(get_database_session)]
+ReadDatabaseDep = Annotated[Session, Depends(get_read_database_session)]
+AsyncDatabaseDep = Annotated[AsyncSession, Depends(get_async_database_session)]
+AsyncReadDatabaseDep = Annotated[AsyncSession, Depends(get_async_read_database_session)]
 CameraServiceDep = Annotated[object, Depends(get_camera_service)]
 ZoneServiceDep = Annotated[object, Depends(get_zone_service)]
+DetectionRuleServiceDep = Annotated[object, Depends(get_detection_rule_service)]
 DetectionServiceDep = Annotated[object, Depends(get_detection_service)]
+AsyncCameraServiceDep = Annotated[object, Depends(get_async_camera_service)]
+AsyncDetectionServiceDep = Annotated[object, Depends(get_async_detection_service)]
 VideoCaptureServiceDep = Annotated[VideoCapture, Depends(get_video_capture)]
-InferenceEngineDep = Annotated[InferenceEngine, Depends(get_inference_engine)]
\ No newline at end of file
+InferenceEngineDep = Annotated[InferenceEngine, Depends(get_inference_engine)]
+VideoAnalysisServiceDep = Annotated[object, Depends(get_video_analysis_service)]
+ActiveInferenceEngineDep = Annotated[Optional[InferenceEngine], Depends(get_active_inference_engine)]
\ No newline at end of file
@@ -1,6 +1,6 @@
 from alembic.config import Config
 from alembic import command
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
@@ -11,9 +11,17 @@ from .services.camera_service import camera_service
 from .services.cleanup_service import cleanup_service
 from .Settings import settings
 from .data.seed import seed_default_settings, seed_default_zones, seed_default_user
-from .dependencies import get_video_capture , get_inference_engine
+from .dependencies import get_video_capture , get_inference_engine, get_detection_event_manager, get_alert_service, get_active_inference_engine
+from .services.camera_health import CameraState
 from .services.video_capture import CameraConfig
+from .services.video_analysis_service import video_analysis_service
+from .utils.detection_rules import detection_rules
+from .utils.device_token_cache import device_token_cache
+from .utils.metadata_cache import camera_cache
+from .utils import metrics
+from .utils.logging_config import setup_logging, shutdown_logging
 from .api.router import api_router
+from .api.routes.webrtc_stream import rtc_manager
 
 def setup_database():
     """Initialize and migrate database if missing"""
@@ -38,8 +46,64 @@ def setup_database():
         raise
 
 
+def register_runtime_metrics():
+    """Expose service state as gauges that are read only when /metrics is scraped"""
+    video_capture = get_video_capture()
+    detection_manager = get_detection_event_manager()
+
+    def inference_stat(key):
+        engine = get_active_inference_engine()
+        if engine is None:
+            return {}
+        return {
+            camera_id: stats[key]
+            for camera_id, stats in list(engine.processing_stats.items())
+            if key in stats
+        }
+
+    metrics.register_gauge(
+        "nexguard_capture_buffer_depth", "Frames waiting in each camera buffer",
+        lambda: {camera_id: buffer.qsize() for camera_id, buffer in list(video_capture.frame_buffers.items())},
+        label="camera",
+    )
+    metrics.register_gauge(
+        "nexguard_capture_running", "1 while the camera's capture thread is alive",
+        lambda: {camera_id: int(video_capture.is_camera_active(camera_id)) for camera_id in list(video_capture.cameras)},
+        label="camera",
+    )
+    metrics.register_gauge(
+        "nexguard_capture_streaming", "1 while frames are arriving from the camera",
+        lambda: {
+            camera_id: int(health.state == CameraState.STREAMING)
+            for camera_id, health in list(video_capture.health.items())
+        },
+        label="camera",
+    )
+    metrics.register_gauge(
+        "nexguard_inference_fps", "Smoothed inference rate per camera",
+        lambda: inference_stat("fps"), label="camera",
+    )
+    metrics.register_gauge(
+        "nexguard_inference_target_fps", "Inference rate assigned by the rate controller",
+        lambda: inference_stat("target_fps"), label="camera",
+    )
+    metrics.register_gauge(
+        "nexguard_webrtc_active_peers", "Open WebRTC peer connections per camera",
+        rtc_manager.get_active_connections_count, label="camera",
+    )
+    metrics.register_gauge(
+        "nexguard_detection_writes_pending", "Detection writes waiting for the next flush",
+        lambda: detection_manager.detection_writer.pending_count,
+    )
+    metrics.register_gauge(
+        "nexguard_alerts_pending", "Alerts waiting in the dispatcher's coalescing window",
+        lambda: detection_manager.alert_dispatcher.pending_count,
+    )
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    setup_logging()
     setup_database()
     create_tables()
 
@@ -54,17 +118,12 @@ async def lifespan(app: FastAPI):
 
         # Get cameras using the service layer
         cameras = camera_service.get_active_cameras(db)
+        device_token_cache.reload(db)
+        detection_rules.reload(db)
 
         for camera in cameras:
             # Create CameraConfig instance
-            config = CameraConfig(
-                camera_id=camera.id,
-                url=camera.url,
-                fps_target=camera.fps_target,
-                resolution=(camera.resolution_width, camera.resolution_height),
-                enabled=camera.enabled,
-                location=camera.location
-            )
+            config = CameraConfig.from_camera(camera)
 
             added = video_capture.add_camera(config)
             if added:
@@ -72,6 +131,8 @@ async def lifespan(app: FastAPI):
                 camera_service.update_last_active(db, camera.id)
             else:
                 print(f"⚠️ Camera {camera.id} already exists")
+        # Primed after update_last_active so the cached rows carry the new timestamps
+        camera_cache.prime(cameras)
         
         camera_ids = list(video_capture.cameras.keys())
         
@@ -87,6 +148,8 @@ async def lifespan(app: FastAPI):
         await cleanup_service.start()
         print("🧹 Cleanup service started")
 
+        register_runtime_metrics()
+
     except Exception as e:
         print(f"❌ Failed to initialize cameras: {e}")
         raise
@@ -97,8 +160,16 @@ async def lifespan(app: FastAPI):
     
     print("🛑 Shutting down NexGuard API...")
     video_capture.stop_all_cameras()
+    video_analysis_service.shutdown()
+    detection_manager = get_detection_event_manager()
+    detection_manager.detection_writer.stop()
+    print("💾 Pending detections flushed")
+    detection_manager.alert_dispatcher.stop()
+    get_alert_service().notification_log_writer.stop()
+    print("🔔 Pending alerts dispatched")
     await cleanup_service.stop()
     print("🧹 Cleanup service stopped")
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -126,6 +197,14 @@ async def root():
     return {"message": "Welcome to the NexGuard API!"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=503, detail="Metrics are disabled or prometheus-client is not installed")
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/health")
 async def health_check():
     return {
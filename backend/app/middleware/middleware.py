@@ -4,9 +4,11 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
 import logging
 
+from ..core.database.connection import SessionLocal
 from ..dependencies import DatabaseDep
 from ..services.auth_service import auth_service
 from ..schema.user import UserResponse, UserStatus, UserRole
+from ..utils.token_cache import token_user_cache
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +19,6 @@ class AuthMiddleware:
     
     @staticmethod
     def get_current_user_from_token(
-        db: DatabaseDep,
         credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
         access_token: Optional[str] = Cookie(default=None, alias="access_token")
     ) -> UserResponse:
@@ -36,6 +37,10 @@ class AuthMiddleware:
                     headers={"WWW-Authenticate": "Bearer"}
                 )
 
+            cached_user = token_user_cache.get(token_value)
+            if cached_user is not None:
+                return cached_user
+
             username = auth_service.verify_token(token_value)
             if not username:
                 raise HTTPException(
@@ -44,12 +49,17 @@ class AuthMiddleware:
                     headers={"WWW-Authenticate": "Bearer"}
                 )
             
-            user = auth_service.get_user_by_username(db, username)
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found"
-                )
+            # Only cache misses open a session
+            with SessionLocal() as db:
+                user = auth_service.get_user_by_username(db, username)
+                if not user:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="User not found"
+                    )
+                user = UserResponse.model_validate(user)
+
+            token_user_cache.put(token_value, user, auth_service.get_token_expiry(token_value))
             return user
             
         except HTTPException:
@@ -13,4 +13,6 @@ class FrameData:
         self.frame_number = frame_number
         self.resolution = resolution
         self.detections = []
-        self.processed = False
\ No newline at end of file
+        self.processed = False
+        # Native-resolution frame, kept only when tiled inference needs it
+        self.source_frame = None
\ No newline at end of file
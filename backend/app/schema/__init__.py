@@ -2,6 +2,7 @@ from .camera import Camera, CameraCreate, CameraUpdate, CameraWithRelations
 from .detection import Detection, DetectionCreate, DetectionUpdate, DetectionWithRelations
 from .zone import Zone, ZoneCreate, ZoneUpdate, ZoneWithCameras
 from .media import Media, MediaCreate, MediaUpdate, MediaWithRelations, MediaType
+from .detection_rule import DetectionRule, DetectionRuleCreate, DetectionRuleUpdate
 from .settings import (
     InferenceSettings, InferenceSettingsCreate, InferenceSettingsUpdate,
     StorageSettings, StorageSettingsCreate, StorageSettingsUpdate, StorageType
@@ -20,6 +21,9 @@ __all__ = [
     # Media schemas
     "Media", "MediaCreate", "MediaUpdate", "MediaWithRelations", "MediaType",
     
+    # Detection rule schemas
+    "DetectionRule", "DetectionRuleCreate", "DetectionRuleUpdate",
+    
     # Settings schemas
     "InferenceSettings", "InferenceSettingsCreate", "InferenceSettingsUpdate",
     "StorageSettings", "StorageSettingsCreate", "StorageSettingsUpdate", "StorageType",
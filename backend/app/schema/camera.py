@@ -1,6 +1,37 @@
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Literal, Optional, List, Tuple
+from pydantic import BaseModel, Field, field_validator
+
+Polygon = List[Tuple[float, float]]
+
+
+def validate_roi_polygons(polygons: Optional[List[Polygon]]) -> Optional[List[Polygon]]:
+    """Require at least three points per polygon, all inside the normalized frame"""
+    if polygons is None:
+        return None
+    for polygon in polygons:
+        if len(polygon) < 3:
+            raise ValueError("ROI polygons need at least 3 points")
+        for x, y in polygon:
+            if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+                raise ValueError("ROI points must be normalized to the 0-1 range")
+    return polygons or None
+
+
+class StreamOptions(BaseModel):
+    """How the capture thread opens and decodes a camera's stream"""
+    capture_mode: Literal["auto", "grab", "read"] = Field(
+        "auto",
+        description="grab: pull every frame, decode only at fps_target; read: decode on schedule; auto: grab for live streams",
+    )
+    backend: Optional[Literal["opencv", "pyav"]] = Field(
+        None, description="Capture backend; defaults to CAMERA_CAPTURE_BACKEND. Webcams always use OpenCV"
+    )
+    use_substream: bool = Field(False, description="Analyze the camera's substream_url instead of its main stream")
+    rtsp_transport: Optional[Literal["tcp", "udp"]] = Field(None, description="RTSP transport; defaults to TCP")
+    low_latency: bool = Field(False, description="Disable FFmpeg input buffering (fflags nobuffer, flags low_delay)")
+    probesize: Optional[int] = Field(None, ge=32, description="Bytes FFmpeg reads to detect the stream format")
+    analyzeduration_ms: Optional[int] = Field(None, ge=0, description="Time FFmpeg spends probing the stream")
 
 
 class CameraBase(BaseModel):
@@ -13,6 +44,14 @@ class CameraBase(BaseModel):
     resolution_width: int = Field(640, ge=320, le=4096, description="Video width in pixels")
     resolution_height: int = Field(480, ge=240, le=2160, description="Video height in pixels")
     enabled: bool = Field(True, description="Whether camera is active")
+    substream_url: Optional[str] = Field(None, description="Lower-resolution stream of the same camera")
+    stream_options: Optional[StreamOptions] = Field(None, description="Per-camera capture and FFmpeg options")
+    roi_polygons: Optional[List[Polygon]] = Field(
+        None,
+        description="Region-of-interest polygons as normalized [x, y] points; detections outside are ignored",
+    )
+
+    _check_roi = field_validator("roi_polygons")(validate_roi_polygons)
 
 class CameraCreate(CameraBase):
     """Schema for creating a new camera"""
@@ -28,6 +67,11 @@ class CameraUpdate(BaseModel):
     resolution_width: Optional[int] = Field(None, ge=320, le=4096)
     resolution_height: Optional[int] = Field(None, ge=240, le=2160)
     enabled: Optional[bool] = None
+    substream_url: Optional[str] = None
+    stream_options: Optional[StreamOptions] = None
+    roi_polygons: Optional[List[Polygon]] = None
+
+    _check_roi = field_validator("roi_polygons")(validate_roi_polygons)
 
 
 
@@ -4,10 +4,13 @@ from pydantic import BaseModel, Field, field_validator
 
 class DetectionBase(BaseModel):
     """Base detection schema"""
-    camera_id: int = Field(..., description="ID of camera that made detection")
+    camera_id: Optional[int] = Field(..., description="ID of camera that made detection (None for unassigned uploads)")
     timestamp: float = Field(..., description="Unix timestamp of detection")
     detection_type: str = Field(..., description="Type of object detected")
     confidence: float = Field(..., ge=0.0, le=1.0, description="Detection confidence score")
+    end_timestamp: Optional[float] = Field(None, description="Unix timestamp the tracked object was last seen")
+    track_id: Optional[int] = Field(None, description="Tracker id of the object within its camera")
+    source_file: Optional[str] = Field(None, description="Video file the detection came from, for offline analysis")
     notified: bool = Field(False, description="Whether notification was sent")
 
     @field_validator('detection_type')
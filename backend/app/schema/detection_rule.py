@@ -0,0 +1,59 @@
+from datetime import datetime, time
+from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+
+class DetectionRuleBase(BaseModel):
+    """Base detection rule schema"""
+    name: str = Field(..., min_length=1, max_length=100, description="Rule name")
+    detection_type: str = Field(..., min_length=1, max_length=50, description="Model class name, e.g. person")
+    camera_id: Optional[int] = Field(None, description="Restrict to one camera")
+    zone_id: Optional[int] = Field(None, description="Restrict to cameras in one zone")
+    min_confidence: float = Field(0.5, ge=0.0, le=1.0, description="Minimum confidence to record")
+    cooldown_seconds: float = Field(30.0, ge=0.0, description="Minimum seconds between events")
+    start_time: Optional[time] = Field(None, description="Start of the daily active window")
+    end_time: Optional[time] = Field(None, description="End of the daily active window")
+    days_of_week: int = Field(127, ge=0, le=127, description="Active days bitmask, Monday = 1 ... Sunday = 64")
+    enabled: bool = Field(True, description="Whether the rule is evaluated")
+
+    @model_validator(mode="after")
+    def validate_schedule(self):
+        """Start and end times must be given together"""
+        if (self.start_time is None) != (self.end_time is None):
+            raise ValueError("start_time and end_time must both be set or both be empty")
+        self.detection_type = self.detection_type.strip().lower()
+        return self
+
+
+class DetectionRuleCreate(DetectionRuleBase):
+    """Schema for creating a detection rule"""
+    pass
+
+
+class DetectionRuleUpdate(BaseModel):
+    """Schema for updating a detection rule"""
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    detection_type: Optional[str] = Field(None, min_length=1, max_length=50)
+    camera_id: Optional[int] = None
+    zone_id: Optional[int] = None
+    min_confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
+    cooldown_seconds: Optional[float] = Field(None, ge=0.0)
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+    days_of_week: Optional[int] = Field(None, ge=0, le=127)
+    enabled: Optional[bool] = None
+
+    @field_validator('detection_type')
+    def normalize_detection_type(cls, v):
+        """Class names are matched case-insensitively"""
+        return v.strip().lower() if v is not None else v
+
+
+class DetectionRule(DetectionRuleBase):
+    """Complete detection rule schema with database fields"""
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -1,19 +1,26 @@
 import datetime
 from datetime import timezone
 import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 import logging
 from firebase_admin import messaging
 from enum import Enum
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
 
+from ..core.database.connection import SessionLocal
 from ..schema.notification import NotificationPreferenceResponse, NotificationPreferenceUpdate
+from ..Settings import settings
 
 from ..utils.database_crud import CRUDBase
+from ..utils.device_token_cache import device_token_cache
+from ..utils.firebase_fcm_service import MAX_CONDITION_TOPICS
+from ..utils.metadata_cache import camera_cache, zone_cache
+from ..utils.notification_log_writer import NotificationLogWriter
 
 logger = logging.getLogger("nexguard.notifications")
 
-from ..core.models import Detection, NotificationLog, NotificationPreference, UserDeviceToken
+from ..core.models import Detection, NotificationPreference, UserDeviceToken
 
 class NotificationType(str, Enum):
     ACCOUNT_APPROVED = "account_approved"
@@ -35,9 +42,47 @@ class Topics:
     SYSTEM_ANNOUNCEMENTS = "system_announcements"
     ACCOUNT_UPDATES = "account_updates"
 
+    CAMERA_PREFIX = "camera_"
+    ZONE_PREFIX = "zone_"
+    # Preference categories like "detection_type_person" are custom filters, not topics
+    DETECTION_TYPE_PREFIX = "detection_type_"
+
+    @staticmethod
+    def camera(camera_id: int) -> str:
+        return f"{Topics.CAMERA_PREFIX}{camera_id}"
+
+    @staticmethod
+    def zone(zone_id: int) -> str:
+        return f"{Topics.ZONE_PREFIX}{zone_id}"
+
+    @staticmethod
+    def is_alert_topic(category: str) -> bool:
+        return (
+            category == Topics.DETECTION_ALERTS
+            or category.startswith(Topics.CAMERA_PREFIX)
+            or category.startswith(Topics.ZONE_PREFIX)
+        )
+
+    @staticmethod
+    def is_custom_filter(category: str) -> bool:
+        return category.startswith(Topics.DETECTION_TYPE_PREFIX)
+
+    @staticmethod
+    def detection_alert_topics(camera_ids) -> List[str]:
+        """Topics whose subscribers should hear about detections on these cameras"""
+        topics = [Topics.DETECTION_ALERTS]
+        for camera_id in camera_ids:
+            topics.append(Topics.camera(camera_id))
+            camera = camera_cache.get(camera_id)
+            if camera and camera.zone_id is not None:
+                topics.append(Topics.zone(camera.zone_id))
+        return list(dict.fromkeys(topics))
+
 class AlertService:
     def __init__(self, firebase_service=None):
         self.firebase_service = firebase_service
+        self.notification_log_writer = NotificationLogWriter()
+        self._session_factory = SessionLocal
         if not self.firebase_service:
             logger.warning("Firebase FCM service is not available")
 
@@ -46,54 +91,176 @@ class AlertService:
             logger.warning("No detection data available to send alert")
             return
         try:
-            print(f"Sending alert for detection {detection.id} on camera {detection.camera_id}")
-            # Log the Notification in the database
-            self._log_notification(
-                db,
-                user_id=1,
-                notification_type=NotificationType.ALERT,
-                title=f"Security Alert: Detection on Camera {detection.camera_id}",
-                body=f"Detection triggered with confidence {detection.confidence} at {detection.created_at}.",
-                data={"detection_id": detection.id}
-            )
+            self.send_alerts(db, [detection])
+        except Exception as e:
+            logger.error(f"Error sending alert: {e}")
 
-            # Query ONLY active tokens from database
-            user_tokens = db.query(UserDeviceToken).filter(
-                UserDeviceToken.is_active == True
-            ).all()
-            
-            if not user_tokens:
-                print("No active device tokens found in database - no alerts will be sent")
-                logger.info("No active device tokens found - skipping alert notification")
-                return
-            
-            # Extract token strings from database records
-            active_token_strings = [token.device_token for token in user_tokens]
-            print(f"Found {len(active_token_strings)} active tokens in database")
-            logger.info(f"Sending alerts to {len(active_token_strings)} active tokens")
-            
-            # Send multicast notification ONLY to tokens in database
-            failed_tokens = self.firebase_service.send_multicast_notification(
-                tokens=active_token_strings,
-                title=f"Security Alert: Detection on Camera {detection.camera_id}",
-                body=f"Detection triggered with confidence {detection.confidence:.2%} at {detection.created_at.strftime('%Y-%m-%d %H:%M:%S %Z')}.",
-                data={
-                    "notification_type": "alert",
-                    "detection_id": str(detection.id),
-                    "camera_id": str(detection.camera_id)
-                }
+    def send_alerts(self, db: Session, detections: List[Detection]) -> None:
+        """Send one notification covering a burst of detections.
+
+        In "topic" delivery mode the alert is published once to the
+        detection_alerts, camera and zone topics, and only users with custom
+        filters get token-level sends. When the burst spans more topics than
+        one FCM condition allows, the subscribers of those topics are sent to
+        per token instead, each device once. In "token" mode every active token is
+        multicast. Tokens and preferences come from the in-memory cache and the
+        notification log is written in the background, so the database is only
+        touched when FCM reports invalid tokens. Raises on delivery errors so
+        the alert dispatcher can retry.
+        """
+        if not detections:
+            return
+
+        detection_ids = ",".join(str(d.id) for d in detections)
+        logger.debug(f"Sending alert for detections {detection_ids}")
+        title, body = self._format_alert(detections)
+        latest = max(detections, key=lambda d: d.timestamp)
+        data = {
+            "notification_type": "alert",
+            "detection_id": str(latest.id),
+            "detection_ids": detection_ids,
+            "camera_id": str(latest.camera_id),
+            "camera_ids": ",".join(sorted({str(d.camera_id) for d in detections})),
+        }
+
+        if settings.ALERT_DELIVERY_MODE == "topic":
+            topics = Topics.detection_alert_topics(dict.fromkeys(d.camera_id for d in detections))
+            if len(topics) <= MAX_CONDITION_TOPICS:
+                message_ids = self.firebase_service.send_fcm_to_topics(topics, title, body, data)
+                logger.info(f"Alert published to topics {topics}")
+                self._log_alert(db, detections, title, body, message_ids)
+            else:
+                # Separate condition sends would notify devices on topics in both twice
+                subscriber_tokens = self._topic_subscriber_tokens(topics)
+                if subscriber_tokens:
+                    self._send_to_tokens(db, subscriber_tokens, title, body, data)
+                    self._log_alert(db, detections, title, body)
+
+            filtered_tokens = self._custom_filter_tokens(detections)
+            if filtered_tokens:
+                # Topic delivery already succeeded; don't let these trigger a retry
+                try:
+                    self._send_to_tokens(db, filtered_tokens, title, body, data)
+                except Exception as e:
+                    logger.error(f"Error sending alert to filtered devices: {e}")
+            return
+
+        active_token_strings = list(device_token_cache.active_tokens())
+        if not active_token_strings:
+            logger.info("No active device tokens found - skipping alert notification")
+            return
+        self._send_to_tokens(db, active_token_strings, title, body, data)
+        self._log_alert(db, detections, title, body)
+
+    def _log_alert(
+        self, db: Session, detections: List[Detection], title: str, body: str, message_ids: Optional[List[str]] = None
+    ) -> None:
+        # Logged once the send succeeded, so dispatcher retries don't add rows
+        self._log_notification(
+            db,
+            user_id=1,
+            notification_type=NotificationType.ALERT,
+            title=title,
+            body=body,
+            data={"detection_ids": [d.id for d in detections]},
+            firebase_message_ids=message_ids,
+        )
+
+    def _send_to_tokens(self, db: Session, tokens: List[str], title: str, body: str, data: Dict[str, str]) -> None:
+        logger.info(f"Sending alerts to {len(tokens)} active tokens")
+
+        # Send multicast notification ONLY to registered active tokens
+        failed_tokens = self.firebase_service.send_multicast_notification(
+            tokens=tokens,
+            title=title,
+            body=body,
+            data=data
+        )
+
+        # Mark failed tokens as inactive
+        if failed_tokens:
+            logger.info(f"Marking {len(failed_tokens)} failed tokens as inactive")
+            self._mark_invalid_tokens(db, failed_tokens)
+
+        logger.info(f"Alert sent successfully to {len(tokens) - len(failed_tokens)} devices")
+
+    def _custom_filter_tokens(self, detections: List[Detection]) -> List[str]:
+        """Tokens of users whose detection-type filters match any of the detections"""
+        tokens = []
+        for user_id, categories in device_token_cache.enabled_categories().items():
+            if not any(Topics.is_custom_filter(c) for c in categories):
+                continue
+            if any(self._filter_matches(categories, detection) for detection in detections):
+                tokens.extend(device_token_cache.tokens_for_user(user_id))
+        return tokens
+
+    def _topic_subscriber_tokens(self, topics: List[str]) -> List[str]:
+        """Tokens of the devices subscribed to any of the topics, each listed once"""
+        wanted = set(topics)
+        preferences = device_token_cache.preferences()
+        subscribed: Dict[int, bool] = {}
+        tokens = []
+        for token, user_id in device_token_cache.token_owners().items():
+            if user_id not in subscribed:
+                user_topics = self._alert_topics(preferences.get(user_id, {}))
+                subscribed[user_id] = not wanted.isdisjoint(user_topics)
+            if subscribed[user_id]:
+                tokens.append(token)
+        return tokens
+
+    def _filter_matches(self, categories, detection: Detection) -> bool:
+        if f"{Topics.DETECTION_TYPE_PREFIX}{detection.detection_type.lower()}" not in categories:
+            return False
+        return any(topic in categories for topic in Topics.detection_alert_topics([detection.camera_id]))
+
+    def _registration_topics(self, db: Session, user_id: int) -> List[str]:
+        """Alert topics a newly registered device should join"""
+        preferences = dict(db.query(NotificationPreference.category, NotificationPreference.enabled).filter(
+            NotificationPreference.user_id == user_id
+        ).all())
+        return self._alert_topics(preferences)
+
+    @staticmethod
+    def _alert_topics(preferences: Mapping[str, bool]) -> List[str]:
+        """Alert topics the devices of a user with these preferences are on.
+
+        Only the alert categories the user enabled are joined; a user who has
+        not set any alert preference yet gets detection_alerts by default.
+        Users with custom filters receive alerts per token and stay off the
+        alert topics so they are not notified twice or unfiltered.
+        """
+        enabled = [category for category, on in preferences.items() if on]
+        if any(Topics.is_custom_filter(category) for category in enabled):
+            return []
+        if not any(Topics.is_alert_topic(category) for category in preferences):
+            return [Topics.DETECTION_ALERTS]
+        return [category for category in enabled if Topics.is_alert_topic(category)]
+
+    def _format_alert(self, detections: List[Detection]) -> tuple[str, str]:
+        """Build the notification title and body for one or more detections"""
+        locations = []
+        for camera_id in dict.fromkeys(d.camera_id for d in detections):
+            camera_name = camera_cache.display_name(camera_id)
+            zone = zone_cache.zone_for_camera(camera_id)
+            locations.append(f"{camera_name} ({zone.name})" if zone else camera_name)
+
+        if len(detections) == 1:
+            detection = detections[0]
+            return (
+                f"Security Alert: Detection on {locations[0]}",
+                f"Detection triggered with confidence {detection.confidence:.2%} at {detection.created_at.strftime('%Y-%m-%d %H:%M:%S %Z')}.",
             )
-            
-            # Mark failed tokens as inactive
-            if failed_tokens:
-                print(f"Marking {len(failed_tokens)} failed tokens as inactive")
-                self._mark_invalid_tokens(db, failed_tokens)
-            
-            print(f"Alert sent successfully to {len(active_token_strings) - len(failed_tokens)} devices")
 
-        except Exception as e:
-            print(f"Error sending alert: {e}")
-            logger.error(f"Error sending alert: {e}")
+        first = min(d.timestamp for d in detections)
+        last = max(d.timestamp for d in detections)
+        best = max(d.confidence for d in detections)
+        where = locations[0] if len(locations) == 1 else f"{len(locations)} cameras"
+        return (
+            f"Security Alert: {len(detections)} detections on {where}",
+            f"Detections on {', '.join(locations)} between "
+            f"{datetime.datetime.fromtimestamp(first).strftime('%H:%M:%S')} and "
+            f"{datetime.datetime.fromtimestamp(last).strftime('%H:%M:%S')}, highest confidence {best:.2%}.",
+        )
 
     def register_device_token(
         self, 
@@ -116,12 +283,14 @@ class AlertService:
                 existing_token.is_active = True
                 existing_token.updated_at = datetime.datetime.now(timezone.utc)
                 db.commit()
+                device_token_cache.add(existing_token.device_token, user_id)
                 logger.info(f"Updated device token for user {user_id}")
 
                 # Ensure the device stays subscribed to detection alerts
                 if self.firebase_service:
                     try:
-                        self.firebase_service.subscribe_to_topic(existing_token.device_token, Topics.DETECTION_ALERTS)
+                        for topic in self._registration_topics(db, user_id):
+                            self.firebase_service.subscribe_to_topic(existing_token.device_token, topic)
                     except Exception as e:
                         logger.warning(f"Failed to subscribe existing token to detection alerts: {e}")
                         self._mark_invalid_tokens(db, existing_token.device_token)
@@ -139,11 +308,13 @@ class AlertService:
             db.add(new_token)
             db.commit()
             db.refresh(new_token)
+            device_token_cache.add(new_token.device_token, user_id)
             logger.info(f"Registered new device token for user {user_id}")
 
             if self.firebase_service:
                 try:
-                    self.firebase_service.subscribe_to_topic(new_token.device_token, Topics.DETECTION_ALERTS)
+                    for topic in self._registration_topics(db, user_id):
+                        self.firebase_service.subscribe_to_topic(new_token.device_token, topic)
                 except Exception as e:
                     logger.warning(f"Failed to subscribe new token to detection alerts: {e}")
                     self._mark_invalid_tokens(db, new_token.device_token)
@@ -222,29 +393,29 @@ class AlertService:
                 #update the preference if it exists
                 pref.enabled = update.enabled
                 pref.updated_at = datetime.datetime.now(timezone.utc)
-                if pref.enabled:
-                    self.subscribe_to_topic(db, update.token, update.category)
-                else:
-                    # If disabling, unsubscribe from topic
-                    self.unsubscribe_from_topic(db, update.token, update.category)
             else:
                 pref = NotificationPreference(
                     user_id=update.user_id,
                     category=update.category,
                     enabled=update.enabled
                 )
-                if pref.enabled:
-                    self.subscribe_to_topic(db, update.token, update.category)
-                else:
-                    # If disabling, unsubscribe from topic
-                    self.unsubscribe_from_topic(db, update.token, update.category)
                 db.add(pref)
             db.commit()
+            device_token_cache.reload_user(db, update.user_id)
+
+            subscribe, unsubscribe = self._topic_changes(
+                device_token_cache.enabled_categories().get(update.user_id, frozenset()),
+                {update.category: update.enabled}
+            )
+            for topic in subscribe:
+                self.subscribe_to_topic(db, update.token, topic)
+            for topic in unsubscribe:
+                # If disabling, unsubscribe from topic
+                self.unsubscribe_from_topic(db, update.token, topic)
             return True
 
         except Exception as e:
             logger.error(f"Error updating notification preferences: {e}")
-            print(f"Error updating notification preferences: {e}")
             db.rollback()
             return False
 
@@ -293,46 +464,90 @@ class AlertService:
             }
 
     def update_user_preferences_bulk(self, db: Session, user_id: int, preferences: dict[str, bool], device_tokens: list[str]) -> bool:
-        """Update multiple notification preferences for a user"""
+        """Update multiple notification preferences for a user.
+
+        All categories are written in one transaction (one select, one bulk
+        update, one bulk insert) and each affected topic costs a single
+        Firebase call covering every device token.
+        """
         try:
-            for category, enabled in preferences.items():
-                # Update or create preference record
-                pref = db.query(NotificationPreference).filter(
-                    NotificationPreference.user_id == user_id,
-                    NotificationPreference.category == category
-                ).first()
-                
-                if pref:
-                    # Update existing preference
-                    pref.enabled = enabled
-                    pref.updated_at = datetime.datetime.now(timezone.utc)
-                else:
-                    # Create new preference
-                    pref = NotificationPreference(
-                        user_id=user_id,
-                        category=category,
-                        enabled=enabled
-                    )
-                    db.add(pref)
-                
-                # Handle topic subscription/unsubscription for device tokens
-                if self.firebase_service and device_tokens:
-                    for device_token in device_tokens:
-                        if enabled:
-                            # Subscribe to topic
-                            self.subscribe_to_topic_internal(device_token, category)
-                        else:
-                            # Unsubscribe from topic
-                            self.unsubscribe_from_topic_internal(device_token, category)
-            
+            now = datetime.datetime.now(timezone.utc)
+            existing = dict(db.query(NotificationPreference.category, NotificationPreference.id).filter(
+                NotificationPreference.user_id == user_id,
+                NotificationPreference.category.in_(list(preferences))
+            ).all())
+
+            updates = [
+                {"id": existing[category], "enabled": enabled, "updated_at": now}
+                for category, enabled in preferences.items() if category in existing
+            ]
+            inserts = [
+                {"user_id": user_id, "category": category, "enabled": enabled, "created_at": now, "updated_at": now}
+                for category, enabled in preferences.items() if category not in existing
+            ]
+            if updates:
+                db.execute(update(NotificationPreference), updates)
+            if inserts:
+                db.execute(insert(NotificationPreference), inserts)
             db.commit()
-            return True
-
+            device_token_cache.reload_user(db, user_id)
         except Exception as e:
             logger.error(f"Error updating bulk notification preferences: {e}")
             db.rollback()
             return False
 
+        # Handle topic subscription/unsubscription for device tokens
+        if self.firebase_service and device_tokens:
+            subscribe, unsubscribe = self._topic_changes(
+                device_token_cache.enabled_categories().get(user_id, frozenset()), preferences
+            )
+            for topic in subscribe:
+                failed = self.firebase_service.subscribe_tokens_to_topic(device_tokens, topic)
+                if failed:
+                    logger.warning(f"{len(failed)} tokens failed to subscribe to {topic}")
+            for topic in unsubscribe:
+                failed = self.firebase_service.unsubscribe_tokens_from_topic(device_tokens, topic)
+                if failed:
+                    logger.warning(f"{len(failed)} tokens failed to unsubscribe from {topic}")
+        return True
+
+    def update_user_preferences_job(self, user_id: int, preferences: dict[str, bool]) -> None:
+        """Background entry point for PUT /preferences; uses its own session"""
+        with self._session_factory() as db:
+            device_tokens = [
+                token.device_token for token in self.get_user_device_tokens(db, user_id) if token.is_active
+            ]
+            if self.update_user_preferences_bulk(db, user_id, preferences, device_tokens):
+                logger.info(f"Updated notification preferences for user {user_id}")
+            else:
+                logger.error(f"Failed to apply notification preferences for user {user_id}")
+
+    def _topic_changes(self, enabled_categories, preferences: dict[str, bool]) -> tuple[List[str], List[str]]:
+        """Work out which topics a user's devices should join and leave.
+
+        Custom filter categories are never topics. Once a user has a custom
+        filter, every alert topic they enabled is left as well, since their
+        alerts are then delivered per token. That includes detection_alerts,
+        which devices join at registration without a preference row.
+        """
+        filtered = any(Topics.is_custom_filter(c) for c in enabled_categories)
+        subscribe, unsubscribe = [], []
+        for category, enabled in preferences.items():
+            if Topics.is_custom_filter(category):
+                continue
+            if enabled and not (filtered and Topics.is_alert_topic(category)):
+                subscribe.append(category)
+            else:
+                unsubscribe.append(category)
+        if filtered:
+            unsubscribe.extend(
+                c for c in enabled_categories
+                if Topics.is_alert_topic(c) and c not in preferences
+            )
+            if Topics.DETECTION_ALERTS not in unsubscribe:
+                unsubscribe.append(Topics.DETECTION_ALERTS)
+        return subscribe, unsubscribe
+
     def subscribe_to_topic_internal(self, device_token: str, topic: str) -> bool:
         """Internal method to subscribe a device token to a topic"""
         try:
@@ -373,6 +588,9 @@ class AlertService:
                 logger.warning(f"Unexpected invalid_tokens type: {type(invalid_tokens)}")
                 return
 
+            # Stop sending to these right away, even if the database update fails
+            device_token_cache.discard(tokens)
+
             changed = 0
             now = datetime.datetime.now(timezone.utc)
             for token in tokens:
@@ -426,18 +644,18 @@ class AlertService:
         data: Optional[Dict[str, Any]] = None,
         firebase_message_ids: List[str] = None
     ):
-        """Log notification to database"""
+        """Queue a notification log row; it is written by the background log writer"""
         try:
-            notification_log = NotificationLog(
-                user_id=user_id,
-                notification_type=notification_type.value,
-                title=title,
-                body=body,
-                data=json.dumps(data) if data else None,
-                delivered=bool(firebase_message_ids),
-                firebase_message_id=",".join(firebase_message_ids) if firebase_message_ids else None
-            )
-            db.add(notification_log)
-            db.commit()
+            self.notification_log_writer.submit({
+                "user_id": user_id,
+                "notification_type": notification_type.value,
+                "title": title,
+                "body": body,
+                "data": json.dumps(data) if data else None,
+                "sent_at": datetime.datetime.now(timezone.utc),
+                "delivered": bool(firebase_message_ids),
+                "read": False,
+                "firebase_message_id": ",".join(firebase_message_ids) if firebase_message_ids else None,
+            })
         except Exception as e:
             logger.error(f"Error logging notification: {e}")
@@ -14,6 +14,7 @@ from jose import jwt, JWTError
 from ..dependencies import DatabaseDep
 from ..core.models import User
 from ..utils.database_crud import CRUDBase
+from ..utils.token_cache import token_user_cache
 from ..schema.user import UserCreate, UserRole, UserStatus, UserUpdate
 
 load_dotenv()
@@ -65,6 +66,7 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
         
         db.delete(user)
         db.commit()
+        token_user_cache.invalidate_user(user_id)
         return True
 
     def get_user_by_username(self, db: Session, username: str) -> Optional[User]:
@@ -125,6 +127,7 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
         if user:
             user.last_login = datetime.now()
             db.commit()
+        token_user_cache.invalidate_user(user_id)
             
     def get_users_by_status(
         self,
@@ -153,6 +156,7 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
         
         db.commit()
         db.refresh(user)
+        token_user_cache.invalidate_user(user_id)
         return user
 
     def update_user_role(self, db: Session, user_id: int, new_role: UserRole) -> User:
@@ -166,6 +170,7 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
         
         db.commit()
         db.refresh(user)
+        token_user_cache.invalidate_user(user_id)
         return user
     
     def create_access_token(self, username: str, expires_delta: Optional[timedelta] = None) -> str:
@@ -228,6 +233,14 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
                 headers={"WWW-Authenticate": "Bearer"}
             )
 
+    def get_token_expiry(self, token: str) -> Optional[float]:
+        """Read the exp claim (epoch seconds) of an already verified token"""
+        try:
+            exp = jwt.get_unverified_claims(token).get("exp")
+            return float(exp) if exp is not None else None
+        except JWTError:
+            return None
+
     def decode_token(self, token: str) -> Dict[str, Any]:
         """Decode token and return full payload (for debugging/admin use)"""
         try:
@@ -264,6 +277,7 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
             update_data['password'] = self.hash_password(update_data['password'])
         
         updated_user = self.update(db=db, db_obj=user, obj_in=update_data)
+        token_user_cache.invalidate_user(user_id)
         return updated_user
 
     def change_password(self, db: Session, user_id: int, old_password: str, new_password: str) -> bool:
@@ -283,6 +297,7 @@ class AuthService(CRUDBase[User, UserCreate, UserUpdate]):
         
         hashed_new_password = self.hash_password(new_password)
         self.update(db=db, db_obj=user, obj_in={"password": hashed_new_password})
+        token_user_cache.invalidate_user(user_id)
         return True
 
 # Create singleton instance
@@ -0,0 +1,84 @@
+"""
+Connection health for capture threads.
+
+Each camera's capture thread acts as its own supervisor. It moves through
+these states:
+
+    connecting  opening the stream; a failed open retries after an
+                exponential backoff (base * 2^n, capped, with jitter)
+    streaming   frames are arriving
+    degraded    the stream is open but reads are failing or timing out;
+                after ``max_read_failures`` in a row it is reopened
+    offline     ``offline_after`` opens in a row have failed; the thread
+                blocks on an event and probes again only every
+                ``offline_retry`` seconds, or when woken early
+
+While a thread waits (backoff or offline) it blocks on an event, so an
+unreachable camera costs no CPU.
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from ..Settings import settings
+
+
+class CameraState(str, Enum):
+    """Enum for capture connection states"""
+    CONNECTING = "connecting"
+    STREAMING = "streaming"
+    DEGRADED = "degraded"
+    OFFLINE = "offline"
+    STOPPED = "stopped"
+
+
+@dataclass
+class CameraHealth:
+    state: CameraState = CameraState.STOPPED
+    state_since: float = 0.0
+    open_attempts: int = 0  # Consecutive failed opens
+    read_failures: int = 0  # Consecutive failed reads
+    reconnects: int = 0
+    last_frame_at: Optional[float] = None
+    last_error: Optional[str] = None
+    next_attempt_at: Optional[float] = None
+
+    def __post_init__(self):
+        # wake cuts a reconnect backoff short; stopped also ends throttle waits
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+
+    def set_state(self, state: CameraState, error: Optional[str] = None) -> bool:
+        """Record a transition; returns True if the state changed"""
+        if error is not None:
+            self.last_error = error
+        if state == self.state:
+            return False
+        self.state = state
+        self.state_since = time.time()
+        return True
+
+    def as_dict(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "state": self.state.value,
+            "state_for": round(now - self.state_since, 1) if self.state_since else None,
+            "reconnects": self.reconnects,
+            "read_failures": self.read_failures,
+            "last_frame_age": round(now - self.last_frame_at, 1) if self.last_frame_at else None,
+            "next_retry_in": round(max(0.0, self.next_attempt_at - now), 1) if self.next_attempt_at else None,
+            "last_error": self.last_error,
+        }
+
+
+def reconnect_delay(
+    attempt: int,
+    base: float = settings.CAMERA_RECONNECT_BASE_SECONDS,
+    cap: float = settings.CAMERA_RECONNECT_MAX_SECONDS,
+) -> float:
+    """Backoff before open ``attempt`` (1-based), with +-20% jitter so cameras behind one switch don't retry in lockstep"""
+    delay = min(cap, base * 2 ** max(0, attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
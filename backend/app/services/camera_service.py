@@ -1,10 +1,12 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from datetime import  datetime
 
 from ..core.models import Camera, Zone
 from ..schema import CameraCreate, CameraUpdate, Camera as CameraSchema
-from ..utils.database_crud import CRUDBase, DatabaseManager
+from ..utils.database_crud import AsyncCRUDBase, CRUDBase, DatabaseManager
 
 
 class CameraService(CRUDBase[Camera, CameraCreate, CameraUpdate]):
@@ -74,4 +76,67 @@ class CameraService(CRUDBase[Camera, CameraCreate, CameraUpdate]):
             db.refresh(camera)
         return camera
 
-camera_service = CameraService()
\ No newline at end of file
+camera_service = CameraService()
+
+
+class AsyncCameraService(AsyncCRUDBase[Camera, CameraCreate, CameraUpdate]):
+    """Service for camera operations on an AsyncSession"""
+
+    def __init__(self):
+        super().__init__(Camera)
+
+    async def get_by_camera_id(self, db: AsyncSession, camera_id: int) -> Optional[Camera]:
+        """Get camera by camera_id with its zone loaded"""
+        result = await db.execute(
+            select(Camera).options(selectinload(Camera.zone)).where(Camera.id == camera_id)
+        )
+        return result.scalars().first()
+
+    async def get_by_zone(self, db: AsyncSession, zone_id: int) -> List[Camera]:
+        """Get all cameras in a specific zone"""
+        result = await db.execute(select(Camera).where(Camera.zone_id == zone_id))
+        return list(result.scalars().all())
+
+    async def get_active_cameras(self, db: AsyncSession) -> List[Camera]:
+        """Get all enabled cameras"""
+        result = await db.execute(select(Camera).where(Camera.enabled == True))
+        return list(result.scalars().all())
+
+    async def create_camera(self, db: AsyncSession, camera_data: CameraCreate) -> Camera:
+        """Create a new camera"""
+        if camera_data.zone_id is not None:
+            if not await DatabaseManager.validate_foreign_key_async(db, Zone, camera_data.zone_id):
+                raise ValueError(f"Zone with id {camera_data.zone_id} does not exist")
+
+        return await self.create(db, obj_in=camera_data)
+
+    async def update_camera(self, db: AsyncSession, id: int, camera_data: CameraUpdate) -> Optional[Camera]:
+        """Update camera with validation"""
+        camera = await self.get(db, id)
+        if not camera:
+            return None
+
+        if camera_data.zone_id is not None:
+            if not await DatabaseManager.validate_foreign_key_async(db, Zone, camera_data.zone_id):
+                raise ValueError(f"Zone with id {camera_data.zone_id} does not exist")
+
+        return await self.update(db, db_obj=camera, obj_in=camera_data)
+
+    async def _set_enabled(self, db: AsyncSession, camera_id: int, enabled: bool) -> Optional[Camera]:
+        camera = await self.get(db, camera_id)
+        if camera:
+            camera.enabled = enabled
+            camera.last_active = datetime.now()
+            await db.commit()
+            await db.refresh(camera)
+        return camera
+
+    async def disable_camera(self, db: AsyncSession, camera_id: int) -> Optional[Camera]:
+        """Disable a camera"""
+        return await self._set_enabled(db, camera_id, False)
+
+    async def enable_camera(self, db: AsyncSession, camera_id: int) -> Optional[Camera]:
+        """Enable a camera"""
+        return await self._set_enabled(db, camera_id, True)
+
+async_camera_service = AsyncCameraService()
\ No newline at end of file
@@ -5,6 +5,7 @@ based on the retention period configured in storage settings.
 
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional
@@ -14,6 +15,7 @@ from sqlalchemy import and_
 from ..core.models import Detection, Media, StorageSettings
 from ..core.database.connection import SessionLocal
 from ..Settings import settings
+from ..utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +65,7 @@ class CleanupService:
                 
     async def _run_cleanup(self):
         """Execute the cleanup process"""
+        started = time.perf_counter()
         db = SessionLocal()
         try:
             # Get storage settings
@@ -138,6 +141,7 @@ class CleanupService:
             
             # Commit all changes
             db.commit()
+            self._record_metrics(started, detection_count, media_count, deleted_files_count)
             
             # Log summary
             logger.info(
@@ -185,6 +189,8 @@ class CleanupService:
                     "files_deleted": 0
                 }
             
+            started = time.perf_counter()
+
             # Calculate cutoff date
             cutoff_date = datetime.now() - timedelta(days=days)
             cutoff_timestamp = cutoff_date.timestamp()
@@ -223,6 +229,7 @@ class CleanupService:
                 db.delete(detection)
             
             db.commit()
+            self._record_metrics(started, detection_count, media_count, deleted_files_count)
             
             return {
                 "success": True,
@@ -240,6 +247,13 @@ class CleanupService:
         finally:
             db.close()
 
+    @staticmethod
+    def _record_metrics(started: float, detections: int, media: int, files: int) -> None:
+        metrics.cleanup_duration.observe(time.perf_counter() - started)
+        metrics.cleanup_removed.labels(kind="detection").inc(detections)
+        metrics.cleanup_removed.labels(kind="media").inc(media)
+        metrics.cleanup_removed.labels(kind="file").inc(files)
+
 
 # Global instance
 cleanup_service = CleanupService()
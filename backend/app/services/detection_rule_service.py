@@ -0,0 +1,49 @@
+from typing import List, Optional
+from sqlalchemy.orm import Session
+
+from ..core.models import DetectionRule
+from ..schema.detection_rule import DetectionRuleCreate, DetectionRuleUpdate
+from ..utils.database_crud import CRUDBase
+
+
+class DetectionRuleService(CRUDBase[DetectionRule, DetectionRuleCreate, DetectionRuleUpdate]):
+    """Service for managing detection rules"""
+
+    def __init__(self):
+        super().__init__(DetectionRule)
+
+    def get_by_id(self, db: Session, rule_id: int) -> Optional[DetectionRule]:
+        """Get rule by ID"""
+        return db.query(DetectionRule).filter(DetectionRule.id == rule_id).first()
+
+    def get_all_rules(self, db: Session) -> List[DetectionRule]:
+        """Get all rules"""
+        return db.query(DetectionRule).order_by(DetectionRule.id).all()
+
+    def create_rule(self, db: Session, rule_data: DetectionRuleCreate) -> DetectionRule:
+        """Create a new rule"""
+        return self.create(db, obj_in=rule_data)
+
+    def update_rule(self, db: Session, rule_id: int, rule_data: DetectionRuleUpdate) -> Optional[DetectionRule]:
+        """Update a rule"""
+        rule = self.get_by_id(db, rule_id)
+        if not rule:
+            return None
+        # Check the merged row, not just the request, so no half schedule is stored
+        changes = rule_data.model_dump(exclude_unset=True)
+        start_time = changes.get("start_time", rule.start_time)
+        end_time = changes.get("end_time", rule.end_time)
+        if (start_time is None) != (end_time is None):
+            raise ValueError("start_time and end_time must both be set or both be empty")
+        return self.update(db, db_obj=rule, obj_in=rule_data)
+
+    def delete_rule(self, db: Session, rule_id: int) -> Optional[DetectionRule]:
+        """Delete a rule"""
+        rule = self.get_by_id(db, rule_id)
+        if not rule:
+            return None
+        db.delete(rule)
+        db.commit()
+        return rule
+
+detection_rule_service = DetectionRuleService()
@@ -1,16 +1,38 @@
+import asyncio
 import base64
+import logging
 from pathlib import Path
 from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
-from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, desc, select
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime, timedelta
 
 from ..Settings import settings
 
 from ..core.models import Detection, Camera, Media
 from ..schema import DetectionCreate, DetectionUpdate, Detection as DetectionSchema
-from ..utils.database_crud import CRUDBase, DatabaseManager
+from ..utils.database_crud import AsyncCRUDBase, CRUDBase, DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+def attach_image_data(detections: List[Detection]) -> None:
+    """Attach base64 image payloads to each detection's image media"""
+    try:
+        for det in detections:
+            #Load detection data
+            det.image_media = [m for m in det.media if m.media_type == "image"]
+            #Load image data if available
+            for m in det.image_media:
+                abs_path = settings.get_absolute_path(m.path)
+                logger.debug(f"Loading image data for media id {m.id} from {abs_path}")
+                if abs_path.exists():
+                    with open(abs_path, "rb") as f:
+                        m.image_data = base64.b64encode(f.read()).decode("ascii")
+    except Exception as e:
+        logger.error(f"Error loading image data: {e}")
 
 
 class DetectionService(CRUDBase[Detection, DetectionCreate, DetectionUpdate]):
@@ -77,20 +99,7 @@ class DetectionService(CRUDBase[Detection, DetectionCreate, DetectionUpdate]):
             query = query.filter(Detection.camera_id == camera_id)
 
         detections = query.order_by(desc(Detection.timestamp)).all()
-        try:
-            for det in detections:
-                #Load detection data
-                det.image_media = [m for m in det.media if m.media_type == "image"]
-                #Load image data if available
-                for m in det.image_media:
-                    print(f"Loading image data for media id {m.id} from path {m.path}")
-                    abs_path = settings.get_absolute_path(m.path)
-                    print(f"Absolute path: {abs_path}")
-                    if abs_path.exists():
-                        with open(abs_path, "rb") as f:
-                            m.image_data = base64.b64encode(f.read()).decode("ascii")
-        except Exception as e:
-            print(f"Error loading image data: {e}")
+        attach_image_data(detections)
         return detections
     
 
@@ -116,7 +125,7 @@ class DetectionService(CRUDBase[Detection, DetectionCreate, DetectionUpdate]):
         
         if media:
             abs_path = settings.get_absolute_path(media.path)
-            print(f"Resolved media path: {abs_path}")
+            logger.debug(f"Resolved media path: {abs_path}")
 
             if abs_path.exists():
                 return str(abs_path)
@@ -133,4 +142,103 @@ class DetectionService(CRUDBase[Detection, DetectionCreate, DetectionUpdate]):
         return deleted_count
 
 
-detection_service = DetectionService()
\ No newline at end of file
+detection_service = DetectionService()
+
+
+class AsyncDetectionService(AsyncCRUDBase[Detection, DetectionCreate, DetectionUpdate]):
+    """Service for detection operations on an AsyncSession"""
+    def __init__(self):
+        super().__init__(Detection)
+
+    async def create_detection(self, db: AsyncSession, detection_data: DetectionCreate) -> Detection:
+        """Create a new detection"""
+        if not await DatabaseManager.validate_foreign_key_async(db, Camera, detection_data.camera_id):
+            raise ValueError(f"Camera with id {detection_data.camera_id} does not exist")
+
+        return await self.create(db, obj_in=detection_data)
+
+    async def get_by_camera(
+        self,
+        db: AsyncSession,
+        camera_id: int,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Detection]:
+        """Get detections for a specific camera"""
+        result = await db.execute(
+            select(Detection)
+            .where(Detection.camera_id == camera_id)
+            .order_by(desc(Detection.timestamp))
+            .offset(skip)
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_recent_detections(
+        self,
+        db: AsyncSession,
+        hours: int = 24,
+        limit: int = 100
+    ) -> List[Detection]:
+        """Get recent detections within specified hours"""
+        since_timestamp = (datetime.now() - timedelta(hours=hours)).timestamp()
+        result = await db.execute(
+            select(Detection)
+            .where(Detection.timestamp >= since_timestamp)
+            .order_by(desc(Detection.timestamp))
+            .limit(limit)
+        )
+        return list(result.scalars().all())
+
+    async def get_by_date(
+        self,
+        db: AsyncSession,
+        date: datetime,
+        camera_id: Optional[int] = None
+    ) -> List[DetectionSchema]:
+        """Get detections for a specific date"""
+        start_of_day = date
+        end_of_day   = start_of_day + timedelta(days=1)
+
+        query = (
+            select(Detection)
+            .options(selectinload(Detection.media))
+            .where(
+                Detection.timestamp >= start_of_day.timestamp(),
+                Detection.timestamp <  end_of_day.timestamp()
+            )
+        )
+
+        if camera_id:
+            query = query.where(Detection.camera_id == camera_id)
+
+        result = await db.execute(query.order_by(desc(Detection.timestamp)))
+        detections = list(result.scalars().all())
+        # Image files are read off the event loop
+        await asyncio.to_thread(attach_image_data, detections)
+        return detections
+
+    async def mark_as_notified(self, db: AsyncSession, detection_id: int) -> Optional[Detection]:
+        """Mark a detection as notified"""
+        detection = await self.get(db, detection_id)
+        if detection:
+            detection.notified = True
+            await db.commit()
+            await db.refresh(detection)
+        return detection
+
+    async def get_media_filepath(self, db: AsyncSession, id: int, media_type: str) -> Optional[str]:
+        """Get the file path of a media item by its ID (return Absolute path if exists)"""
+        result = await db.execute(
+            select(Media.path).where(Media.detection_id == id, Media.media_type == media_type).limit(1)
+        )
+        media_path = result.scalar_one_or_none()
+
+        if media_path:
+            abs_path = settings.get_absolute_path(media_path)
+            if await asyncio.to_thread(abs_path.exists):
+                return str(abs_path)
+        return None
+
+
+async_detection_service = AsyncDetectionService()
@@ -1,16 +1,28 @@
 import asyncio
+import logging
 import threading
 import numpy as np
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from ultralytics import YOLO
-import queue
 
 from .video_capture import VideoCapture
 
 
 from ..utils.detection_manager import DetectionEventManager
+from ..utils.detection_rules import detection_rules
+from ..utils.roi import roi_masks
+from ..utils.tracker import ObjectTracker
+from ..utils.inference_preprocess import LetterboxBuffer, nms, tile_windows
+from ..utils.rate_controller import InferenceRateController
+from ..utils.inference_stats import ResultSnapshot, StageTimings
+from ..utils.frame_signal import FrameSignal
+from ..utils import metrics
+from ..utils.profiling import spans
+from ..Settings import settings
+
+logger = logging.getLogger(__name__)
 
 class YOLOProcessor:
     """Processes multiple camera streams using YOLOv11 for object detection."""
@@ -30,9 +42,17 @@ class YOLOProcessor:
         self.processing_threads = {}
         self.video_capture = None
         self.stop_flags = {}
-        self.results_buffer = {}
+        self.latest_results = {}
+        self.result_snapshots = {}
+        # Kept across stop/start so waiters never lose their signal
+        self.result_signals: Dict[Any, FrameSignal] = {}
+        self.stage_timings = {}
         self.display_buffers = {}
         self.processing_stats = {}
+        self.trackers = {}
+        self.letterboxes = {}
+        self.imgsz = settings.INFERENCE_IMAGE_SIZE
+        self.rate_controller = InferenceRateController() if settings.INFERENCE_RATE_CONTROL else None
         self._model_lock = threading.Lock()
         
         self.detection_manager = detection_manager
@@ -47,15 +67,19 @@ class YOLOProcessor:
             raise FileNotFoundError(f"Model file not found: {resolved_path}")
 
         with self._model_lock:
-            print(f"Loading YOLO model from {resolved_path}")
+            logger.info(f"Loading YOLO model from {resolved_path}")
             self.model = YOLO(str(resolved_path))
             self.model_path = resolved_path
+            detection_rules.bind_class_names(self.model.names)
             if conf_threshold is not None:
-                self.conf_threshold = conf_threshold
+                self.set_conf_threshold(conf_threshold)
 
     def set_conf_threshold(self, conf_threshold: float) -> None:
         """Update the detection confidence threshold."""
         self.conf_threshold = conf_threshold
+        # Boxes the detector would report on its own are the ones that start tracks
+        for tracker in list(self.trackers.values()):
+            tracker.high_confidence = conf_threshold
 
     def connect_video_capture(self, video_capture):
         """Connect to an existing VideoCapture instance."""
@@ -66,8 +90,8 @@ class YOLOProcessor:
             self.detection_manager.inference_engine = self
     
     def start_processing(self, camera_ids, video_capture: VideoCapture = None):
-        print(f"Starting YOLO processing for cameras: {camera_ids}")
-        print(f"VideoCapture instance: {video_capture}")
+        logger.info(f"Starting YOLO processing for cameras: {camera_ids}")
+        logger.debug(f"VideoCapture instance: {video_capture}")
         """
         Start processing threads for specified cameras or all enabled cameras.
         
@@ -78,7 +102,7 @@ class YOLOProcessor:
         vc = video_capture if video_capture is not None else self.video_capture
         
         if vc is None:
-            print("❌ Error: No video_capture instance available.")
+            logger.error("❌ Error: No video_capture instance available.")
             raise RuntimeError("No video_capture instance available. Either pass it as parameter or call connect_video_capture() first.")
         
         self.video_capture = vc
@@ -94,21 +118,25 @@ class YOLOProcessor:
 
         for camera_id in camera_ids:
             if camera_id not in vc.cameras:
-                print(f"Camera {camera_id} not found.")
+                logger.warning(f"Camera {camera_id} not found.", extra={"camera_id": camera_id})
                 continue
             
             if camera_id in self.processing_threads and self.processing_threads[camera_id].is_alive():
-                print(f"Processing for camera {camera_id} is already running.")
+                logger.info(f"Processing for camera {camera_id} is already running.", extra={"camera_id": camera_id})
                 continue
             
-            self.results_buffer[camera_id] = queue.Queue(maxsize=5)
             self.stop_flags[camera_id] = False
             self.processing_stats[camera_id] = {
                 "processed_frames": 0,
-                "last_processing_time": 0,
+                "last_processing_time": 0,  # Unix time the last frame finished
                 "fps": 0,
-                "last_inference_time": 0
+                "last_inference_time": 0  # Model time of the last frame, in ms
             }
+            self.stage_timings[camera_id] = StageTimings()
+            if settings.TRACKING_ENABLED:
+                self.trackers[camera_id] = ObjectTracker(high_confidence=self.conf_threshold)
+            if self.rate_controller:
+                self.rate_controller.register(camera_id, vc.cameras[camera_id].fps_target)
             
             thread = threading.Thread(
                 target=self._process_camera_stream,
@@ -117,7 +145,7 @@ class YOLOProcessor:
             )
             self.processing_threads[camera_id] = thread
             thread.start()
-            print(f"Started YOLO processing for camera {camera_id}")
+            logger.info(f"Started YOLO processing for camera {camera_id}", extra={"camera_id": camera_id})
 
     def stop_processing(self, camera_ids=None):
         """
@@ -130,20 +158,30 @@ class YOLOProcessor:
         if camera_ids is None:
             camera_ids = list(self.processing_threads.keys())
 
-        # Set stop flags
+        # Set stop flags and wake threads waiting for a frame
         for camera_id in camera_ids:
             if camera_id in self.stop_flags:
                 self.stop_flags[camera_id] = True
+                if self.video_capture:
+                    self.video_capture.interrupt_frame_waiters(camera_id)
 
         for camera_id in camera_ids:
             thread = self.processing_threads.get(camera_id)
             if thread and thread.is_alive():
                 thread.join(timeout=3.0)
-                print(f"Stopped YOLO processing for camera {camera_id}")
+                logger.info(f"Stopped YOLO processing for camera {camera_id}", extra={"camera_id": camera_id})
             self.processing_threads.pop(camera_id, None)
-            self.results_buffer.pop(camera_id, None)
+            self.latest_results.pop(camera_id, None)
+            self.result_snapshots.pop(camera_id, None)
             self.processing_stats.pop(camera_id, None)
+            self.stage_timings.pop(camera_id, None)
             self.stop_flags.pop(camera_id, None)
+            self.letterboxes.pop(camera_id, None)
+            if self.rate_controller:
+                self.rate_controller.unregister(camera_id)
+            tracker = self.trackers.pop(camera_id, None)
+            if tracker and self.detection_manager:
+                self.detection_manager.end_tracks(camera_id, tracker.reset())
         
     def _process_camera_stream(self, camera_id: str):
         """
@@ -153,41 +191,103 @@ class YOLOProcessor:
             camera_id (str): The camera ID to process.
         """
         last_frame_number = -1
+        last_sequence = 0
         frames_processed = 0
+        fps = 0.0
+        last_finished = None
+        timings = self.stage_timings.get(camera_id) or StageTimings()
+        inference_metric = metrics.inference_latency.labels(camera=str(camera_id))
+        latency_metric = metrics.frame_latency.labels(camera=str(camera_id))
         
         while not self.stop_flags.get(camera_id, True):
+            # Frames arriving before the camera's next slot are skipped, not queued
+            if self.rate_controller:
+                wait = self.rate_controller.delay(camera_id, time.time())
+                if wait > 0:
+                    # Budgets change at most once per control interval, so sleep to the slot
+                    time.sleep(min(wait, settings.INFERENCE_CONTROL_INTERVAL_SECONDS))
+                    continue
+
+            # Block until capture publishes a frame newer than the last one processed;
+            # the timeout only bounds how long a stop flag can go unnoticed
+            sequence = self.video_capture.wait_for_frame(camera_id, last_sequence, timeout=1.0)
+            if sequence <= last_sequence:
+                continue
+            last_sequence = sequence
+
             frame_data = self.video_capture.get_latest_frame(camera_id)
             
-            if frame_data is None:
-                time.sleep(0.01)
-                continue
-                
-            if frame_data.frame_number == last_frame_number:
-                time.sleep(0.01)
+            if frame_data is None or frame_data.frame_number <= last_frame_number:
                 continue
                 
             last_frame_number = frame_data.frame_number
             
             if self.model is None:
                 raise RuntimeError("Inference engine model was unloaded during processing")
+            started = time.time()
+            timings.record("queue_wait", max(started - frame_data.timestamp, 0.0))
+
+            # Tiling runs on the native frame when the capture thread kept it
+            source = frame_data.frame
+            if settings.INFERENCE_TILING and getattr(frame_data, "source_frame", None) is not None:
+                source = frame_data.source_frame
+
+            # Only the ROI bounding box is sent to the model; boxes are mapped back below
+            roi = roi_masks.get(camera_id, source.shape)
+            region = roi.crop(source) if roi is not None else source
+
+            tracker = self.trackers.get(camera_id)
+            # While tracking, lower scores are kept for the tracker's second association pass
+            conf = min(self.conf_threshold, settings.TRACK_LOW_CONFIDENCE) if tracker is not None else self.conf_threshold
+
+            with spans.span("inference.preprocess"):
+                batch, layout = self._prepare(camera_id, region)
+            model_started = time.time()
+            with spans.span("inference.model"):
+                results = self.model(batch, conf=conf, imgsz=self.imgsz, verbose=False)
+            model_finished = time.time()
+            timings.record("preprocess", model_started - started)
+            timings.record("inference", model_finished - model_started)
+
+            xyxy, confidences, class_ids, names = self._decode(results, layout)
+            detection_rules.bind_class_names(names)
+            xyxy = xyxy.round().astype(int)
+            if roi is not None:
+                xyxy = roi.to_frame(xyxy)
+                keep = roi.contains(xyxy)
+                xyxy, confidences, class_ids = xyxy[keep], confidences[keep], class_ids[keep]
+            if source is not frame_data.frame:
+                height, width = frame_data.frame.shape[:2]
+                scale = np.array([width, height, width, height]) / np.array(source.shape[1::-1] * 2)
+                xyxy = (xyxy * scale).round().astype(int)
 
-            # Process frame with YOLO
-            results = self.model(frame_data.frame, conf=self.conf_threshold, verbose=False)
             # Clear previous detections
             frame_data.detections = []
             
-            for result in results:
-                boxes = result.boxes.cpu().numpy()
-                for i, box in enumerate(boxes):
-                    detection = {
-                        'box': box.xyxy[0].astype(int),
-                        'conf': float(box.conf[0]),
-                        'cls': int(box.cls[0]),
-                        'name': result.names[int(box.cls[0])]
-                    }
-                    frame_data.detections.append(detection)
-                    # Record detection synchronously
-                    if self.detection_manager:
+            track_ids = [None] * len(xyxy)
+            if tracker is not None:
+                track_ids, ended = tracker.update(xyxy, confidences, class_ids, frame_data.timestamp)
+                if ended and self.detection_manager:
+                    self.detection_manager.end_tracks(camera_id, ended)
+
+            for i in range(len(xyxy)):
+                # Below the threshold a box only counts when it extended a confirmed track
+                if track_ids[i] is None and confidences[i] < self.conf_threshold:
+                    continue
+                detection = {
+                    'box': xyxy[i],
+                    'conf': float(confidences[i]),
+                    'cls': int(class_ids[i]),
+                    'name': names[int(class_ids[i])],
+                    'track_id': track_ids[i],
+                }
+                frame_data.detections.append(detection)
+                # Tentative tracks wait for confirmation before they can open an event
+                if tracker is not None and track_ids[i] is None:
+                    continue
+                # Record detection synchronously
+                if self.detection_manager:
+                    with spans.span("detection.record"):
                         self.detection_manager.record_detection(camera_id, frame_data, detection , self)
                     
             # Create annotated frame
@@ -197,21 +297,115 @@ class YOLOProcessor:
             frame_data.annotated_frame = annotated_frame
             frame_data.processed = True
             
-            # Update buffer
-            try:
-                if self.results_buffer[camera_id].full():
-                    self.results_buffer[camera_id].get_nowait()
-                self.results_buffer[camera_id].put(frame_data, block=False)
-            except (queue.Full, queue.Empty):
-                pass
+            # Publish by reference swap; readers never touch a queue or a lock
+            finished = time.time()
+            self.latest_results[camera_id] = frame_data
+            self.result_snapshots[camera_id] = ResultSnapshot.from_frame(frame_data, finished)
+            self._result_signal(camera_id).publish(frame_data.frame_number)
+            timings.record("postprocess", finished - model_finished)
+            if spans.enabled:
+                # Decode, ROI filtering, tracking and record_detection calls
+                spans.record("inference.postprocess", finished - model_finished)
+            inference_metric.observe(model_finished - model_started)
+            latency_metric.observe(finished - frame_data.timestamp)
             
             frames_processed += 1
+            if last_finished is not None and finished > last_finished:
+                fps += 0.1 * (1.0 / (finished - last_finished) - fps)
+            last_finished = finished
+
+            stats = {
+                "processed_frames": frames_processed,
+                "last_processing_time": finished,
+                "fps": round(fps, 2),
+                "last_inference_time": round((model_finished - model_started) * 1000, 2),
+            }
+            if self.rate_controller:
+                self.rate_controller.report(
+                    camera_id, frame_data.timestamp, started, finished, len(frame_data.detections)
+                )
+                stats.update(self.rate_controller.stats(camera_id))
+            if camera_id in self.processing_stats:
+                self.processing_stats[camera_id] = stats
         
-        print(f"YOLO processing thread for camera {camera_id} has ended")
+        logger.info(f"YOLO processing thread for camera {camera_id} has ended", extra={"camera_id": camera_id})
         
+    def detect_batch(self, images: List[np.ndarray], letterboxes: List[LetterboxBuffer]):
+        """
+        Run one batched model call over several frames (e.g. offline video analysis).
+
+        Args:
+            images: Frames to analyse, all from the same source.
+            letterboxes: One reusable buffer per batch slot, at least len(images).
+
+        Returns:
+            Tuple of (per-image list of (xyxy, confidences, class ids), class names).
+        """
+        if self.model is None:
+            raise RuntimeError("Inference engine has no model loaded. Call load_model() first.")
+        canvases, layouts = [], []
+        for image, letterbox in zip(images, letterboxes):
+            canvas, scale, pad = letterbox(image)
+            canvases.append(canvas)
+            layouts.append((scale, pad, [], image.shape[0], image.shape[1]))
+
+        results = self.model(canvases, conf=self.conf_threshold, imgsz=self.imgsz, verbose=False)
+        detections = []
+        for result, layout in zip(results, layouts):
+            xyxy, confidences, class_ids, _ = self._decode([result], layout)
+            detections.append((xyxy, confidences, class_ids))
+        return detections, (results[0].names if len(results) else {})
+
+    def _prepare(self, camera_id, image: np.ndarray):
+        """Build the model input for an image and the layout needed to map boxes back"""
+        letterbox = self.letterboxes.get(camera_id)
+        if letterbox is None:
+            letterbox = self.letterboxes[camera_id] = LetterboxBuffer(self.imgsz)
+
+        canvas, scale, pad = letterbox(image)
+        windows = []
+        height, width = image.shape[:2]
+        if settings.INFERENCE_TILING and max(height, width) > self.imgsz:
+            windows = tile_windows(height, width, self.imgsz, settings.INFERENCE_TILE_OVERLAP)
+        if not windows:
+            return canvas, (scale, pad, windows, height, width)
+        batch = [canvas]
+        batch.extend(image[y0:y1, x0:x1] for x0, y0, x1, y1 in windows)
+        return batch, (scale, pad, windows, height, width)
+
+    def _decode(self, results, layout):
+        """Map model results back onto the prepared image and merge tiles"""
+        scale, pad, windows, height, width = layout
+        all_boxes, all_conf, all_cls = [], [], []
+        for index, result in enumerate(results):
+            boxes = result.boxes.cpu().numpy()
+            xyxy = boxes.xyxy.astype(np.float32)
+            if index == 0:
+                xyxy = LetterboxBuffer.to_source(xyxy, scale, pad)
+            else:
+                x0, y0 = windows[index - 1][:2]
+                xyxy = xyxy + np.array([x0, y0, x0, y0], dtype=np.float32)
+            all_boxes.append(xyxy.reshape(-1, 4))
+            all_conf.append(boxes.conf.reshape(-1))
+            all_cls.append(boxes.cls.reshape(-1).astype(int))
+
+        xyxy = np.concatenate(all_boxes) if all_boxes else np.zeros((0, 4), dtype=np.float32)
+        confidences = np.concatenate(all_conf) if all_conf else np.zeros(0, dtype=np.float32)
+        class_ids = np.concatenate(all_cls) if all_cls else np.zeros(0, dtype=int)
+        if windows:
+            keep = nms(xyxy, confidences, class_ids, settings.INFERENCE_TILE_MERGE_THRESHOLD, metric="ios")
+            xyxy, confidences, class_ids = xyxy[keep], confidences[keep], class_ids[keep]
+
+        np.clip(xyxy[:, 0::2], 0, width, out=xyxy[:, 0::2])
+        np.clip(xyxy[:, 1::2], 0, height, out=xyxy[:, 1::2])
+        return xyxy, confidences, class_ids, results[0].names
+
     def get_latest_results(self, camera_id: str):
         """
         Get the most recent processed frame results for a camera.
+
+        Reads the reference published by the processing thread, so callers
+        never contend with it.
         
         Args:
             camera_id (str): The camera ID to get results for.
@@ -219,26 +413,29 @@ class YOLOProcessor:
         Returns:
             Optional[FrameData]: The most recent frame data with detections or None.
         """
-        if camera_id not in self.results_buffer:
-            return None
-        
-        buffer = self.results_buffer[camera_id]
-        if buffer.empty():
-            return None
-        
-        # Get the latest result (similar approach as in VideoCapture)
-        results = []
-        try:
-            while not buffer.empty():
-                results.append(buffer.get_nowait())
-        except queue.Empty:
-            pass
-        
-        # Put all but the newest result back
-        for result in results[:-1]:
-            try:
-                buffer.put(result, block=False)
-            except queue.Full:
-                pass
-        
-        return results[-1] if results else None
\ No newline at end of file
+        return self.latest_results.get(camera_id)
+
+    def wait_for_result(self, camera_id, after: int, timeout: float) -> int:
+        """Block until a result for a frame numbered above ``after`` is published; returns the newest number"""
+        return self._result_signal(camera_id).wait_for_newer(after, timeout)
+
+    def _result_signal(self, camera_id) -> FrameSignal:
+        signal = self.result_signals.get(camera_id)
+        if signal is None:
+            signal = self.result_signals.setdefault(camera_id, FrameSignal())
+        return signal
+
+    def get_result_snapshot(self, camera_id) -> Optional[ResultSnapshot]:
+        """JSON-ready detections of the camera's most recent processed frame"""
+        return self.result_snapshots.get(camera_id)
+
+    def get_processing_stats(self) -> Dict[Any, Dict[str, Any]]:
+        """Counters and stage latency histograms for every processing camera"""
+        stats = {}
+        for camera_id, counters in list(self.processing_stats.items()):
+            timings = self.stage_timings.get(camera_id)
+            stats[camera_id] = {
+                **counters,
+                "stages": timings.snapshot() if timings else {},
+            }
+        return stats
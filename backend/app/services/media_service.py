@@ -4,8 +4,9 @@ import os
 import shutil
 from pathlib import Path
 import logging
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import desc, asc, and_, or_, func, select
 
 from ..Settings import settings
 from ..core.models import Media as MediaModel
@@ -462,6 +463,173 @@ class MediaService:
 
 media_service = MediaService()
 
+
+class AsyncMediaService:
+    """Service for media database records on an AsyncSession"""
+
+    async def create_media(self, db: AsyncSession, media_data: MediaCreate) -> MediaSchema:
+        """
+        Persist a new media record for a file that already exists on disk.
+        """
+        try:
+            file_path = settings.get_absolute_path(media_data.path)
+            media_data.path = settings.get_relative_path(file_path)
+
+            if media_data.size_bytes is None and file_path.exists():
+                media_data.size_bytes = file_path.stat().st_size
+
+            db_media = MediaModel(
+                camera_id   = media_data.camera_id,
+                detection_id= media_data.detection_id,
+                media_type  = media_data.media_type.value,
+                path        = media_data.path,
+                timestamp   = media_data.timestamp,
+                duration    = media_data.duration,
+                size_bytes  = media_data.size_bytes
+            )
+            db.add(db_media)
+            await db.commit()
+            await db.refresh(db_media)
+
+            logger.info(f"Created media record {db_media.id} for camera {media_data.camera_id}")
+            return MediaSchema.model_validate(db_media)
+
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating media: {str(e)}")
+            raise MediaStorageError(f"Failed to create media: {str(e)}")
+
+    async def get_media_by_id(
+        self,
+        db: AsyncSession,
+        media_id: int,
+        include_relations: bool = False
+    ) -> MediaSchema:
+        """
+        Get media by ID
+
+        Raises:
+            MediaNotFoundError: If media not found
+        """
+        query = select(MediaModel).where(MediaModel.id == media_id)
+        if include_relations:
+            query = query.options(
+                selectinload(MediaModel.camera),
+                selectinload(MediaModel.detection)
+            )
+
+        db_media = (await db.execute(query)).scalars().first()
+        if not db_media:
+            raise MediaNotFoundError(f"Media with ID {media_id} not found")
+
+        if include_relations:
+            return MediaWithRelations.model_validate(db_media)
+        return MediaSchema.model_validate(db_media)
+
+    async def get_media_by_camera(
+        self,
+        db: AsyncSession,
+        camera_id: int,
+        media_type: Optional[MediaType] = None,
+        limit: int = 100,
+        offset: int = 0,
+        order_by: str = "timestamp",
+        order_desc: bool = True
+    ) -> List[MediaSchema]:
+        """Get media by camera ID"""
+        query = select(MediaModel).where(MediaModel.camera_id == camera_id)
+
+        if media_type:
+            query = query.where(MediaModel.media_type == media_type)
+
+        order_field = getattr(MediaModel, order_by, MediaModel.timestamp)
+        query = query.order_by(desc(order_field) if order_desc else asc(order_field))
+
+        result = await db.execute(query.offset(offset).limit(limit))
+        return [MediaSchema.model_validate(media) for media in result.scalars().all()]
+
+    async def get_media_by_detection(
+        self,
+        db: AsyncSession,
+        detection_id: int
+    ) -> List[MediaSchema]:
+        """Get media associated with a detection"""
+        result = await db.execute(
+            select(MediaModel)
+            .where(MediaModel.detection_id == detection_id)
+            .order_by(desc(MediaModel.timestamp))
+        )
+        return [MediaSchema.model_validate(media) for media in result.scalars().all()]
+
+    async def get_media_by_time_range(
+        self,
+        db: AsyncSession,
+        start_timestamp: float,
+        end_timestamp: float,
+        camera_id: Optional[int] = None,
+        media_type: Optional[MediaType] = None,
+        limit: int = 1000
+    ) -> List[MediaSchema]:
+        """Get media within a time range"""
+        query = select(MediaModel).where(
+            and_(
+                MediaModel.timestamp >= start_timestamp,
+                MediaModel.timestamp <= end_timestamp
+            )
+        )
+
+        if camera_id:
+            query = query.where(MediaModel.camera_id == camera_id)
+
+        if media_type:
+            query = query.where(MediaModel.media_type == media_type)
+
+        result = await db.execute(query.order_by(desc(MediaModel.timestamp)).limit(limit))
+        return [MediaSchema.model_validate(media) for media in result.scalars().all()]
+
+    async def get_media_stats(
+        self,
+        db: AsyncSession,
+        camera_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Get media statistics with a single grouped query
+        """
+        query = select(
+            MediaModel.media_type,
+            func.count(MediaModel.id),
+            func.coalesce(func.sum(MediaModel.size_bytes), 0)
+        ).group_by(MediaModel.media_type)
+
+        if camera_id:
+            query = query.where(MediaModel.camera_id == camera_id)
+
+        rows = {media_type: (count, size) for media_type, count, size in (await db.execute(query)).all()}
+
+        stats = {
+            "total_count": 0,
+            "by_type": {},
+            "total_size_bytes": 0,
+            "avg_size_bytes": 0
+        }
+
+        for media_type in MediaType:
+            count, total_size = rows.get(media_type.value, (0, 0))
+            stats["by_type"][media_type.value] = {
+                "count": count,
+                "total_size_bytes": total_size,
+                "avg_size_bytes": total_size / count if count > 0 else 0
+            }
+            stats["total_count"] += count
+            stats["total_size_bytes"] += total_size
+
+        if stats["total_count"] > 0:
+            stats["avg_size_bytes"] = stats["total_size_bytes"] / stats["total_count"]
+
+        return stats
+
+async_media_service = AsyncMediaService()
+
 # Custom exceptions
 class MediaNotFoundError(Exception):
     """Raised when media is not found"""
@@ -0,0 +1,252 @@
+"""
+PyAV capture backend.
+
+``PyAVStream`` demuxes and decodes through PyAV (FFmpeg's libraries, already
+a dependency through aiortc). It implements the grab()/retrieve()/read()
+part of the ``cv2.VideoCapture`` interface that the capture loop uses, and
+adds what OpenCV cannot provide:
+
+- threaded decoding (``thread_type = AUTO``, ``CAMERA_DECODE_THREADS``)
+- the stream's presentation timestamp of the current frame (``pts``)
+- the current frame as grayscale or yuv420p planes, as views into the
+  decoder's buffers when it already outputs 4:2:0, without a BGR conversion
+- the encoded packets, handed to registered sinks as they are demuxed, so
+  recording and streaming can copy them instead of re-encoding
+
+``PacketClipRecorder`` is such a sink: it muxes a camera's packets into an
+MP4 as they arrive, without touching the video.
+"""
+import logging
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import av
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PacketSink = Callable[[av.Packet], None]
+
+# Decoder output formats whose first three planes are Y, U, V at 4:2:0
+_YUV420_FORMATS = frozenset({"yuv420p", "yuvj420p"})
+# Formats whose first plane is full-resolution 8-bit luma
+_LUMA_FIRST_FORMATS = _YUV420_FORMATS | {"yuv422p", "yuvj422p", "yuv444p", "yuvj444p", "nv12", "nv21", "gray"}
+
+# Upper bound for the buffered group of pictures replayed to new sinks
+_MAX_GOP_PACKETS = 600
+
+
+def _plane_view(plane, width: int, height: int) -> np.ndarray:
+    """A (height, width) uint8 view of a frame plane, honouring its line padding"""
+    rows = np.frombuffer(plane, dtype=np.uint8).reshape(-1, plane.line_size)
+    return rows[:height, :width]
+
+
+class PyAVStream:
+    """cv2.VideoCapture stand-in backed by PyAV"""
+
+    def __init__(
+        self,
+        url: str,
+        options: Optional[Dict[str, str]] = None,
+        open_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        threads: int = 0,
+    ):
+        self._container = av.open(url, options=options or {}, timeout=(open_timeout, read_timeout))
+        if not self._container.streams.video:
+            self._container.close()
+            raise ValueError(f"No video stream in {url}")
+        self.video_stream = self._container.streams.video[0]
+        codec = self.video_stream.codec_context
+        codec.thread_type = "AUTO"  # Frame and slice threads
+        codec.thread_count = threads  # 0 lets FFmpeg pick one per core
+        self.codec_name = codec.name
+
+        self._packets = self._container.demux(self.video_stream)
+        self._decoded: Deque[av.VideoFrame] = deque()
+        self._frame: Optional[av.VideoFrame] = None
+        self.pts: Optional[float] = None
+        self.frame_index = 0
+        self._opened = True
+
+        self._sinks: List[PacketSink] = []
+        self._gop: List[av.Packet] = []
+        self._sink_lock = threading.Lock()
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def grab(self) -> bool:
+        """Demux and decode the next frame; False at the end of the stream or on errors"""
+        if not self._opened:
+            return False
+        try:
+            while not self._decoded:
+                packet = next(self._packets)
+                if packet.size:
+                    self._publish(packet)
+                try:
+                    # An empty packet at the end flushes the decoder's delayed frames
+                    self._decoded.extend(packet.decode())
+                except av.error.InvalidDataError:
+                    continue
+        except StopIteration:
+            return False
+        except (av.error.FFmpegError, OSError) as e:
+            logger.debug(f"PyAV read failed: {e}")
+            return False
+
+        self._frame = self._decoded.popleft()
+        self.frame_index += 1
+        self.pts = float(self._frame.pts * self._frame.time_base) if self._frame.pts is not None else None
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """The grabbed frame as BGR, converted only now"""
+        if self._frame is None:
+            return False, None
+        return True, self._frame.to_ndarray(format="bgr24")
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def retrieve_gray(self) -> Optional[np.ndarray]:
+        """Luma of the grabbed frame; a view into the decoder's buffer for YUV/NV/gray output"""
+        frame = self._frame
+        if frame is None:
+            return None
+        if frame.format.name not in _LUMA_FIRST_FORMATS:
+            frame = frame.reformat(format="gray")
+        return _plane_view(frame.planes[0], frame.width, frame.height)
+
+    def retrieve_yuv420p(self) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Y, U and V planes of the grabbed frame; views when the decoder outputs 4:2:0"""
+        frame = self._frame
+        if frame is None:
+            return None
+        if frame.format.name not in _YUV420_FORMATS:
+            frame = frame.reformat(format="yuv420p")
+        chroma_w, chroma_h = (frame.width + 1) // 2, (frame.height + 1) // 2
+        return (
+            _plane_view(frame.planes[0], frame.width, frame.height),
+            _plane_view(frame.planes[1], chroma_w, chroma_h),
+            _plane_view(frame.planes[2], chroma_w, chroma_h),
+        )
+
+    def add_packet_sink(self, sink: PacketSink) -> None:
+        """Receive every demuxed packet, starting with the current group of pictures"""
+        with self._sink_lock:
+            for packet in self._gop:
+                sink(packet)
+            self._sinks.append(sink)
+
+    def remove_packet_sink(self, sink: PacketSink) -> None:
+        with self._sink_lock:
+            if sink in self._sinks:
+                self._sinks.remove(sink)
+
+    def _publish(self, packet: av.Packet) -> None:
+        with self._sink_lock:
+            # Keep packets since the last keyframe so a new sink can start decodable
+            if packet.is_keyframe:
+                self._gop = [packet]
+            elif self._gop and len(self._gop) < _MAX_GOP_PACKETS:
+                self._gop.append(packet)
+            for sink in self._sinks:
+                try:
+                    sink(packet)
+                except Exception as e:
+                    logger.error(f"Packet sink failed: {e}")
+
+    def get(self, prop: int) -> float:
+        codec = self.video_stream.codec_context
+        if prop == cv2.CAP_PROP_FPS:
+            rate = self.video_stream.average_rate or self.video_stream.guessed_rate
+            return float(rate) if rate else 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(codec.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(codec.height)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.pts * 1000 if self.pts is not None else 0.0
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        # Network streams can't be rescaled at the source; the capture loop resizes
+        return False
+
+    def release(self) -> None:
+        if not self._opened:
+            return
+        self._opened = False
+        with self._sink_lock:
+            self._sinks.clear()
+            self._gop = []
+        self._container.close()
+
+
+class PacketClipRecorder:
+    """Packet sink that muxes a camera's encoded video into an MP4 as it arrives, without re-encoding"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.packet_count = 0
+        self._output = None
+        self._stream = None
+        self._source = None
+        self._base = 0
+        self._last = 0
+        self._time_base = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __call__(self, packet: av.Packet) -> None:
+        with self._lock:
+            if self._closed or packet.dts is None:
+                return
+            if self._output is None:
+                # Start on a keyframe so the clip decodes from its first packet. The
+                # output copies the codec parameters while the source stream is open
+                if not packet.is_keyframe:
+                    return
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._output = av.open(str(self.path), "w", format="mp4", options={"movflags": "+faststart"})
+                if hasattr(self._output, "add_stream_from_template"):
+                    self._stream = self._output.add_stream_from_template(packet.stream)
+                else:
+                    self._stream = self._output.add_stream(template=packet.stream)
+                self._source = packet.stream
+                self._base = packet.dts
+                self._time_base = packet.time_base
+            elif packet.stream is not self._source:
+                # A reopened stream may carry different codec parameters
+                return
+
+            # mux() rescales packets in place and the original may still be in the
+            # capture's GOP buffer or another recorder, so mux a copy
+            copy = av.Packet(packet)
+            copy.dts = packet.dts - self._base
+            copy.pts = packet.pts - self._base if packet.pts is not None else copy.dts
+            copy.time_base = self._time_base
+            copy.is_keyframe = packet.is_keyframe
+            copy.stream = self._stream
+            self._output.mux(copy)
+            self.packet_count += 1
+            self._last = max(self._last, copy.pts)
+
+    def close(self) -> Optional[Tuple[float, float]]:
+        """Finish the file; returns (start pts, duration) in seconds, or None if no keyframe arrived"""
+        with self._lock:
+            self._closed = True
+            if self._output is None:
+                return None
+            self._output.close()
+            return float(self._base * self._time_base), float(self._last * self._time_base)
@@ -0,0 +1,158 @@
+"""
+Synthetic camera sources for benchmarks and demos.
+
+A camera whose URL starts with ``synthetic://`` is read through
+``SyntheticStream`` instead of OpenCV. It implements the small part of the
+``cv2.VideoCapture`` interface that the capture loop uses and, like a live
+camera, paces read() to its own frame rate:
+
+    synthetic://?width=1280&height=720&fps=30&objects=3
+        Generated frames: a static textured background with ``objects``
+        bright boxes that walk across the scene, enter and leave, so a
+        tracker sees tracks start and end.
+
+    synthetic:///abs/path/clip.mp4?fps=25
+        A local video file looped forever (fps defaults to the file's).
+"""
+import time
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import cv2
+import numpy as np
+
+SCHEME = "synthetic://"
+
+
+def is_synthetic_url(url: str) -> bool:
+    return str(url).startswith(SCHEME)
+
+
+class SyntheticStream:
+    """cv2.VideoCapture stand-in that generates or loops frames in real time"""
+
+    def __init__(
+        self,
+        width: int = 1280,
+        height: int = 720,
+        fps: float = 30.0,
+        objects: int = 2,
+        path: Optional[str] = None,
+        realtime: bool = True,
+        seed: int = 0,
+    ):
+        self.realtime = realtime
+        self._file: Optional[cv2.VideoCapture] = None
+        self._frame: Optional[np.ndarray] = None
+        if path:
+            self._file = cv2.VideoCapture(path)
+            if not self._file.isOpened():
+                raise ValueError(f"Could not open {path}")
+            fps = fps or self._file.get(cv2.CAP_PROP_FPS) or 30.0
+            width = int(self._file.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(self._file.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        self.width, self.height, self.fps = width, height, float(fps or 30.0)
+        self.objects = objects
+        self.frame_index = 0
+        self._opened = True
+        self._next_due = time.monotonic()
+
+        rng = np.random.default_rng(seed)
+        if self._file is None:
+            # Gradient plus noise so frames compress and resize like a real scene
+            gradient = np.linspace(40, 160, width, dtype=np.float32)[None, :, None]
+            noise = rng.normal(0, 12, (height, width, 3)).astype(np.float32)
+            self._background = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+            # Per object: start offset (frames), speed (px/frame), lane, size
+            self._paths = [
+                (
+                    int(rng.integers(0, 300)),
+                    float(rng.uniform(2.0, 6.0)),
+                    int(rng.integers(height // 6, height * 5 // 6)),
+                    (int(width * 0.05), int(height * 0.25)),
+                )
+                for _ in range(objects)
+            ]
+
+    @classmethod
+    def from_url(cls, url: str, realtime: bool = True) -> "SyntheticStream":
+        parsed = urlparse(url)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        path = parsed.path if parsed.path not in ("", "/") else None
+        return cls(
+            width=int(params.get("width", 1280)),
+            height=int(params.get("height", 720)),
+            fps=float(params["fps"]) if "fps" in params else (0.0 if path else 30.0),
+            objects=int(params.get("objects", 2)),
+            path=path,
+            realtime=realtime,
+            seed=int(params.get("seed", 0)),
+        )
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def grab(self) -> bool:
+        if not self._opened:
+            return False
+        if self.realtime:
+            # Block until the next frame is due, as a live camera would
+            delay = self._next_due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._next_due = max(self._next_due + 1.0 / self.fps, time.monotonic() - 1.0 / self.fps)
+        self._frame = None
+        self.frame_index += 1
+        if self._file is not None and not self._file.grab():
+            # End of file: loop back to the start
+            self._file.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return self._file.grab()
+        return True
+
+    def retrieve(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self._opened:
+            return False, None
+        if self._frame is None:
+            self._frame = self._render()
+        return self._frame is not None, self._frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def get(self, prop: int) -> float:
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frame_index)
+        return 0.0
+
+    def set(self, prop: int, value: float) -> bool:
+        return False
+
+    def release(self) -> None:
+        self._opened = False
+        if self._file is not None:
+            self._file.release()
+
+    def _render(self) -> Optional[np.ndarray]:
+        if self._file is not None:
+            ok, frame = self._file.retrieve()
+            return frame if ok else None
+
+        frame = self._background.copy()
+        for offset, speed, lane, (box_w, box_h) in self._paths:
+            # Each object crosses the frame, then stays off-screen for a while
+            span = self.width + box_w + int(self.width * 0.5)
+            x = int(((self.frame_index + offset) * speed) % span) - box_w
+            if x + box_w <= 0 or x >= self.width:
+                continue
+            top = max(0, lane - box_h // 2)
+            cv2.rectangle(frame, (x, top), (x + box_w, top + box_h), (235, 235, 235), -1)
+        return frame
@@ -0,0 +1,296 @@
+"""
+Video Analysis Service - Runs uploaded or archived footage through the detector
+offline, as fast as decoding and batched inference allow.
+
+Each job decodes its file on a dedicated thread with FFmpeg's own frame/slice
+threading (no hardware decoder), keeps every ``stride``-th frame, and feeds
+them to the model in batches. Boxes are tracked so a person walking through
+the scene becomes one detection row, tagged with the source file, instead of
+one row per sampled frame.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import cv2
+import numpy as np
+
+from ..schema.detection import DetectionCreate
+from ..Settings import settings
+from ..utils.detection_writer import DetectionWriter
+from ..utils.inference_preprocess import LetterboxBuffer
+from ..utils.tracker import ObjectTracker
+
+if TYPE_CHECKING:
+    from .inference_engine import YOLOProcessor
+
+logger = logging.getLogger(__name__)
+
+_FINISHED = {"completed", "failed", "cancelled"}
+
+
+@dataclass
+class AnalysisJob:
+    """State and progress of one offline analysis job"""
+    id: str
+    path: Path
+    source_file: str
+    camera_id: Optional[int]
+    stride: int
+    batch_size: int
+    start_time: float
+    classes: Optional[Set[str]] = None
+    status: str = "queued"
+    error: Optional[str] = None
+    video_fps: float = 0.0
+    total_frames: int = 0
+    frames_decoded: int = 0
+    frames_analyzed: int = 0
+    detections: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = 0.0
+        if self.started_at is not None:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        decode_fps = self.frames_decoded / elapsed if elapsed > 0 else 0.0
+        return {
+            "id": self.id,
+            "source_file": self.source_file,
+            "camera_id": self.camera_id,
+            "status": self.status,
+            "error": self.error,
+            "stride": self.stride,
+            "batch_size": self.batch_size,
+            "total_frames": self.total_frames,
+            "frames_decoded": self.frames_decoded,
+            "frames_analyzed": self.frames_analyzed,
+            "detections": self.detections,
+            "progress": round(self.frames_decoded / self.total_frames, 4) if self.total_frames else None,
+            "elapsed_seconds": round(elapsed, 2),
+            "decode_fps": round(decode_fps, 1),
+            "analysis_fps": round(self.frames_analyzed / elapsed, 1) if elapsed > 0 else 0.0,
+            # How many seconds of footage are covered per second of wall time
+            "realtime_factor": round(decode_fps / self.video_fps, 2) if self.video_fps else None,
+        }
+
+
+def open_video(path: Path, decode_threads: int = settings.VIDEO_ANALYSIS_DECODE_THREADS) -> cv2.VideoCapture:
+    """Open a file with FFmpeg software decoding and the requested decoder thread count"""
+    params = [
+        cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_NONE,
+        cv2.CAP_PROP_N_THREADS, int(decode_threads),
+    ]
+    stream = cv2.VideoCapture(str(path), cv2.CAP_FFMPEG, params)
+    if not stream.isOpened():
+        raise ValueError(f"Could not open video file {path}")
+    return stream
+
+
+def iter_sampled_frames(
+    stream: cv2.VideoCapture,
+    stride: int,
+    cancel_event: Optional[threading.Event] = None,
+) -> Iterator[Tuple[int, Optional[np.ndarray]]]:
+    """Yield (frame index, frame) for every decoded frame; frame is None unless index % stride == 0.
+
+    Skipped frames are only grab()bed, which decodes them without the colour
+    conversion and copy that retrieve() would add.
+    """
+    index = 0
+    while cancel_event is None or not cancel_event.is_set():
+        if index % stride:
+            if not stream.grab():
+                return
+            yield index, None
+        else:
+            ok, frame = stream.read()
+            if not ok:
+                return
+            yield index, frame
+        index += 1
+
+
+class VideoAnalysisService:
+    """Queues and runs offline analysis jobs"""
+
+    def __init__(self, max_jobs: int = settings.VIDEO_ANALYSIS_MAX_JOBS):
+        self.jobs: Dict[str, AnalysisJob] = {}
+        self.detection_writer = DetectionWriter()
+        self._executor = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="video-analysis")
+
+    def submit(
+        self,
+        inference_engine: "YOLOProcessor",
+        path: Path,
+        source_file: Optional[str] = None,
+        camera_id: Optional[int] = None,
+        stride: int = settings.VIDEO_ANALYSIS_DEFAULT_STRIDE,
+        batch_size: int = settings.VIDEO_ANALYSIS_BATCH_SIZE,
+        start_time: Optional[float] = None,
+        classes: Optional[List[str]] = None,
+    ) -> AnalysisJob:
+        """Queue a file for analysis and return its job"""
+        job = AnalysisJob(
+            id=uuid.uuid4().hex,
+            path=Path(path),
+            source_file=source_file or Path(path).name,
+            camera_id=camera_id,
+            stride=max(1, int(stride)),
+            batch_size=max(1, int(batch_size)),
+            start_time=start_time if start_time is not None else time.time(),
+            classes={c.strip().lower() for c in classes} if classes else None,
+        )
+        self.jobs[job.id] = job
+        self._executor.submit(self._run, job, inference_engine)
+        logger.info(f"Queued video analysis job {job.id} for {job.source_file}")
+        return job
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[AnalysisJob]:
+        return list(self.jobs.values())
+
+    def cancel(self, job_id: str) -> Optional[AnalysisJob]:
+        job = self.jobs.get(job_id)
+        if job and not job.finished:
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+        return job
+
+    def shutdown(self) -> None:
+        """Cancel outstanding jobs and flush their detections"""
+        for job in list(self.jobs.values()):
+            self.cancel(job.id)
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self.detection_writer.stop()
+
+    def _run(self, job: AnalysisJob, inference_engine: "YOLOProcessor") -> None:
+        if job.cancel_event.is_set():
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            self._analyse(job, inference_engine)
+            job.status = "cancelled" if job.cancel_event.is_set() else "completed"
+        except Exception as e:
+            logger.error(f"Video analysis job {job.id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            logger.info(f"Video analysis job {job.id} {job.status}: {job.to_dict()}")
+
+    def _analyse(self, job: AnalysisJob, inference_engine: "YOLOProcessor") -> None:
+        stream = open_video(job.path)
+        job.video_fps = stream.get(cv2.CAP_PROP_FPS) or float(settings.DEFAULT_FPS)
+        job.total_frames = int(stream.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+        # Decoding runs ahead on its own thread while the model works on the previous batch
+        frames: "queue.Queue[Optional[Tuple[int, np.ndarray]]]" = queue.Queue(maxsize=job.batch_size * 2)
+        decode_error: List[BaseException] = []
+
+        def decode() -> None:
+            try:
+                for index, frame in iter_sampled_frames(stream, job.stride, job.cancel_event):
+                    job.frames_decoded = index + 1
+                    if frame is not None:
+                        frames.put((index, frame))
+            except BaseException as e:
+                decode_error.append(e)
+            finally:
+                frames.put(None)
+
+        decoder = threading.Thread(target=decode, name=f"video-decode-{job.id[:8]}", daemon=True)
+        decoder.start()
+
+        letterboxes = [LetterboxBuffer(inference_engine.imgsz) for _ in range(job.batch_size)]
+        # Sampling stretches the gap between frames, so scale the tracker's patience with it
+        tracker = ObjectTracker(max_age=settings.TRACK_MAX_AGE_SECONDS * job.stride)
+        open_events: Dict[int, Dict[str, Any]] = {}
+        futures: List[Future] = []
+        done = False
+        try:
+            while not done:
+                batch = []
+                while len(batch) < job.batch_size:
+                    item = frames.get()
+                    if item is None:
+                        done = True
+                        break
+                    batch.append(item)
+                if not batch:
+                    break
+
+                detections, names = inference_engine.detect_batch([f for _, f in batch], letterboxes)
+                for (index, _), (xyxy, confidences, class_ids) in zip(batch, detections):
+                    offset = index / job.video_fps
+                    if job.classes is not None and len(class_ids):
+                        keep = np.array([names[int(c)].lower() in job.classes for c in class_ids], dtype=bool)
+                        xyxy, confidences, class_ids = xyxy[keep], confidences[keep], class_ids[keep]
+                    track_ids, ended = tracker.update(xyxy, confidences, class_ids, offset)
+                    for i, track_id in enumerate(track_ids):
+                        if track_id is None:
+                            continue
+                        event = open_events.setdefault(track_id, {
+                            "first": offset,
+                            "name": names[int(class_ids[i])],
+                            "confidence": 0.0,
+                        })
+                        event["last"] = offset
+                        event["confidence"] = max(event["confidence"], float(confidences[i]))
+                    for track_id in ended:
+                        futures.append(self._store_event(job, track_id, open_events.pop(track_id, None)))
+                job.frames_analyzed += len(batch)
+        finally:
+            if not done:
+                # Inference failed mid-file: stop the decoder and unblock its put()
+                job.cancel_event.set()
+                while decoder.is_alive():
+                    try:
+                        frames.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+            decoder.join(timeout=5.0)
+            stream.release()
+
+        if decode_error:
+            raise decode_error[0]
+        for track_id in tracker.reset():
+            futures.append(self._store_event(job, track_id, open_events.pop(track_id, None)))
+
+        for future in futures:
+            if future is not None:
+                future.result()
+
+    def _store_event(self, job: AnalysisJob, track_id: int, event: Optional[Dict[str, Any]]) -> Optional[Future]:
+        if event is None:
+            return None
+        job.detections += 1
+        return self.detection_writer.submit_detection(DetectionCreate(
+            camera_id=job.camera_id,
+            timestamp=job.start_time + event["first"],
+            end_timestamp=job.start_time + event["last"],
+            detection_type=event["name"],
+            confidence=event["confidence"],
+            track_id=track_id,
+            source_file=job.source_file,
+        ))
+
+
+video_analysis_service = VideoAnalysisService()
@@ -4,13 +4,24 @@ os.environ["OPENCV_VIDEOIO_MSMF_ENABLE_HW_TRANSFORMS"] = "0"
 os.environ["OPENCV_VIDEOIO_MSMF_ENABLE_HW_DEVICE"] = "0"
 
 import cv2
+import logging
 import numpy as np
 import time
 import threading
 import queue
-from dataclasses import dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from typing import List, Tuple, Dict, Optional, Any, Union
 
+from ..Settings import settings
+from ..utils import metrics
+from ..utils.frame_signal import FrameSignal
+from ..utils.profiling import spans
+from .camera_health import CameraHealth, CameraState, reconnect_delay
+from .pyav_source import PacketSink, PyAVStream
+from .synthetic_source import SyntheticStream, is_synthetic_url
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class CameraConfig:
@@ -23,6 +34,111 @@ class CameraConfig:
     enabled: bool = True
     location: str = "Unknown"
     zone_id: int = 0  # Zone ID for camera grouping
+    substream_url: Optional[str] = None
+    # Capture mode and FFmpeg options, see schema.camera.StreamOptions
+    stream_options: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_camera(cls, camera) -> "CameraConfig":
+        """Build a capture config from a Camera row."""
+        return cls(
+            camera_id=camera.id,
+            url=camera.url,
+            fps_target=camera.fps_target,
+            resolution=(camera.resolution_width, camera.resolution_height),
+            enabled=camera.enabled,
+            location=camera.location,
+            substream_url=camera.substream_url,
+            stream_options=camera.stream_options or {},
+        )
+
+    @property
+    def capture_url(self) -> str:
+        """The stream analytics read: the substream when selected, else the main stream."""
+        if self.stream_options.get("use_substream") and self.substream_url:
+            return self.substream_url
+        return self.url
+
+    @property
+    def grabs_every_frame(self) -> bool:
+        """Whether to grab() every frame and decode only at fps_target."""
+        mode = self.stream_options.get("capture_mode", "auto")
+        if mode == "auto":
+            # Live sources deliver at their own pace; files would be drained as fast as they decode
+            url = self.capture_url
+            return url.isdigit() or "://" in url
+        return mode == "grab"
+
+    @property
+    def backend(self) -> str:
+        """Capture backend for this camera: "opencv" or "pyav"."""
+        url = self.capture_url
+        if url.isdigit() or is_synthetic_url(url):
+            return "opencv"
+        return self.stream_options.get("backend") or settings.CAMERA_CAPTURE_BACKEND
+
+    def ffmpeg_option_dict(self) -> Dict[str, str]:
+        """FFmpeg demuxer/decoder options for this camera; empty for FFmpeg's defaults."""
+        options = self.stream_options
+        values: Dict[str, str] = {}
+        if options.get("rtsp_transport"):
+            values["rtsp_transport"] = options["rtsp_transport"]
+        if options.get("low_latency"):
+            values.update(fflags="nobuffer", flags="low_delay")
+        if options.get("probesize"):
+            values["probesize"] = str(options["probesize"])
+        if options.get("analyzeduration_ms") is not None:
+            values["analyzeduration"] = str(options["analyzeduration_ms"] * 1000)
+        return values
+
+    def ffmpeg_options(self) -> str:
+        """OPENCV_FFMPEG_CAPTURE_OPTIONS string for this camera, or "" for OpenCV's defaults."""
+        values = self.ffmpeg_option_dict()
+        if not values:
+            return ""
+        # OpenCV only defaults to TCP when the variable is unset, so keep that default explicit
+        values = {"rtsp_transport": "tcp", **values}
+        return "|".join(f"{key};{value}" for key, value in values.items())
+
+
+class _FFmpegOptionGate:
+    """Applies per-camera FFmpeg options around cv2.VideoCapture opens.
+
+    OpenCV reads its FFmpeg options from one process-wide environment variable
+    while a capture opens, so opens with different options take turns. Opens
+    that share options (the common case) still run concurrently.
+    """
+
+    ENV = "OPENCV_FFMPEG_CAPTURE_OPTIONS"
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._current: Optional[str] = None
+        self._active = 0
+        # Options set outside the app apply to cameras without their own
+        self._default = os.environ.get(self.ENV, "")
+
+    @contextmanager
+    def applied(self, options: str):
+        options = options or self._default
+        with self._cond:
+            while self._active and options != self._current:
+                self._cond.wait()
+            if options:
+                os.environ[self.ENV] = options
+            else:
+                os.environ.pop(self.ENV, None)
+            self._current = options
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+
+_ffmpeg_options = _FFmpegOptionGate()
 
 
 class FrameData:
@@ -37,6 +153,10 @@ class FrameData:
         self.resolution = resolution
         self.detections = []
         self.processed = False
+        # Native-resolution frame, kept only when tiled inference needs it
+        self.source_frame = None
+        # Presentation timestamp (seconds) from the stream, when the backend provides it
+        self.pts = None
 
 
 class VideoCapture:
@@ -50,6 +170,8 @@ class VideoCapture:
         self.threads: Dict[Union[int, str], threading.Thread] = {}
         self.last_frame_time: Dict[Union[int, str], float] = {}
         self.frame_counts: Dict[Union[int, str], int] = {}
+        self.health: Dict[Union[int, str], CameraHealth] = {}
+        self.frame_signals: Dict[Union[int, str], FrameSignal] = {}
         
     def add_camera(self, config: CameraConfig) -> bool:
         """Add a camera to be monitored."""
@@ -61,6 +183,8 @@ class VideoCapture:
         self.stop_flags[config.camera_id] = False
         self.frame_counts[config.camera_id] = 0
         self.last_frame_time[config.camera_id] = time.time()
+        self.health[config.camera_id] = CameraHealth()
+        self.frame_signals[config.camera_id] = FrameSignal()
         return True
     
     def remove_camera(self, camera_id: str) -> bool:
@@ -77,18 +201,22 @@ class VideoCapture:
         self.last_frame_time.pop(camera_id, None)
         self.streams.pop(camera_id, None)
         self.threads.pop(camera_id, None)
+        self.health.pop(camera_id, None)
+        signal = self.frame_signals.pop(camera_id, None)
+        if signal is not None:
+            signal.interrupt()
 
         return True
     
     def update_camera(self, config: CameraConfig) -> bool:
         """Update camera configuration."""
         if config.camera_id not in self.cameras:
-            print(f"Camera {config.camera_id} doesn't exist. Use add_camera instead.")
+            logger.warning(f"Camera {config.camera_id} doesn't exist. Use add_camera instead.", extra={"camera_id": config.camera_id})
             return False
         
         # Stop existing thread if running
         if config.camera_id in self.threads and self.threads[config.camera_id].is_alive():
-            self.stop_flags[config.camera_id] = True
+            self._signal_stop(config.camera_id)
             self.threads[config.camera_id].join(timeout=3.0)
         
         # Update configuration
@@ -116,8 +244,7 @@ class VideoCapture:
     def start_all_cameras(self):
         """Start capturing from all enabled cameras."""
         for camera_id, config in self.cameras.items():
-            print(f"Starting camera {camera_id} with URL {config}")
-            print(f"Available cameras: {self.cameras.keys()}")
+            logger.info(f"Starting camera {camera_id} ({config.location})", extra={"camera_id": camera_id})
             if config.enabled and (camera_id not in self.threads or not self.threads[camera_id].is_alive()):
                 self._start_camera_thread(camera_id)
     
@@ -125,7 +252,7 @@ class VideoCapture:
         """Stop all running camera threads."""
         for camera_id, thread in list(self.threads.items()):
             if thread and thread.is_alive():
-                self.stop_flags[camera_id] = True
+                self._signal_stop(camera_id)
 
         for camera_id, thread in list(self.threads.items()):
             if thread and thread.is_alive():
@@ -144,7 +271,7 @@ class VideoCapture:
         if camera_id not in self.cameras:
             return False
 
-        self.stop_flags[camera_id] = True
+        self._signal_stop(camera_id)
 
         thread = self.threads.get(camera_id)
         if thread and thread.is_alive():
@@ -169,15 +296,19 @@ class VideoCapture:
     def start_camera(self, camera_id: str) -> bool:
         """Start capturing from a specific camera if it's enabled."""
         if camera_id not in self.cameras:
-            print(f"Camera {camera_id} not registered with video capture")
+            logger.warning(f"Camera {camera_id} not registered with video capture", extra={"camera_id": camera_id})
             return False
 
         config = self.cameras[camera_id]
         if not config.enabled:
-            print(f"Camera {camera_id} is disabled; cannot start capture")
+            logger.warning(f"Camera {camera_id} is disabled; cannot start capture", extra={"camera_id": camera_id})
             return False
 
         if camera_id in self.threads and self.threads[camera_id] and self.threads[camera_id].is_alive():
+            # Already supervised; skip any remaining backoff and probe now
+            health = self.health[camera_id]
+            if health.state in (CameraState.CONNECTING, CameraState.OFFLINE):
+                health.wake.set()
             return True
 
         self._start_camera_thread(camera_id)
@@ -188,19 +319,76 @@ class VideoCapture:
         thread = self.threads.get(camera_id)
         return bool(thread and thread.is_alive())
 
+    def get_camera_health(self, camera_id: str) -> Optional[Dict[str, Any]]:
+        """Connection state, reconnect count and last error for a camera."""
+        health = self.health.get(camera_id)
+        return health.as_dict() if health is not None else None
+
+    def wait_for_frame(self, camera_id: str, after: int, timeout: float) -> int:
+        """Block until the camera captures a frame numbered above ``after``.
+
+        Returns the newest frame number, which equals ``after`` on timeout or
+        ``interrupt_frame_waiters``. Unknown cameras just wait out the timeout.
+        """
+        signal = self.frame_signals.get(camera_id)
+        if signal is None:
+            time.sleep(timeout)
+            return after
+        return signal.wait_for_newer(after, timeout)
+
+    def interrupt_frame_waiters(self, camera_id: str):
+        """Wake threads blocked in wait_for_frame, e.g. so they see a stop flag."""
+        signal = self.frame_signals.get(camera_id)
+        if signal is not None:
+            signal.interrupt()
+
+    def add_packet_sink(self, camera_id: str, sink: PacketSink) -> bool:
+        """Receive a camera's encoded packets, starting at the current keyframe.
+
+        Only cameras on the PyAV backend expose packets; the sink is detached
+        when the stream is reopened.
+        """
+        stream = self.streams.get(camera_id)
+        if not isinstance(stream, PyAVStream):
+            return False
+        stream.add_packet_sink(sink)
+        return True
+
+    def remove_packet_sink(self, camera_id: str, sink: PacketSink):
+        stream = self.streams.get(camera_id)
+        if isinstance(stream, PyAVStream):
+            stream.remove_packet_sink(sink)
+
+    def get_packet_codec(self, camera_id: str) -> Optional[str]:
+        """Codec of the camera's encoded packets, or None without packet access."""
+        stream = self.streams.get(camera_id)
+        return stream.codec_name if isinstance(stream, PyAVStream) else None
+
+    def _signal_stop(self, camera_id: str):
+        """Ask a capture thread to exit, waking it from any backoff wait."""
+        self.stop_flags[camera_id] = True
+        health = self.health.get(camera_id)
+        if health is not None:
+            health.stopped.set()
+            health.wake.set()
+
     def _start_camera_thread(self, camera_id: str):
         """Start a thread for capturing from a specific camera."""
         if camera_id not in self.cameras:
-            print(f"Camera {camera_id} not found.")
+            logger.warning(f"Camera {camera_id} not found.", extra={"camera_id": camera_id})
             return
         
         config = self.cameras[camera_id]
         if not config.enabled:
-            print(f"Camera {camera_id} is disabled.")
+            logger.warning(f"Camera {camera_id} is disabled.", extra={"camera_id": camera_id})
             return
         
-        # Reset stop flag
+        # Reset stop flag and connection health
         self.stop_flags[camera_id] = False
+        health = self.health.setdefault(camera_id, CameraHealth())
+        health.wake.clear()
+        health.stopped.clear()
+        health.open_attempts = 0
         
         # Create and start thread
         thread = threading.Thread(
@@ -211,84 +399,194 @@ class VideoCapture:
         self.threads[camera_id] = thread
         thread.start()
     
+    def _open_stream(self, config: CameraConfig):
+        """Open a camera source with timeouts, FFmpeg options, buffer size and resolution applied."""
+        url = config.capture_url
+        if is_synthetic_url(url):
+            # Generated or looped frames for benchmarks and demos
+            return SyntheticStream.from_url(url)
+
+        if config.backend == "pyav":
+            # Threaded decode, stream PTS and encoded packets; options go to FFmpeg directly
+            options = {"rtsp_transport": "tcp", **config.ffmpeg_option_dict()}
+            return PyAVStream(
+                url,
+                options=options,
+                open_timeout=settings.CAMERA_OPEN_TIMEOUT_MS / 1000,
+                read_timeout=settings.CAMERA_READ_TIMEOUT_MS / 1000,
+                threads=settings.CAMERA_DECODE_THREADS,
+            )
+
+        if url.isdigit():
+            # Local webcam
+            stream = cv2.VideoCapture(int(url), cv2.CAP_DSHOW)
+        else:
+            # IP camera, RTSP stream, or video file; bound FFmpeg's blocking calls
+            with _ffmpeg_options.applied(config.ffmpeg_options()):
+                stream = cv2.VideoCapture(url, cv2.CAP_FFMPEG, [
+                    cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, settings.CAMERA_OPEN_TIMEOUT_MS,
+                    cv2.CAP_PROP_READ_TIMEOUT_MSEC, settings.CAMERA_READ_TIMEOUT_MS,
+                ])
+            stream.set(cv2.CAP_PROP_BUFFERSIZE, 3)
+
+        if stream.isOpened():
+            stream.set(cv2.CAP_PROP_FRAME_WIDTH, config.resolution[0])
+            stream.set(cv2.CAP_PROP_FRAME_HEIGHT, config.resolution[1])
+        return stream
+
+    def _connect(self, camera_id: str, config: CameraConfig, health: CameraHealth):
+        """Open the stream, backing off between failed attempts. Returns None once stopped."""
+        while not self.stop_flags[camera_id]:
+            if health.state != CameraState.OFFLINE:
+                health.set_state(CameraState.CONNECTING)
+
+            stream, error = None, None
+            try:
+                stream = self._open_stream(config)
+                if not stream.isOpened():
+                    error = "could not open stream"
+            except Exception as e:
+                error = str(e)
+
+            if error is None:
+                health.open_attempts = 0
+                health.next_attempt_at = None
+                return stream
+
+            if stream is not None:
+                stream.release()
+            health.open_attempts += 1
+            if health.open_attempts >= settings.CAMERA_OFFLINE_AFTER_ATTEMPTS:
+                delay = settings.CAMERA_OFFLINE_RETRY_SECONDS
+                if health.set_state(CameraState.OFFLINE, error):
+                    logger.error(
+                        f"Camera {camera_id} is offline after {health.open_attempts} failed opens ({error}); "
+                        f"probing every {delay:.0f}s",
+                        extra={"camera_id": camera_id},
+                    )
+            else:
+                delay = reconnect_delay(health.open_attempts)
+                health.set_state(CameraState.CONNECTING, error)
+                logger.warning(
+                    f"Failed to open camera {camera_id} ({error}); retrying in {delay:.1f}s",
+                    extra={"camera_id": camera_id},
+                )
+
+            # Blocks without polling; stop_camera/start_camera set the event to cut the wait short
+            health.next_attempt_at = time.time() + delay
+            health.wake.wait(delay)
+            health.wake.clear()
+        return None
+
     def _capture_frames(self, camera_id: str):
-        """Thread function to capture frames from a camera."""
+        """Thread function: keep a camera connected and capture frames until stopped."""
         config = self.cameras[camera_id]
+        health = self.health[camera_id]
+
+        while not self.stop_flags[camera_id]:
+            stream = self._connect(camera_id, config, health)
+            if stream is None:
+                break
+
+            self.streams[camera_id] = stream
+            self._read_frames(camera_id, config, stream, health)
+            stream.release()
+            self.streams[camera_id] = None
+
+            if not self.stop_flags[camera_id]:
+                health.reconnects += 1
+                metrics.capture_reconnects.labels(camera=str(camera_id)).inc()
+
+        health.set_state(CameraState.STOPPED)
+        health.next_attempt_at = None
+        logger.info(f"Stopped capturing from camera {camera_id}", extra={"camera_id": camera_id})
+
+    def _read_frames(self, camera_id: str, config: CameraConfig, stream, health: CameraHealth):
+        """Read frames into the camera's buffer until stopped or the stream keeps failing."""
         buffer = self.frame_buffers[camera_id]
-        
-        # Parse the URL (could be a number for webcam)
-        try:
-            if config.url.isdigit():
-                # Local webcam
-                for _ in range(3):  # Retry up to 3 times
-                    stream = cv2.VideoCapture(int(config.url), cv2.CAP_DSHOW)
-                    if stream.isOpened():
-                        break
-                    time.sleep(0.5)
-            else:
-                # IP camera, RTSP stream, or video file
-                stream = cv2.VideoCapture(config.url)
-                stream.set(cv2.CAP_PROP_BUFFERSIZE, 3)
-                
-            
-            if not stream.isOpened():
-                print(f"Failed to open {config.camera_id} after retries")
-                return
-        
-            time.sleep(1.0)
-                
-        except Exception as e:
-            print(f"Error opening video stream for camera {camera_id}: {str(e)}")
-            return
-        
-        # Store the stream
-        self.streams[camera_id] = stream
-        
-        # Check if stream opened successfully
-        if not stream.isOpened():
-            print(f"Could not open stream for camera {camera_id}")
-            return
-        
-        # Set resolution
-        stream.set(cv2.CAP_PROP_FRAME_WIDTH, config.resolution[0])
-        stream.set(cv2.CAP_PROP_FRAME_HEIGHT, config.resolution[1])
-        
+        signal = self.frame_signals[camera_id]
         frame_interval = 1.0 / config.fps_target
         self.last_frame_time[camera_id] = time.time()
-        
-        print(f"Started capturing from camera {camera_id}")
+        health.read_failures = 0
+        # A probe request made while connecting must not cut the next backoff short
+        health.wake.clear()
+
+        # Bound once so each frame only pays for the increment
+        frames_metric = metrics.capture_frames.labels(camera=str(camera_id))
+        failures_metric = metrics.capture_decode_failures.labels(camera=str(camera_id))
+        drops_metric = metrics.capture_buffer_drops.labels(camera=str(camera_id))
+
+        grab_every_frame = config.grabs_every_frame
+        # Grab mode keeps a schedule rather than comparing against the last frame,
+        # so a grab landing a hair early doesn't halve the rate of a 2x source
+        next_due = time.time()
+        slack = frame_interval * 0.1
+        logger.info(
+            f"Started capturing from camera {camera_id} ({'grab' if grab_every_frame else 'read'} mode)",
+            extra={"camera_id": camera_id},
+        )
         
         while not self.stop_flags[camera_id]:
-            # Control frame rate
-            current_time = time.time()
-            elapsed = current_time - self.last_frame_time[camera_id]
-            
-            if elapsed < frame_interval:
-                time.sleep(0.001)
-                continue
-            
-            # Capture frame
-            ret, frame = stream.read()
+            if grab_every_frame:
+                # Pull every packet so the decoder and socket buffers never back up,
+                # but only convert the frames we keep; grab() blocks at the stream's pace
+                with spans.span("capture.grab"):
+                    ret = stream.grab()
+                current_time = time.time()
+                frame = None
+                if ret:
+                    if current_time < next_due - slack:
+                        continue
+                    next_due = max(next_due + frame_interval, current_time)
+                    with spans.span("capture.retrieve"):
+                        ret, frame = stream.retrieve()
+            else:
+                # Control frame rate
+                current_time = time.time()
+                elapsed = current_time - self.last_frame_time[camera_id]
+
+                if elapsed < frame_interval:
+                    # Sleep until the frame is due instead of spinning on short sleeps
+                    # Waits on the stop event: start_camera sets wake at any time
+                    health.stopped.wait(frame_interval - elapsed)
+                    continue
+
+                # Capture frame
+                with spans.span("capture.read"):
+                    ret, frame = stream.read()
             if not ret:
-                print(f"Failed to capture frame from camera {camera_id}")
-                # Attempt to reconnect for IP cameras
-                time.sleep(1.0)
-                stream.release()
-                try:
-                    stream = cv2.VideoCapture(config.url)
-                    self.streams[camera_id] = stream
-                except Exception as e:
-                    print(f"Error reconnecting to camera {camera_id}: {str(e)}")
+                failures_metric.inc()
+                health.read_failures += 1
+                if health.set_state(CameraState.DEGRADED, "frame read failed"):
+                    logger.warning(f"Failed to capture frame from camera {camera_id}", extra={"camera_id": camera_id})
+                if health.read_failures >= settings.CAMERA_MAX_READ_FAILURES:
+                    logger.warning(
+                        f"Camera {camera_id} failed {health.read_failures} reads in a row; reconnecting",
+                        extra={"camera_id": camera_id},
+                    )
+                    return
+                # Reads that fail instantly (no timeout) would otherwise spin
+                health.stopped.wait(min(1.0, 0.1 * health.read_failures))
                 continue
+
+            if health.state != CameraState.STREAMING:
+                health.read_failures = 0
+                health.set_state(CameraState.STREAMING)
+            health.last_frame_at = current_time
             
             # Update timing and counts
             self.last_frame_time[camera_id] = current_time
             self.frame_counts[camera_id] += 1
-            
+            frames_metric.inc()
+
             # Resize if necessary
+            source_frame = None
             actual_height, actual_width = frame.shape[:2]
             if (actual_width, actual_height) != config.resolution:
-                frame = cv2.resize(frame, config.resolution)
+                if settings.INFERENCE_TILING:
+                    source_frame = frame
+                with spans.span("capture.resize"):
+                    frame = cv2.resize(frame, config.resolution)
                 
             # Create frame data object
             frame_data = FrameData(
@@ -298,23 +596,23 @@ class VideoCapture:
                 frame_number=self.frame_counts[camera_id],
                 resolution=config.resolution
             )
+            frame_data.source_frame = source_frame
+            frame_data.pts = getattr(stream, "pts", None)
             
             # Add to buffer, dropping oldest frame if full
             if buffer.full():
                 try:
                     buffer.get_nowait()  # Remove oldest frame
+                    drops_metric.inc()
                 except queue.Empty:
                     pass  # Buffer was emptied by another thread
-            
+
             try:
                 buffer.put(frame_data, block=False)
             except queue.Full:
-                print(f"Warning: Frame buffer for camera {camera_id} is full")
-        
-        # Clean up
-        stream.release()
-        self.streams[camera_id] = None
-        print(f"Stopped capturing from camera {camera_id}")
+                drops_metric.inc()
+                logger.warning(f"Warning: Frame buffer for camera {camera_id} is full", extra={"camera_id": camera_id})
+            signal.publish(frame_data.frame_number)
     
     def get_latest_frame(self, camera_id: str) -> Optional[FrameData]:
         if camera_id not in self.frame_buffers:
@@ -387,7 +685,8 @@ class VideoCapture:
                 "fps": round(fps, 2),
                 "resolution": config.resolution,
                 "buffer_usage": round(buffer_usage * 100, 1),  # as percentage
-                "frame_count": self.frame_counts.get(camera_id, 0)
+                "frame_count": self.frame_counts.get(camera_id, 0),
+                "health": self.get_camera_health(camera_id),
             }
         
         return status
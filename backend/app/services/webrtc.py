@@ -1,6 +1,6 @@
 import asyncio
 import fractions
-import queue
+import logging
 from aiortc import RTCPeerConnection, RTCSessionDescription, VideoStreamTrack, RTCIceCandidate, RTCConfiguration, RTCIceServer
 from av import VideoFrame
 import cv2
@@ -10,6 +10,9 @@ from typing import Dict, Optional
 import time
 
 from ..schema.FrameData import FrameData
+from ..utils.profiling import spans
+
+logger = logging.getLogger(__name__)
 
 class CameraStreamTrack(VideoStreamTrack):
     """A video stream track that captures frames from the inference engine"""
@@ -36,38 +39,12 @@ class CameraStreamTrack(VideoStreamTrack):
         if frame_data and frame_data.frame is not None:
             frame = frame_data.frame.copy()
             
-            # Check for recent detections from inference engine
+            # Latest processed frame published by the inference engine
             detection_data = None
-            if (self.camera_id in self.inference_engine.results_buffer and 
-                not self.inference_engine.results_buffer[self.camera_id].empty()):
-                try:
-                    buffer = self.inference_engine.results_buffer[self.camera_id]
-                    
-                    # Get the latest detection data
-                    latest_detection = None
-                    temp_items = []
-                    
-                    # Drain buffer to get latest detection
-                    for _ in range(min(buffer.qsize(), 10)):
-                        try:
-                            detection_item = buffer.get_nowait()
-                            temp_items.append(detection_item)
-                            latest_detection = detection_item
-                        except queue.Empty:
-                            break
-                    
-                    # Put items back
-                    for item in temp_items:
-                        try:
-                            buffer.put(item, block=False)
-                        except queue.Full:
-                            pass
-                    
-                    if latest_detection and hasattr(latest_detection, 'detections'):
-                        detection_data = latest_detection
-                        
-                except Exception as e:
-                    print(f"Error getting detection data for camera {self.camera_id}: {e}")
+            try:
+                detection_data = self.inference_engine.get_latest_results(self.camera_id)
+            except Exception as e:
+                logger.warning(f"Error getting detection data for camera {self.camera_id}: {e}", extra={"camera_id": self.camera_id})
             
             # Add detection overlays if available
             if detection_data and detection_data.detections:
@@ -122,11 +99,13 @@ class CameraStreamTrack(VideoStreamTrack):
             self._cached_frame = frame.copy()
             self._last_frame_time = current_time
             
-            # Convert BGR (OpenCV format) to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
-            # Create video frame
-            video_frame = VideoFrame.from_ndarray(frame_rgb, format="rgb24")
+            # Colour conversion and packing for the encoder; the codec itself runs in aiortc's sender
+            with spans.span("webrtc.encode"):
+                # Convert BGR (OpenCV format) to RGB
+                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+                # Create video frame
+                video_frame = VideoFrame.from_ndarray(frame_rgb, format="rgb24")
             video_frame.pts = self._frame_count
             video_frame.time_base = fractions.Fraction(1, 30)
             
@@ -219,7 +198,7 @@ class RTCSessionManager:
             await pc.setLocalDescription(answer)
             return pc.localDescription.sdp
         except Exception as e:
-            print(f"Error creating answer: {e}")
+            logger.error(f"Error creating answer: {e}", extra={"camera_id": camera_id})
             raise
     
     async def add_ice_candidate(self, camera_id: str, peer_id: str, candidate: RTCIceCandidate):
@@ -230,7 +209,7 @@ class RTCSessionManager:
                 pc = self.peer_connections[camera_id][peer_id]
                 await pc.addIceCandidate(candidate)
         except Exception as e:
-            print(f"Error adding ICE candidate: {e}")
+            logger.error(f"Error adding ICE candidate: {e}", extra={"camera_id": camera_id})
     
     async def close_peer_connection(self, camera_id: str, peer_id: str):
         """Close a peer connection and clean up resources"""
@@ -252,7 +231,7 @@ class RTCSessionManager:
                     del self.tracks[camera_id]
                     
         except Exception as e:
-            print(f"Error closing peer connection: {e}")
+            logger.error(f"Error closing peer connection: {e}", extra={"camera_id": camera_id})
     
     def get_active_connections_count(self) -> dict:
         """Get count of active peer connections"""
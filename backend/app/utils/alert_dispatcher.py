@@ -0,0 +1,157 @@
+"""
+Background dispatcher for detection alerts.
+
+Inference threads hand alerts over with submit() and return immediately. A
+dedicated thread runs its own asyncio loop that coalesces bursts per topic
+into one send, enforces a minimum interval between sends to the same topic,
+and retries failed sends with exponential backoff.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+from ..schema.detection import Detection
+from ..Settings import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AlertEvent:
+    detection: Detection
+    topic: str
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class AlertDispatcher:
+    """Queues alerts and delivers them in coalesced, rate-limited batches"""
+
+    def __init__(
+        self,
+        send_batch: Callable[[str, List[AlertEvent]], None],
+        coalesce_window: float = settings.ALERT_COALESCE_WINDOW_SECONDS,
+        topic_min_interval: float = settings.ALERT_TOPIC_MIN_INTERVAL_SECONDS,
+        max_retries: int = settings.ALERT_MAX_RETRIES,
+        retry_backoff: float = settings.ALERT_RETRY_BACKOFF_SECONDS,
+    ):
+        self._send_batch = send_batch
+        self.coalesce_window = coalesce_window
+        self.topic_min_interval = topic_min_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._pending: Dict[str, List[AlertEvent]] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._in_flight: Set[asyncio.Task] = set()
+        self._stopping = False
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the dispatcher thread and its event loop if not already running"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            ready = threading.Event()
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(ready,), name="alert-dispatcher", daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Send whatever is still pending, ignoring rate limits, then stop"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self._loop.call_soon_threadsafe(self._begin_stop)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def submit(self, detection: Detection, topic: str) -> None:
+        """Queue an alert; never blocks the caller on delivery"""
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        event = AlertEvent(detection=detection, topic=topic)
+        self._loop.call_soon_threadsafe(self._enqueue, event)
+
+    @property
+    def pending_count(self) -> int:
+        return sum(len(events) for events in self._pending.values())
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        ready.set()
+        try:
+            loop.run_until_complete(self._dispatch())
+        finally:
+            loop.close()
+
+    def _enqueue(self, event: AlertEvent) -> None:
+        self._pending.setdefault(event.topic, []).append(event)
+        self._wakeup.set()
+
+    def _begin_stop(self) -> None:
+        self._stopping = True
+        self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        while True:
+            now = time.monotonic()
+            next_due: Optional[float] = None
+
+            for topic in list(self._pending):
+                events = self._pending[topic]
+                ready_at = max(
+                    events[0].queued_at + self.coalesce_window,
+                    self._last_sent.get(topic, float("-inf")) + self.topic_min_interval,
+                )
+                if self._stopping or ready_at <= now:
+                    del self._pending[topic]
+                    self._last_sent[topic] = now
+                    task = asyncio.create_task(self._send_with_retry(topic, events))
+                    self._in_flight.add(task)
+                    task.add_done_callback(self._in_flight.discard)
+                elif next_due is None or ready_at < next_due:
+                    next_due = ready_at
+
+            if self._stopping:
+                break
+
+            # Sleep until the next topic is due or a new alert arrives
+            self._wakeup.clear()
+            timeout = None if next_due is None else max(0.0, next_due - now)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def _send_with_retry(self, topic: str, events: List[AlertEvent]) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._send_batch, topic, events)
+                metrics.alerts_sent.labels(topic=topic).inc(len(events))
+                if len(events) > 1:
+                    logger.info(f"Coalesced {len(events)} alerts into one send to {topic}")
+                return
+            except Exception as e:
+                if attempt == self.max_retries or self._stopping:
+                    metrics.alerts_dropped.labels(topic=topic).inc(len(events))
+                    logger.error(f"Dropping {len(events)} alerts for {topic} after {attempt + 1} attempts: {e}")
+                    return
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"Alert send to {topic} failed ({e}); retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
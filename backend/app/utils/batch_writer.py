@@ -0,0 +1,94 @@
+"""
+Base class for the buffered database writers.
+
+Producers enqueue items and return immediately; one background thread waits
+for the first item, lets the rest of the flush window accumulate, and hands
+everything queued to ``_write_batch`` so it can be written in one
+transaction. Subclasses only implement ``_write_batch``.
+"""
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Generic, List, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..core.database.connection import SessionLocal
+
+T = TypeVar("T")
+
+
+class BatchWriter(ABC, Generic[T]):
+    """Queue plus writer thread that flushes items in batches"""
+
+    thread_name = "batch-writer"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval_ms: int = 200,
+        max_batch_size: int = 256,
+    ):
+        self._session_factory = session_factory
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queue: "queue.Queue[T]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the writer thread if it is not already running"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread after flushing anything still queued"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+        self.flush()
+
+    @property
+    def pending_count(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self) -> None:
+        """Synchronously write everything currently queued"""
+        batch = self._drain()
+        while batch:
+            self._write_batch(batch)
+            batch = self._drain()
+
+    def _enqueue(self, item: T) -> None:
+        if not self._thread or not self._thread.is_alive():
+            self.start()
+        self._queue.put(item)
+
+    def _drain(self, first: Optional[T] = None) -> List[T]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Let the rest of the window accumulate before writing
+            self._stop_event.wait(self.flush_interval)
+            self._write_batch(self._drain(first))
+
+    @abstractmethod
+    def _write_batch(self, batch: List[T]) -> None:
+        """Persist one batch; must not raise, or the writer thread dies"""
@@ -1,4 +1,6 @@
 from typing import TypeVar, Generic, Type, Optional, List
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel
@@ -75,6 +77,71 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).count()
 
 
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """Base CRUD operations for database models on an AsyncSession"""
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: int) -> Optional[ModelType]:
+        """Get a single record by ID"""
+        return await db.get(self.model, id)
+
+    async def get_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[ModelType]:
+        """Get multiple records with pagination"""
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """Create a new record"""
+        db_obj = self.model(**obj_in.model_dump())
+        db.add(db_obj)
+        try:
+            await db.commit()
+            await db.refresh(db_obj)
+            return db_obj
+        except IntegrityError as e:
+            await db.rollback()
+            raise ValueError(f"Database integrity error: {str(e)}")
+
+    async def update(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: UpdateSchemaType
+    ) -> ModelType:
+        """Update an existing record"""
+        obj_data = obj_in.model_dump(exclude_unset=True)
+        for field, value in obj_data.items():
+            setattr(db_obj, field, value)
+
+        try:
+            await db.commit()
+            await db.refresh(db_obj)
+            return db_obj
+        except IntegrityError as e:
+            await db.rollback()
+            raise ValueError(f"Database integrity error: {str(e)}")
+
+    async def delete(self, db: AsyncSession, obj: ModelType) -> Optional[ModelType]:
+        """Delete a record by ORM object"""
+        await db.delete(obj)
+        await db.commit()
+        return obj
+
+    async def count(self, db: AsyncSession) -> int:
+        """Count total records"""
+        result = await db.execute(select(func.count()).select_from(self.model))
+        return result.scalar_one()
+
+
 class DatabaseManager:
     """Database manager for common operations"""
     
@@ -108,4 +175,12 @@ class DatabaseManager:
                 instance = db.query(model).filter_by(**kwargs).first()
                 if instance:
                     return instance, False
-                raise
\ No newline at end of file
+                raise
+
+    @staticmethod
+    async def validate_foreign_key_async(db: AsyncSession, model: Type[ModelType], key_id: int) -> bool:
+        """Validate that a foreign key exists using an AsyncSession"""
+        if key_id is None:
+            return True
+        result = await db.execute(select(model.id).where(model.id == key_id))
+        return result.first() is not None
@@ -1,5 +1,8 @@
 import asyncio
+from concurrent.futures import Future
+from dataclasses import dataclass
 import ffmpeg
+import logging
 import subprocess
 import tempfile
 from datetime import datetime
@@ -14,16 +17,39 @@ import numpy as np
 
 from ..core.database.connection import SessionLocal
 
-from ..services.camera_service import camera_service
-from ..services.media_service import media_service
-
-from ..services.detection_service import detection_service
+from .alert_dispatcher import AlertDispatcher, AlertEvent
+from .detection_rules import detection_rules
+from .detection_writer import DetectionWriter
+from .metadata_cache import camera_cache
+from . import metrics
+from .profiling import spans
 
 from ..schema.FrameData import FrameData
 from ..schema.detection import Detection, DetectionCreate
 from ..schema.media import MediaCreate, MediaType
+from ..services.alert_service import Topics
+from ..services.pyav_source import PacketClipRecorder
 from ..Settings import settings
 
+logger = logging.getLogger(__name__)
+
+# Seconds between frames sampled into a frame-based detection clip
+CLIP_SAMPLE_INTERVAL = 0.1
+
+
+@dataclass
+class TrackEvent:
+    """Open detection event for one tracked object"""
+    camera_id: int
+    track_id: int
+    future: "Future[Detection]"
+    image_path: Path
+    end_time: float
+    best_confidence: float
+    last_flush: float
+    image_size: Optional[int] = None
+
+
 class DetectionEventManager:
     """Manages detection events"""
     def __init__(self, alert_service):
@@ -31,158 +57,192 @@ class DetectionEventManager:
         self.events = []
         self.alert_service = alert_service
         self._session_factory = SessionLocal
+        self.detection_writer = DetectionWriter()
+        self.alert_dispatcher = AlertDispatcher(self._send_alert_batch)
         self.active_recordings: Dict[str, Dict] = {}
         self.recording_lock = threading.Lock()
         self.video_duration = 30
-        self.min_confidence = settings.MIN_CONFIDENCE if hasattr(settings, 'MIN_CONFIDENCE') else 0.5
-        
-        self.detection_cooldown = settings.DETECTION_COOLDOWN if hasattr(settings, 'DETECTION_COOLDOWN') else 30
         self.enable_alerts = settings.ENABLE_ALERT_NOTIFICATIONS if hasattr(settings, 'ENABLE_ALERT_NOTIFICATIONS') else True
-        self.last_detection_time: Dict[str, float] = {}
-        self.detection_cache_lock = threading.Lock()
+        self.rules = detection_rules
+        self.track_events: Dict[Tuple[int, int], TrackEvent] = {}
+        self.track_lock = threading.Lock()
         
         self.video_capture = None
         self.inference_engine = None
 
-    def should_record_detection(self, detection: Dict[str, Any]) -> bool:
-        """Check if detection meets criteria for recording"""
-        detection_type = detection.get('name', '').lower()
-        confidence = detection.get('conf', 0.0)
-        
-        if confidence < self.min_confidence:
-            return False
-        
-        if detection_type == 'person':
-            return True
-        
-        return False  # Add explicit return for other types
-    
-    def is_in_cooldown(self, camera_id: str, detection: Dict[str, Any]) -> bool:
-        """Check if detection is in cooldown period"""
-        current_time = time.time()
-        detection_type = detection.get('name', '').lower()
-        
-        with self.detection_cache_lock:
-            cooldown_key = f"{camera_id}_{detection_type}"
-            if cooldown_key in self.last_detection_time:
-                time_since_last = current_time - self.last_detection_time[cooldown_key]
-                if time_since_last < self.detection_cooldown:
-                    return True
-                
-            self.last_detection_time[cooldown_key] = current_time
-            return False
-
     #TODO: Find a type safe way to handle inject InferenceEngine into this class that avoid circular dependency
     def record_detection(
     self,
     camera_id: str,
     frame_data: FrameData,
     detection: Dict[str, Any],
-    inference_service: Any) -> Optional[Detection]:
-        """Record a detection event"""
+    inference_service: Any) -> Optional["Future[Detection]"]:
+        """Queue a detection event for persistence.
+
+        Returns a future that resolves to the stored Detection once the batch
+        writer has flushed it, or None if the detection was filtered out.
+        Boxes carrying a ``track_id`` extend the open event of their track
+        instead of creating a new one.
+        """
         if inference_service:
             self.inference_engine = inference_service
-        if not self.should_record_detection(detection):
-            return None
-        if self.is_in_cooldown(camera_id, detection):
+        track_id = detection.get('track_id')
+        if track_id is not None:
+            event = self.track_events.get((int(camera_id), track_id))
+            if event is not None:
+                self._extend_track_event(event, frame_data, detection)
+                return event.future
+
+        # Class, confidence, zone, schedule and cooldown in one table lookup
+        if not self.rules.allow(int(camera_id), detection.get('cls', -1), detection.get('conf', 0.0), frame_data.timestamp):
             return None
 
-        detection_record: Optional[Detection] = None
-        camera_display_name: Optional[str] = None
+        camera = camera_cache.get(int(camera_id))
+        if camera is None:
+            logger.warning(f"Camera {camera_id} does not exist, skipping detection", extra={"camera_id": camera_id})
+            return None
+        camera_display_name = camera.display_name
+        camera_storage_name = camera_display_name
 
         try:
-            with self._session_factory() as db:
-                # --- Create detection record ---
-                detection_event = DetectionCreate(
-                    camera_id=int(camera_id),
-                    timestamp=frame_data.timestamp,
-                    detection_type=detection.get("name", ""),
-                    confidence=detection.get("conf", 0.0),
-                )
-
-                db_detection = detection_service.create_detection(db, detection_event)
-                if not db_detection:
-                    print("Detection creation returned None")
-                    return None
+            detection_event = DetectionCreate(
+                camera_id=int(camera_id),
+                timestamp=frame_data.timestamp,
+                detection_type=detection.get("name", ""),
+                confidence=detection.get("conf", 0.0),
+                end_timestamp=frame_data.timestamp,
+                track_id=track_id,
+            )
 
-                detection_record = Detection.model_validate(db_detection)
+            # --- Media Processing (Image) ---
+            date_parts = datetime.fromtimestamp(
+                detection_event.timestamp
+            ).strftime("%Y/%m/%d").split("/")
 
-                camera_obj = camera_service.get_by_camera_id(db, int(camera_id))
-                camera_display_name = (
-                    camera_obj.name if camera_obj and camera_obj.name else f"Camera {camera_id}"
-                )
-                camera_storage_name = camera_display_name or f"camera_{camera_id}"
+            abs_img_dir = settings.STORAGE_IMG_DIR / camera_storage_name / Path(*date_parts)
+            rel_img_dir = settings.STORAGE_IMG_DIR / camera_storage_name / Path(*date_parts)
+            abs_img_dir.mkdir(parents=True, exist_ok=True)
 
-                # Start video capture thread
-                self._start_video_recording(
-                    camera_id,
-                    camera_storage_name,
-                    detection_event.timestamp,
-                    detection_record.id,
-                )
+            base_filename = (
+                f"{camera_id}_{int(detection_event.timestamp)}_{detection_event.detection_type}.jpg"
+                if track_id is None else
+                f"{camera_id}_{int(detection_event.timestamp)}_{detection_event.detection_type}_{track_id}.jpg"
+            )
+            abs_image_path = abs_img_dir / base_filename
+            rel_img_path = rel_img_dir / base_filename
 
-                # --- Media Processing (Image) ---
-                try:
-                    date_parts = datetime.fromtimestamp(
-                        detection_event.timestamp
-                    ).strftime("%Y/%m/%d").split("/")
+            annotated_frame = self._annotate_frame(
+                frame_data.frame, detection, detection_event.timestamp
+            )
+            with spans.span("detection.imwrite"):
+                cv2.imwrite(str(abs_image_path), annotated_frame)
 
-                    abs_img_dir = settings.STORAGE_IMG_DIR / camera_storage_name / Path(*date_parts)
-                    rel_img_dir = settings.STORAGE_IMG_DIR / camera_storage_name / Path(*date_parts)
-                    abs_img_dir.mkdir(parents=True, exist_ok=True)
+            rel_path = str(rel_img_path).replace("\\", "/")  # normalize for DB storage
 
-                    base_filename = (
-                        f"{camera_id}_{int(detection_event.timestamp)}_{detection_event.detection_type}.jpg"
-                    )
-                    abs_image_path = abs_img_dir / base_filename
-                    rel_img_path = rel_img_dir / base_filename
+            image_media = MediaCreate(
+                camera_id=int(camera_id),
+                media_type=MediaType.IMAGE,
+                path=rel_path,
+                timestamp=detection_event.timestamp,
+                size_bytes=os.path.getsize(abs_image_path),
+            )
 
-                    annotated_frame = self._annotate_frame(
-                        frame_data.frame, detection, detection_event.timestamp
-                    )
-                    cv2.imwrite(str(abs_image_path), annotated_frame)
+        except Exception as media_error:
+            logger.error(f"Error saving detection media: {media_error}", exc_info=True, extra={"camera_id": camera_id})
+            return None
 
-                    rel_path = str(rel_img_path).replace("\\", "/")  # normalize for DB storage
+        # Detection and image rows are written together by the batch writer
+        future = self.detection_writer.submit_detection(detection_event, [image_media])
+        metrics.detections.labels(camera=str(camera_id), type=detection_event.detection_type).inc()
+        future.add_done_callback(
+            lambda stored: self._on_detection_stored(stored, camera_id, camera_storage_name, camera_display_name)
+        )
+        if track_id is not None:
+            with self.track_lock:
+                self.track_events[(int(camera_id), track_id)] = TrackEvent(
+                    camera_id=int(camera_id),
+                    track_id=track_id,
+                    future=future,
+                    image_path=abs_image_path,
+                    end_time=detection_event.timestamp,
+                    best_confidence=detection_event.confidence,
+                    last_flush=detection_event.timestamp,
+                )
+        return future
 
-                    image_media = MediaCreate(
-                        camera_id=int(camera_id),
-                        detection_id=detection_record.id,
-                        media_type=MediaType.IMAGE,
-                        path=rel_path,
-                        timestamp=detection_event.timestamp,
-                        size_bytes=os.path.getsize(abs_image_path),
-                    )
-                    media_service.create_media(db, image_media)
+    def _extend_track_event(self, event: TrackEvent, frame_data: FrameData, detection: Dict[str, Any]) -> None:
+        """Push an open event's end time forward and keep its best snapshot"""
+        event.end_time = max(event.end_time, frame_data.timestamp)
+        confidence = detection.get('conf', 0.0)
+        if confidence >= event.best_confidence + settings.TRACK_SNAPSHOT_MIN_GAIN:
+            try:
+                annotated_frame = self._annotate_frame(frame_data.frame, detection, frame_data.timestamp)
+                with spans.span("detection.imwrite"):
+                    cv2.imwrite(str(event.image_path), annotated_frame)
+                event.best_confidence = confidence
+                event.image_size = os.path.getsize(event.image_path)
+            except Exception as e:
+                logger.error(f"Error updating snapshot for track {event.track_id}: {e}", extra={"camera_id": event.camera_id})
 
-                except Exception as media_error:
-                    print(f"Error saving detection media: {media_error}")
-                    import traceback
+        if event.end_time - event.last_flush >= settings.TRACK_UPDATE_INTERVAL_SECONDS and event.future.done():
+            self._flush_track_event(event)
 
-                    traceback.print_exc()
-                    return None
+    def _flush_track_event(self, event: TrackEvent) -> None:
+        """Write an event's end time, best confidence and snapshot size"""
+        if event.future.exception() is not None:
+            return
+        self.detection_writer.submit_update(
+            event.future.result().id,
+            {"end_timestamp": event.end_time, "confidence": event.best_confidence},
+            image_size=event.image_size,
+        )
+        event.image_size = None
+        event.last_flush = event.end_time
+
+    def end_tracks(self, camera_id: str, track_ids: List[int]) -> None:
+        """Close the events of tracks the tracker has dropped"""
+        for track_id in track_ids:
+            with self.track_lock:
+                event = self.track_events.pop((int(camera_id), track_id), None)
+            if event is not None:
+                # Runs immediately if the insert has landed, otherwise right after it does
+                event.future.add_done_callback(lambda _, event=event: self._flush_track_event(event))
+
+    def _on_detection_stored(
+        self,
+        future: "Future[Detection]",
+        camera_id: str,
+        camera_storage_name: str,
+        camera_display_name: str,
+    ) -> None:
+        """Start the clip and alert for a detection once its row exists"""
+        error = future.exception()
+        if error:
+            logger.error(f"Error recording detection: {error}")
+            return
 
-        except Exception as e:
-            print(f"Error recording detection: {e}")
-            import traceback
+        detection_record = future.result()
 
-            traceback.print_exc()
-            return None
+        # Start video capture thread
+        self._start_video_recording(
+            camera_id,
+            camera_storage_name,
+            detection_record.timestamp,
+            detection_record.id,
+        )
 
-        if self.alert_service and detection_record and self.enable_alerts:
+        if self.alert_service and self.enable_alerts:
             try:
                 self.send_detection_alert_sync(detection_record, camera_display_name)
             except Exception as e:
-                print(f"Error sending alert notifications: {e}")
+                logger.error(f"Error sending alert notifications: {e}")
         else:
-            print("Alert service not available or detection creation failed")
-
-        return detection_record
+            logger.warning("Alert service not available or detection creation failed")
 
-            
     async def send_detection_alert(self, detection: Detection, camera_name: str = None) -> bool:
         """Send Firebase FCM alert for a detection to all active users"""
         if not self.alert_service:
-            print("Alert service not available")
+            logger.warning("Alert service not available")
             return False
             
         try:
@@ -190,37 +250,28 @@ class DetectionEventManager:
                 await asyncio.to_thread(self._send_alert_with_session, detection)
                 return True
             except Exception as topic_error:
-                print(f"Error sending topic alert: {topic_error}")
+                logger.error(f"Error sending topic alert: {topic_error}")
                 return False
         except Exception as e:
-            print(f"Error in send_detection_alert: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Error in send_detection_alert: {e}", exc_info=True)
             return False
 
     def _send_alert_with_session(self, detection: Detection) -> None:
         with self._session_factory() as db:
             self.alert_service.send_alert(db, detection)
 
+    def _send_alert_batch(self, topic: str, events: List[AlertEvent]) -> None:
+        """Deliver a coalesced batch of alerts; runs on the dispatcher's worker"""
+        with self._session_factory() as db:
+            self.alert_service.send_alerts(db, [event.detection for event in events])
+
     def send_detection_alert_sync(self, detection: Detection, camera_name: str = None) -> None:
-        """Synchronous wrapper for sending detection alerts"""
+        """Hand a detection alert to the dispatcher without blocking the caller"""
         try:
-            
-            # Try to get current event loop, create new one if none exists
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    # If loop is running, create a task
-                    asyncio.create_task(self.send_detection_alert(detection, camera_name))
-                else:
-                    # If loop exists but not running, run the coroutine
-                    loop.run_until_complete(self.send_detection_alert(detection, camera_name))
-            except RuntimeError:
-                # No event loop exists, create a new one
-                asyncio.run(self.send_detection_alert(detection, camera_name))
-                
+            # Coalesce and rate-limit per camera, so one busy camera can't hold back the others
+            self.alert_dispatcher.submit(detection, Topics.camera(detection.camera_id))
         except Exception as e:
-            print(f"Error in send_detection_alert_sync: {e}")
+            logger.error(f"Error in send_detection_alert_sync: {e}")
             
     def _annotate_frame(self, frame: np.ndarray, detection: Dict, timestamp: float) -> np.ndarray:
         """Create annotated frame with detection overlay"""
@@ -247,7 +298,7 @@ class DetectionEventManager:
     def _start_video_recording(self, camera_id: str, camera_name: str, trigger_timestamp: float, detection_id: int = 1):
         """Start video recording for a detection event"""
         if not camera_name:
-            print(f"Camera name missing for {camera_id}, skipping video recording")
+            logger.warning(f"Camera name missing for {camera_id}, skipping video recording", extra={"camera_id": camera_id})
             return
 
         with self.recording_lock:
@@ -274,7 +325,7 @@ class DetectionEventManager:
                 'db_path':str(rel_path).replace("\\", "/")
             }
             
-            print(f"starting recording for video with info: {recording_info}")
+            logger.info(f"starting recording for video with info: {recording_info}", extra={"camera_id": camera_id})
             self.active_recordings[camera_id] = recording_info
             
             thread = threading.Thread(
@@ -292,21 +343,36 @@ class DetectionEventManager:
             if not recording_info:
                 return
 
+            if self._record_packets(camera_id, recording_info):
+                return
+
             frames_collected = []
             start_time = recording_info["start_time"]
             end_time = recording_info["end_time"]
             detection_id = recording_info["detection_id"]
 
-            while time.time() < end_time:
-                frame_data = None
-                if self.inference_engine:
-                    frame_data = self.inference_engine.get_latest_results(camera_id)
-                if frame_data and getattr(frame_data, "timestamp", 0) >= start_time:
-                    frames_collected.append((frame_data.frame.copy(), frame_data.timestamp))
-
-                time.sleep(0.1)
-
-            print(f"Collected {len(frames_collected)} frames for camera {camera_id}")
+            last_sequence = 0
+            next_sample = 0.0
+            while True:
+                remaining = end_time - time.time()
+                if remaining <= 0:
+                    break
+                if not self.inference_engine:
+                    time.sleep(remaining)
+                    break
+                # Wake on each published result instead of polling the engine
+                sequence = self.inference_engine.wait_for_result(camera_id, last_sequence, timeout=remaining)
+                if sequence <= last_sequence:
+                    continue
+                last_sequence = sequence
+                frame_data = self.inference_engine.get_latest_results(camera_id)
+                timestamp = getattr(frame_data, "timestamp", 0)
+                # Keep the clip's sampling at most one frame per CLIP_SAMPLE_INTERVAL
+                if frame_data and timestamp >= start_time and timestamp >= next_sample:
+                    frames_collected.append((frame_data.frame.copy(), timestamp))
+                    next_sample = timestamp + CLIP_SAMPLE_INTERVAL
+
+            logger.info(f"Collected {len(frames_collected)} frames for camera {camera_id}", extra={"camera_id": camera_id})
             if frames_collected:
                 abs_video_path = Path(recording_info["output_path"])
                 rel_video_path = Path(recording_info["db_path"])
@@ -321,13 +387,63 @@ class DetectionEventManager:
                     detection_id,
                 )
         except Exception as e:
-            print(f"Error in video recording thread for camera {camera_id}: {e}")
+            logger.error(f"Error in video recording thread for camera {camera_id}: {e}", extra={"camera_id": camera_id})
 
         finally:
             with self.recording_lock:
                 if camera_id in self.active_recordings:
                     del self.active_recordings[camera_id]
     
+    def _record_packets(self, camera_id: str, recording_info: Dict) -> bool:
+        """Copy the camera's encoded H.264 into the clip instead of re-encoding frames.
+
+        Returns False when the camera doesn't expose packets (OpenCV backend, or a
+        codec browsers can't play), so the caller records frames instead.
+        """
+        video_capture = self.video_capture
+        if video_capture is None or video_capture.get_packet_codec(camera_id) != "h264":
+            return False
+        abs_path = (self.storage_path / Path(recording_info["output_path"])).resolve()
+        recorder = PacketClipRecorder(abs_path)
+        if not video_capture.add_packet_sink(camera_id, recorder):
+            return False
+
+        # Packets are muxed on the capture thread as they arrive; just wait out the clip
+        started_at = time.time()
+        try:
+            time.sleep(max(0.0, recording_info["end_time"] - started_at))
+        finally:
+            video_capture.remove_packet_sink(camera_id, recorder)
+
+        with spans.span("clip.mux"):
+            written = recorder.close()
+        if written is None:
+            logger.warning(f"No keyframe from camera {camera_id} during the clip; nothing recorded", extra={"camera_id": camera_id})
+            return True
+
+        _, duration = written
+        logger.info(f"✓ Copied {recorder.packet_count} packets to {abs_path}", extra={"camera_id": camera_id})
+        self._submit_clip_media(
+            abs_path, Path(recording_info["db_path"]), camera_id, recording_info["detection_id"], started_at, duration
+        )
+        return True
+
+    def _submit_clip_media(
+        self, output_path: Path, rel_path: Path, camera_id: str, detection_id: int, timestamp: float, duration: float
+    ):
+        """Queue the media row for a written clip"""
+        video_media = MediaCreate(
+            camera_id=int(camera_id),
+            detection_id=detection_id,
+            media_type=MediaType.VIDEO,
+            path=str(rel_path).replace("\\", "/"),
+            timestamp=timestamp,
+            duration=duration,
+            size_bytes=os.path.getsize(output_path),
+        )
+        self.detection_writer.submit_media(video_media)
+        logger.info(f"✓ Video media record queued for database", extra={"camera_id": camera_id})
+
     def _save_video_clip(
         self,
         frames: List[Tuple[np.ndarray, float]],
@@ -337,7 +453,7 @@ class DetectionEventManager:
         detection_id: int,
     ):
         """Save collected frames as a web-compatible MP4 video using FFmpeg"""
-        print(f"Saving video clip to {output_path} for camera {camera_id}")
+        logger.info(f"Saving video clip to {output_path} for camera {camera_id}", extra={"camera_id": camera_id})
         if not frames:
             return
 
@@ -354,7 +470,7 @@ class DetectionEventManager:
             # Create temporary directory for frame images
             with tempfile.TemporaryDirectory() as temp_dir:
                 temp_path = Path(temp_dir)
-                print(f"Using temporary directory: {temp_path}")
+                logger.debug(f"Using temporary directory: {temp_path}", extra={"camera_id": camera_id})
                 
                 # Save frames as individual images
                 frame_files = []
@@ -364,10 +480,11 @@ class DetectionEventManager:
                         frame = cv2.resize(frame, (width, height))
                     
                     frame_file = temp_path / f"frame_{i:06d}.jpg"
-                    cv2.imwrite(str(frame_file), frame)
+                    with spans.span("clip.imwrite"):
+                        cv2.imwrite(str(frame_file), frame)
                     frame_files.append(frame_file)
                 
-                print(f"Saved {len(frame_files)} frames to temporary directory")
+                logger.debug(f"Saved {len(frame_files)} frames to temporary directory", extra={"camera_id": camera_id})
                 
                 fps = 20
                 input_pattern = str(temp_path / "frame_%06d.jpg")
@@ -389,50 +506,30 @@ class DetectionEventManager:
                     str(output_path)
                 ]
                 
-                print(f"Running FFmpeg command: {' '.join(cmd)}")
+                logger.debug(f"Running FFmpeg command: {' '.join(cmd)}", extra={"camera_id": camera_id})
                 
                 # Run FFmpeg
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    check=True
-                )
+                with spans.span("clip.encode"):
+                    result = subprocess.run(
+                        cmd,
+                        capture_output=True,
+                        text=True,
+                        check=True
+                    )
                 
-                print(f"✓ FFmpeg video creation successful: {output_path}")
-                print(f"FFmpeg output: {result.stderr}")
+                logger.info(f"✓ FFmpeg video creation successful: {output_path}", extra={"camera_id": camera_id})
+                logger.debug(f"FFmpeg output: {result.stderr}", extra={"camera_id": camera_id})
 
             # Verify the file was created
             if not output_path.exists():
-                print(f"❌ Output file was not created: {output_path}")
+                logger.error(f"❌ Output file was not created: {output_path}", extra={"camera_id": camera_id})
                 return
                 
-            # Compute metadata
-            file_size = os.path.getsize(output_path)
-            duration = len(frames) / fps
-            timestamp = frames[0][1]
-
-            # Compute relative path for DB storage
-            rel_video_path = str(rel_path).replace("\\", "/")
-
-            video_media = MediaCreate(
-                camera_id=int(camera_id),
-                detection_id=detection_id,
-                media_type=MediaType.VIDEO,
-                path=rel_video_path,
-                timestamp=timestamp,
-                duration=duration,
-                size_bytes=file_size,
-            )
-            with self._session_factory() as db:
-                media_service.create_media(db, video_media)
-            print(f"✓ Video media record created in database")
+            self._submit_clip_media(output_path, rel_path, camera_id, detection_id, frames[0][1], len(frames) / fps)
 
         except subprocess.CalledProcessError as e:
-            print(f"❌ FFmpeg failed: {e}")
-            print(f"FFmpeg stderr: {e.stderr}")
-            print(f"FFmpeg stdout: {e.stdout}")
+            logger.error(f"❌ FFmpeg failed: {e}", extra={"camera_id": camera_id})
+            logger.debug(f"FFmpeg stderr: {e.stderr}", extra={"camera_id": camera_id})
+            logger.debug(f"FFmpeg stdout: {e.stdout}", extra={"camera_id": camera_id})
         except Exception as e:
-            print(f"❌ Error saving video clip: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"❌ Error saving video clip: {e}", exc_info=True, extra={"camera_id": camera_id})
@@ -0,0 +1,244 @@
+"""
+Detection rules engine.
+
+Rules (class, confidence, camera/zone scope, daily schedule, cooldown) live in
+the detection_rules table. For each camera they are compiled into flat
+per-class-id lists, so deciding whether a box becomes an event is a couple of
+list lookups and a float compare: no string formatting, dict keys or locks
+on the per-box path. Tables are rebuilt only when rules are reloaded or a
+schedule window opens or closes.
+"""
+import logging
+import math
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, time as dtime, timedelta
+from typing import Callable, Dict, List, Mapping, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from ..core.database.connection import SessionLocal
+from ..core.models import DetectionRule
+from ..Settings import settings
+from .metadata_cache import camera_cache
+
+logger = logging.getLogger(__name__)
+
+_DISABLED = math.inf
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    """Plain copy of a DetectionRule row, safe to use outside a session"""
+    detection_type: str
+    min_confidence: float
+    cooldown_seconds: float
+    camera_id: Optional[int] = None
+    zone_id: Optional[int] = None
+    start_time: Optional[dtime] = None
+    end_time: Optional[dtime] = None
+    days_of_week: int = 127
+
+    @classmethod
+    def from_model(cls, rule: DetectionRule) -> "RuleSpec":
+        return cls(
+            detection_type=rule.detection_type.lower(),
+            min_confidence=rule.min_confidence,
+            cooldown_seconds=rule.cooldown_seconds,
+            camera_id=rule.camera_id,
+            zone_id=rule.zone_id,
+            start_time=rule.start_time,
+            end_time=rule.end_time,
+            days_of_week=rule.days_of_week,
+        )
+
+    @property
+    def valid_schedule(self) -> bool:
+        """A daily window needs both ends; rows written before validation may lack one"""
+        return (self.start_time is None) == (self.end_time is None)
+
+    @property
+    def scheduled(self) -> bool:
+        return self.start_time is not None or self.days_of_week != 127
+
+    def applies_to(self, camera_id: int, zone_id: Optional[int]) -> bool:
+        if self.camera_id is not None and self.camera_id != camera_id:
+            return False
+        if self.zone_id is not None and self.zone_id != zone_id:
+            return False
+        return True
+
+    def active_at(self, moment: datetime) -> bool:
+        if not self.days_of_week & (1 << moment.weekday()):
+            return False
+        if self.start_time is None:
+            return True
+        now = moment.time()
+        if self.start_time <= self.end_time:
+            return self.start_time <= now < self.end_time
+        # Overnight window, e.g. 22:00-06:00
+        return now >= self.start_time or now < self.end_time
+
+    def next_change_after(self, moment: datetime) -> datetime:
+        """Next moment this rule may switch between active and inactive"""
+        midnight = datetime.combine(moment.date() + timedelta(days=1), dtime.min)
+        if self.start_time is None:
+            return midnight
+        candidates = [midnight]
+        for boundary in (self.start_time, self.end_time):
+            at = datetime.combine(moment.date(), boundary)
+            if at <= moment:
+                at += timedelta(days=1)
+            candidates.append(at)
+        return min(candidates)
+
+
+def default_rules() -> List[RuleSpec]:
+    """Behaviour when no rules are configured: people only, global threshold and cooldown"""
+    return [RuleSpec(
+        detection_type="person",
+        min_confidence=settings.MIN_CONFIDENCE,
+        cooldown_seconds=settings.DETECTION_COOLDOWN,
+    )]
+
+
+@dataclass
+class CameraRuleTable:
+    """Per-camera lookup tables indexed by model class id"""
+    min_confidence: List[float]
+    cooldown: List[float]
+    last_fired: List[float]
+    valid_until: float
+    generation: int
+
+
+@dataclass
+class _EngineState:
+    rules: List[RuleSpec] = field(default_factory=default_rules)
+    class_ids: Dict[str, int] = field(default_factory=dict)
+    class_count: int = 0
+    generation: int = 0
+
+
+class DetectionRuleEngine:
+    """Compiles detection rules into per-camera tables and evaluates boxes against them"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._state = _EngineState()
+        self._class_names: Optional[Mapping[int, str]] = None
+        self._tables: Dict[int, CameraRuleTable] = {}
+        self._lock = threading.Lock()
+
+    def reload(self, db: Optional[Session] = None) -> None:
+        """Load enabled rules from the database; falls back to default_rules() when none exist"""
+        if db is None:
+            with self._session_factory() as session:
+                return self.reload(session)
+        rows = db.query(DetectionRule).filter(DetectionRule.enabled == True).all()
+        rules = [RuleSpec.from_model(row) for row in rows] or default_rules()
+        self.set_rules(rules)
+        logger.info(f"Loaded {len(rows)} detection rules")
+
+    def set_rules(self, rules: Sequence[RuleSpec]) -> None:
+        malformed = [rule for rule in rules if not rule.valid_schedule]
+        if malformed:
+            # Skipped here so the per-box path never compares against a missing time
+            logger.warning(f"Skipping {len(malformed)} detection rules with only one schedule time")
+            rules = [rule for rule in rules if rule.valid_schedule]
+        with self._lock:
+            state = self._state
+            self._state = _EngineState(
+                rules=list(rules),
+                class_ids=state.class_ids,
+                class_count=state.class_count,
+                generation=state.generation + 1,
+            )
+
+    def bind_class_names(self, names: Mapping[int, str]) -> None:
+        """Map the model's class ids to names; cheap no-op when the mapping is unchanged"""
+        if names is self._class_names:
+            return
+        with self._lock:
+            self._class_names = names
+            state = self._state
+            class_ids = {str(name).lower(): int(class_id) for class_id, name in names.items()}
+            if class_ids == state.class_ids:
+                return
+            self._state = _EngineState(
+                rules=state.rules,
+                class_ids=class_ids,
+                class_count=max(class_ids.values(), default=-1) + 1,
+                generation=state.generation + 1,
+            )
+
+    def invalidate_camera(self, camera_id: Optional[int] = None) -> None:
+        """Force a rebuild, e.g. after a camera moves to another zone; cooldowns carry over"""
+        with self._lock:
+            if camera_id is None:
+                tables = list(self._tables.values())
+            else:
+                table = self._tables.get(int(camera_id))
+                tables = [table] if table is not None else []
+            for table in tables:
+                # Expire instead of dropping, so _compile keeps last_fired
+                table.valid_until = -math.inf
+
+    def allow(self, camera_id: int, class_id: int, confidence: float, now: float) -> bool:
+        """Decide whether a box becomes an event, and start its cooldown if so.
+
+        Called from the camera's own inference thread, so the cooldown slot is
+        only ever written by one thread.
+        """
+        table = self._tables.get(camera_id)
+        if table is None or now >= table.valid_until or table.generation != self._state.generation:
+            table = self._compile(camera_id, now, table)
+
+        if class_id >= len(table.min_confidence) or confidence < table.min_confidence[class_id]:
+            return False
+        if now - table.last_fired[class_id] < table.cooldown[class_id]:
+            return False
+        table.last_fired[class_id] = now
+        return True
+
+    def _compile(self, camera_id: int, now: float, previous: Optional[CameraRuleTable]) -> CameraRuleTable:
+        state = self._state
+        camera = camera_cache.get(camera_id)
+        zone_id = camera.zone_id if camera else None
+        moment = datetime.fromtimestamp(now)
+
+        min_confidence = [_DISABLED] * state.class_count
+        cooldown = [math.inf] * state.class_count
+        valid_until = math.inf
+
+        for rule in state.rules:
+            if not rule.applies_to(camera_id, zone_id):
+                continue
+            if rule.scheduled:
+                valid_until = min(valid_until, rule.next_change_after(moment).timestamp())
+                if not rule.active_at(moment):
+                    continue
+            class_id = state.class_ids.get(rule.detection_type)
+            if class_id is None:
+                continue
+            # Overlapping rules: the most permissive threshold and cooldown win
+            min_confidence[class_id] = min(min_confidence[class_id], rule.min_confidence)
+            cooldown[class_id] = min(cooldown[class_id], rule.cooldown_seconds)
+
+        if previous is not None and len(previous.last_fired) == state.class_count:
+            last_fired = previous.last_fired
+        else:
+            last_fired = [-math.inf] * state.class_count
+
+        table = CameraRuleTable(
+            min_confidence=min_confidence,
+            cooldown=cooldown,
+            last_fired=last_fired,
+            valid_until=valid_until,
+            generation=state.generation,
+        )
+        self._tables[camera_id] = table
+        return table
+
+
+detection_rules = DetectionRuleEngine()
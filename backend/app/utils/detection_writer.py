@@ -0,0 +1,167 @@
+"""
+Buffered writer that persists detections and their media rows in batches.
+
+The inference threads enqueue rows and return immediately; a single writer
+thread flushes everything that arrived within the flush window in one
+transaction, so N detections cost one commit instead of 2N.
+"""
+import logging
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.orm import Session
+
+from ..core.database.connection import SessionLocal
+from ..core.models import Detection as DetectionModel, Media as MediaModel
+from ..schema.detection import Detection, DetectionCreate
+from ..schema.media import MediaCreate, MediaType
+from ..Settings import settings
+from . import metrics
+from .batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _PendingWrite:
+    detection: Optional[DetectionCreate]
+    media: List[MediaCreate]
+    update: Optional[dict] = None
+    future: Future = field(default_factory=Future)
+
+
+class DetectionWriter(BatchWriter[_PendingWrite]):
+    """Groups detection and media inserts into one transaction per flush window"""
+
+    thread_name = "detection-writer"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval_ms: int = settings.DETECTION_FLUSH_INTERVAL_MS,
+        max_batch_size: int = settings.DETECTION_FLUSH_MAX_BATCH,
+    ):
+        super().__init__(session_factory, flush_interval_ms, max_batch_size)
+
+    def submit_detection(self, detection: DetectionCreate, media: Optional[List[MediaCreate]] = None) -> "Future[Detection]":
+        """Queue a detection and its media; the future resolves to the stored Detection"""
+        pending = _PendingWrite(detection=detection, media=list(media or []))
+        self._enqueue(pending)
+        return pending.future
+
+    def submit_media(self, media: MediaCreate) -> "Future[None]":
+        """Queue a standalone media row (e.g. a clip for an already stored detection)"""
+        pending = _PendingWrite(detection=None, media=[media])
+        self._enqueue(pending)
+        return pending.future
+
+    def submit_update(self, detection_id: int, values: dict, image_size: Optional[int] = None) -> "Future[None]":
+        """Queue column updates for a stored detection (and the new size of its snapshot)"""
+        pending = _PendingWrite(
+            detection=None,
+            media=[],
+            update={"id": detection_id, "values": values, "image_size": image_size},
+        )
+        self._enqueue(pending)
+        return pending.future
+
+    def _write_batch(self, batch: List[_PendingWrite]) -> None:
+        started = time.perf_counter()
+        try:
+            stored = self._write(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad row rolls back the whole transaction; write the rows on
+                # their own so only the offending write fails
+                logger.warning(f"Failed to flush {len(batch)} detection writes ({e}); retrying one by one")
+                for pending in batch:
+                    self._write_batch([pending])
+                return
+            logger.error(f"Failed to write detection row: {e}")
+            if not batch[0].future.done():
+                batch[0].future.set_exception(e)
+            return
+
+        # Resolved outside the try: callbacks start clips and alerts, and a
+        # failure there must not re-insert rows that are already committed
+        media_count = sum(len(p.media) for p in batch)
+        update_count = sum(p.update is not None for p in batch)
+        metrics.db_write_latency.observe(time.perf_counter() - started)
+        metrics.db_write_rows.labels(kind="detection").inc(len(stored))
+        metrics.db_write_rows.labels(kind="media").inc(media_count)
+        metrics.db_write_rows.labels(kind="update").inc(update_count)
+        logger.debug(f"Flushed {len(stored)} detections, {media_count} media rows and {update_count} updates")
+        results = iter(stored)
+        for pending in batch:
+            result = next(results) if pending.detection is not None else None
+            if not pending.future.done():
+                pending.future.set_result(result)
+
+    def _write(self, batch: List[_PendingWrite]) -> List[Detection]:
+        """Write a batch in one transaction and return its stored detections; raises if it rolled back"""
+        detection_writes = [p for p in batch if p.detection is not None]
+        now = datetime.now()
+
+        with self._session_factory() as db:
+            stored: List[Detection] = []
+            if detection_writes:
+                rows = [
+                    {**p.detection.model_dump(), "created_at": now}
+                    for p in detection_writes
+                ]
+                # insertmanyvalues renders a single multi-row VALUES statement;
+                # sort_by_parameter_order keeps the returned ids aligned with rows
+                result = db.execute(
+                    insert(DetectionModel).returning(
+                        DetectionModel.id, sort_by_parameter_order=True
+                    ),
+                    rows,
+                )
+                for row, (detection_id,) in zip(rows, result.all()):
+                    stored.append(Detection.model_validate({**row, "id": detection_id}))
+
+            stored_ids = {id(p): d.id for p, d in zip(detection_writes, stored)}
+            media_rows = []
+            for pending in batch:
+                detection_id = stored_ids.get(id(pending))
+                for media in pending.media:
+                    media_rows.append({
+                        "camera_id": media.camera_id,
+                        "detection_id": detection_id if detection_id is not None else media.detection_id,
+                        "media_type": media.media_type.value,
+                        "path": settings.get_relative_path(settings.get_absolute_path(media.path)),
+                        "timestamp": media.timestamp,
+                        "duration": media.duration,
+                        "size_bytes": media.size_bytes,
+                        "created_at": now,
+                    })
+            if media_rows:
+                db.execute(insert(MediaModel).values(media_rows))
+
+            updates = [p.update for p in batch if p.update is not None]
+            if updates:
+                # ORM bulk UPDATE by primary key: one executemany per column set
+                db.execute(
+                    update(DetectionModel),
+                    [{"id": u["id"], **u["values"]} for u in updates],
+                )
+                image_sizes = [
+                    {"b_detection_id": u["id"], "b_size": u["image_size"]}
+                    for u in updates if u["image_size"] is not None
+                ]
+                if image_sizes:
+                    media_table = MediaModel.__table__
+                    db.execute(
+                        update(media_table)
+                        .where(media_table.c.detection_id == bindparam("b_detection_id"))
+                        .where(media_table.c.media_type == MediaType.IMAGE.value)
+                        .values(size_bytes=bindparam("b_size")),
+                        image_sizes,
+                    )
+
+            db.commit()
+        return stored
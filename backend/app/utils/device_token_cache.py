@@ -0,0 +1,122 @@
+"""
+In-memory set of active FCM device tokens and users' notification
+preferences.
+
+AlertService fans detection alerts out from this without querying
+user_device_tokens or notification_preferences. Registration, invalid-token
+cleanup, unregistration and preference updates keep it in step with the tables.
+"""
+import threading
+from typing import Callable, Dict, FrozenSet, Iterable, Mapping, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.database.connection import SessionLocal
+from ..core.models import NotificationPreference, UserDeviceToken
+
+
+class DeviceTokenCache:
+    """Active device token -> user id, with an immutable snapshot for readers"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self._session_factory = session_factory
+        self._tokens: Dict[str, int] = {}
+        self._preferences: Dict[int, FrozenSet[str]] = {}
+        self._settings: Dict[int, Mapping[str, bool]] = {}
+        self._snapshot: Tuple[str, ...] = ()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def active_tokens(self) -> Tuple[str, ...]:
+        """All active tokens; only the very first call touches the database"""
+        if not self._loaded:
+            self.reload()
+        return self._snapshot
+
+    def tokens_for_user(self, user_id: int) -> Tuple[str, ...]:
+        if not self._loaded:
+            self.reload()
+        with self._lock:
+            return tuple(token for token, owner in self._tokens.items() if owner == user_id)
+
+    def token_owners(self) -> Dict[str, int]:
+        """Active token -> user id"""
+        if not self._loaded:
+            self.reload()
+        with self._lock:
+            return dict(self._tokens)
+
+    def enabled_categories(self) -> Dict[int, FrozenSet[str]]:
+        """user id -> notification categories the user has enabled"""
+        if not self._loaded:
+            self.reload()
+        return self._preferences
+
+    def preferences(self) -> Dict[int, Mapping[str, bool]]:
+        """user id -> every category the user has a preference for -> enabled"""
+        if not self._loaded:
+            self.reload()
+        return self._settings
+
+    def add(self, device_token: str, user_id: int) -> None:
+        with self._lock:
+            self._tokens[device_token] = user_id
+            self._rebuild()
+
+    def discard(self, device_tokens: Iterable[str]) -> None:
+        with self._lock:
+            for device_token in device_tokens:
+                self._tokens.pop(device_token, None)
+            self._rebuild()
+
+    def reload(self, db: Optional[Session] = None) -> None:
+        """Replace the cache with the active tokens currently in the database"""
+        if db is None:
+            with self._session_factory() as session:
+                return self.reload(session)
+
+        rows = db.query(UserDeviceToken.device_token, UserDeviceToken.user_id).filter(
+            UserDeviceToken.is_active == True
+        ).all()
+        pref_rows = db.query(
+            NotificationPreference.user_id, NotificationPreference.category, NotificationPreference.enabled
+        ).all()
+        settings: Dict[int, Dict[str, bool]] = {}
+        for user_id, category, enabled in pref_rows:
+            settings.setdefault(user_id, {})[category] = bool(enabled)
+
+        with self._lock:
+            self._tokens = {token: user_id for token, user_id in rows}
+            self._settings = settings
+            self._preferences = {
+                user_id: frozenset(c for c, on in categories.items() if on)
+                for user_id, categories in settings.items()
+            }
+            self._loaded = True
+            self._rebuild()
+
+    def reload_user(self, db: Session, user_id: int) -> None:
+        """Re-read one user's active tokens after their devices or preferences change"""
+        rows = db.query(UserDeviceToken.device_token).filter(
+            UserDeviceToken.user_id == user_id,
+            UserDeviceToken.is_active == True
+        ).all()
+        categories = dict(db.query(NotificationPreference.category, NotificationPreference.enabled).filter(
+            NotificationPreference.user_id == user_id
+        ).all())
+        with self._lock:
+            self._tokens = {t: owner for t, owner in self._tokens.items() if owner != user_id}
+            self._tokens.update({token: user_id for (token,) in rows})
+            settings = dict(self._settings)
+            settings[user_id] = {category: bool(on) for category, on in categories.items()}
+            self._settings = settings
+            preferences = dict(self._preferences)
+            preferences[user_id] = frozenset(category for category, on in categories.items() if on)
+            self._preferences = preferences
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._snapshot = tuple(self._tokens)
+
+
+device_token_cache = DeviceTokenCache()
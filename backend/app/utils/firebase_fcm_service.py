@@ -1,12 +1,144 @@
 import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
 import firebase_admin
+import httpx
 from firebase_admin import credentials, messaging
 
+from ..Settings import settings
+
 logger = logging.getLogger(__name__)
 
+# FCM rejects topic conditions that name more topics than this
+MAX_CONDITION_TOPICS = 5
+
+
+class FCMTransport(ABC):
+    """Delivers one multicast chunk; Firebase_FCM_Service handles chunking"""
+
+    @abstractmethod
+    def send_multicast(self, tokens: List[str], title: str, body: str, data: Dict[str, str]) -> List[bool]:
+        """Send to at most FCM_MULTICAST_CHUNK_SIZE tokens and return per-token success, in order"""
+
+    @abstractmethod
+    def send_to_condition(self, condition: str, title: str, body: str, data: Dict[str, str]) -> str:
+        """Publish one message to every device matching a topic condition; returns the message id"""
+
+    @abstractmethod
+    def subscribe(self, tokens: List[str], topic: str) -> List[bool]:
+        """Subscribe up to 1000 tokens to a topic; returns per-token success, in order"""
+
+    @abstractmethod
+    def unsubscribe(self, tokens: List[str], topic: str) -> List[bool]:
+        """Unsubscribe up to 1000 tokens from a topic; returns per-token success, in order"""
+
+    def close(self) -> None:
+        pass
+
+
+class FirebaseAdminTransport(FCMTransport):
+    """Production transport backed by firebase_admin.messaging"""
+
+    def send_multicast(self, tokens, title, body, data):
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+            tokens=tokens
+        )
+        response = messaging.send_each_for_multicast(message)
+        return [resp.success for resp in response.responses]
+
+    def send_to_condition(self, condition, title, body, data):
+        message = messaging.Message(
+            notification=messaging.Notification(title=title, body=body),
+            data=data,
+            condition=condition
+        )
+        return messaging.send(message)
+
+    def subscribe(self, tokens, topic):
+        return self._results(tokens, messaging.subscribe_to_topic(tokens, topic))
+
+    def unsubscribe(self, tokens, topic):
+        return self._results(tokens, messaging.unsubscribe_from_topic(tokens, topic))
+
+    @staticmethod
+    def _results(tokens, response) -> List[bool]:
+        failed = {error.index for error in response.errors}
+        return [i not in failed for i in range(len(tokens))]
+
+
+class HTTPTransport(FCMTransport):
+    """Posts chunks as JSON to an HTTP endpoint, e.g. a local FCM stand-in for load tests.
+
+    Request:  {"tokens": [...], "notification": {"title", "body"}, "data": {...}}
+    Response: {"results": [{"success": true}, ...]} in token order
+
+    Condition sends post {"condition": "...", ...} and expect {"name": "<message id>"}.
+    Topic management posts {"tokens": [...], "topic": "...", "action": "subscribe"|"unsubscribe"}
+    and expects the same per-token "results" as a multicast.
+    """
+
+    def __init__(self, endpoint: str, timeout: float = settings.ALERT_NOTIFICATION_TIMEOUT):
+        self.endpoint = endpoint
+        self._client = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=settings.FCM_MAX_PARALLEL_CHUNKS * 2),
+        )
+
+    def send_multicast(self, tokens, title, body, data):
+        response = self._client.post(self.endpoint, json={
+            "tokens": tokens,
+            "notification": {"title": title, "body": body},
+            "data": data,
+        })
+        response.raise_for_status()
+        return [bool(result.get("success")) for result in response.json()["results"]]
+
+    def send_to_condition(self, condition, title, body, data):
+        response = self._client.post(self.endpoint, json={
+            "condition": condition,
+            "notification": {"title": title, "body": body},
+            "data": data,
+        })
+        response.raise_for_status()
+        return response.json().get("name", "")
+
+    def subscribe(self, tokens, topic):
+        return self._manage_topic(tokens, topic, "subscribe")
+
+    def unsubscribe(self, tokens, topic):
+        return self._manage_topic(tokens, topic, "unsubscribe")
+
+    def _manage_topic(self, tokens, topic, action) -> List[bool]:
+        response = self._client.post(self.endpoint, json={"tokens": tokens, "topic": topic, "action": action})
+        response.raise_for_status()
+        return [bool(result.get("success")) for result in response.json()["results"]]
+
+    def close(self) -> None:
+        self._client.close()
+
+
 class Firebase_FCM_Service:
-    def __init__(self, service_account_path: str):
-        """Initialize Firebase Admin SDK"""
+    def __init__(
+        self,
+        service_account_path: str,
+        transport: Optional[FCMTransport] = None,
+        chunk_size: int = settings.FCM_MULTICAST_CHUNK_SIZE,
+        max_parallel_chunks: int = settings.FCM_MAX_PARALLEL_CHUNKS,
+    ):
+        """Initialize Firebase Admin SDK, unless a stand-in transport is supplied"""
+        self.transport = transport
+        self.chunk_size = min(chunk_size, 500)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_parallel_chunks,
+            thread_name_prefix="fcm-multicast"
+        )
+        if self.transport is not None:
+            logger.info(f"Using {type(self.transport).__name__} for FCM multicast")
+            return
         try:
             if not firebase_admin._apps:
                 cred = credentials.Certificate(service_account_path)
@@ -15,9 +147,10 @@ class Firebase_FCM_Service:
         except Exception as e:
             logger.error(f"Failed to initialize Firebase Admin SDK: {e}")
             raise
+        self.transport = FirebaseAdminTransport()
 
     def send_fcm_message(self, token, title, body):
-        print(f"Sending FCM message to token {token}")
+        logger.debug(f"Sending FCM message to token {token}")
         message = messaging.Message(
             notification=messaging.Notification(
                 title=title,
@@ -27,47 +160,65 @@ class Firebase_FCM_Service:
         )
         try:
             response = messaging.send(message)
-            print(f"Successfully sent FCM message: {response}")
+            logger.info(f"Successfully sent FCM message: {response}")
         except Exception as e:
-            print(f"Failed to send FCM message: {e}")
+            logger.error(f"Failed to send FCM message: {e}")
             raise Exception(f"Failed to send FCM message: {e}")
         return response
     
     def send_multicast_notification(self, tokens, title, body, data=None):
-        """Send notification to multiple tokens and return failed tokens."""
+        """Send notification to multiple tokens and return failed tokens.
+
+        Tokens are split into FCM-sized chunks that are sent concurrently.
+        Raises only if no chunk could be delivered, so a retry never repeats
+        a notification that already reached some devices.
+        """
         if not tokens:
             logger.warning("No tokens provided for multicast notification")
             return []
 
-        logger.info(f"Sending multicast notification to {len(tokens)} tokens")
+        tokens = list(tokens)
+        payload = {k: str(v) for k, v in (data or {}).items()}
+        chunks = [tokens[i:i + self.chunk_size] for i in range(0, len(tokens), self.chunk_size)]
+        logger.info(f"Sending multicast notification to {len(tokens)} tokens in {len(chunks)} chunk(s)")
 
-        message = messaging.MulticastMessage(
-            notification=messaging.Notification(title=title, body=body),
-            data={k: str(v) for k, v in (data or {}).items()},
-            tokens=tokens
-        )
-
-        try:
-            response = messaging.send_each_for_multicast(message)
-            logger.info(
-                f"Multicast sent. Success: {response.success_count}, Failure: {response.failure_count}"
-            )
+        if len(chunks) == 1:
+            outcomes = [self._send_chunk(chunks[0], title, body, payload)]
+        else:
+            outcomes = list(self._executor.map(
+                lambda chunk: self._send_chunk(chunk, title, body, payload), chunks
+            ))
 
+        failed_tokens = []
+        errors = []
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                errors.append(outcome)
+                continue
             # Extract failed tokens for cleanup
-            failed_tokens = [
-                tokens[i] for i, resp in enumerate(response.responses) if not resp.success
-            ]
-            for token in failed_tokens:
-                logger.warning(f"Failed to send to token {token}")
+            failed_tokens.extend(token for token, ok in zip(chunk, outcome) if not ok)
 
-            return failed_tokens
-        except Exception as e:
-            logger.error(f"Error sending multicast notification: {e}")
-            raise Exception(f"Failed to send multicast notification: {e}")
+        if errors and len(errors) == len(chunks):
+            logger.error(f"Error sending multicast notification: {errors[0]}")
+            raise Exception(f"Failed to send multicast notification: {errors[0]}")
+        if errors:
+            logger.error(f"{len(errors)} of {len(chunks)} multicast chunks failed: {errors[0]}")
 
+        logger.info(
+            f"Multicast sent. Success: {len(tokens) - len(failed_tokens)}, Failure: {len(failed_tokens)}"
+        )
+        for token in failed_tokens:
+            logger.warning(f"Failed to send to token {token}")
+        return failed_tokens
+
+    def _send_chunk(self, tokens: List[str], title: str, body: str, data: Dict[str, str]):
+        try:
+            return self.transport.send_multicast(tokens, title, body, data)
+        except Exception as e:
+            return e
 
     def send_fcm_to_topic(self, topic, title, body, data=None):
-        print(f"Sending FCM message to topic {topic}")
+        logger.debug(f"Sending FCM message to topic {topic}")
         message = messaging.Message(
             notification=messaging.Notification(
                 title=title,
@@ -78,18 +229,37 @@ class Firebase_FCM_Service:
         )
         try:
             response = messaging.send(message)
-            print(f"Successfully sent message to topic {topic}: {response}")
             logger.info(f"Successfully sent message to topic {topic}: {response}")
         except Exception as e:
             logger.error(f"Failed to send message to topic {topic}: {e}")
-            print(f"Failed to send message to topic {topic}: {e}")
             raise Exception(f"Failed to send FCM message to topic {topic}: {e}")
         return response
     
+    def send_fcm_to_topics(self, topics, title, body, data=None):
+        """Publish once to every device subscribed to any of the topics.
+
+        Uses a single FCM condition ("'a' in topics || 'b' in topics") so a
+        device on several of the topics still receives one notification. FCM
+        allows at most ``MAX_CONDITION_TOPICS`` topics per condition; splitting
+        a longer list would notify devices on topics in different sends twice,
+        so that raises ValueError and the caller has to send per token instead.
+        """
+        topics = list(dict.fromkeys(topics))
+        if len(topics) > MAX_CONDITION_TOPICS:
+            raise ValueError(f"An FCM condition allows at most {MAX_CONDITION_TOPICS} topics, got {len(topics)}")
+        condition = " || ".join(f"'{topic}' in topics" for topic in topics)
+        payload = {k: str(v) for k, v in (data or {}).items()}
+        try:
+            message_id = self.transport.send_to_condition(condition, title, body, payload)
+        except Exception as e:
+            logger.error(f"Failed to send message to condition {condition}: {e}")
+            raise Exception(f"Failed to send FCM message to topics {topics}: {e}")
+        logger.info(f"Sent message to condition {condition}")
+        return [message_id]
+
     def subscribe_to_topic(self, token, topic):
         try:
-            print(f"Subscribing token {token} to topic {topic}")
-            response = messaging.subscribe_to_topic(token, topic)
+            response = self.transport.subscribe([token], topic)
             logger.info(f"Successfully subscribed {token} to topic {topic}: {response}")
         except Exception as e:
             logger.error(f"Failed to subscribe {token} to topic {topic}: {e}")
@@ -98,9 +268,33 @@ class Firebase_FCM_Service:
 
     def unsubscribe_from_topic(self, token, topic):
         try:
-            response = messaging.unsubscribe_from_topic(token, topic)
+            response = self.transport.unsubscribe([token], topic)
             logger.info(f"Successfully unsubscribed {token} from topic {topic}: {response}")
         except Exception as e:
             logger.error(f"Failed to unsubscribe {token} from topic {topic}: {e}")
             raise Exception(f"Failed to unsubscribe from topic {topic}: {e}")
         return response
+
+    def subscribe_tokens_to_topic(self, tokens, topic) -> List[str]:
+        """Subscribe many tokens with one call per 1000 tokens; returns the tokens that failed"""
+        return self._manage_topic_bulk(self.transport.subscribe, tokens, topic, "subscribe")
+
+    def unsubscribe_tokens_from_topic(self, tokens, topic) -> List[str]:
+        """Unsubscribe many tokens with one call per 1000 tokens; returns the tokens that failed"""
+        return self._manage_topic_bulk(self.transport.unsubscribe, tokens, topic, "unsubscribe")
+
+    def _manage_topic_bulk(self, call, tokens, topic, action) -> List[str]:
+        tokens = list(tokens)
+        failed = []
+        # FCM topic management accepts at most 1000 tokens per request
+        for i in range(0, len(tokens), 1000):
+            chunk = tokens[i:i + 1000]
+            try:
+                results = call(chunk, topic)
+            except Exception as e:
+                logger.error(f"Failed to {action} {len(chunk)} tokens for topic {topic}: {e}")
+                failed.extend(chunk)
+                continue
+            failed.extend(token for token, ok in zip(chunk, results) if not ok)
+        logger.info(f"{action.capitalize()}d {len(tokens) - len(failed)}/{len(tokens)} tokens for topic {topic}")
+        return failed
@@ -0,0 +1,40 @@
+"""
+Blocking waits for a camera's next frame.
+
+Producers publish a per-camera sequence number (the frame number) after each
+new frame: the capture thread for captured frames, the inference thread for
+processed results. A consumer remembers the last sequence it handled and
+blocks in ``wait_for_newer`` until a larger one is published, instead of
+waking on a timer to poll. Every camera has its own condition, so a publish
+only wakes that camera's waiters, and an idle camera's consumers stay
+asleep.
+"""
+import threading
+from typing import Optional
+
+
+class FrameSignal:
+    """Latest frame sequence number of one camera, with waits for a newer one"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.sequence = 0
+        self._interrupts = 0
+
+    def publish(self, sequence: int) -> None:
+        with self._cond:
+            self.sequence = sequence
+            self._cond.notify_all()
+
+    def wait_for_newer(self, after: int, timeout: Optional[float] = None) -> int:
+        """Block until the sequence exceeds ``after``, ``interrupt()`` or the timeout; returns the sequence"""
+        with self._cond:
+            interrupts = self._interrupts
+            self._cond.wait_for(lambda: self.sequence > after or self._interrupts != interrupts, timeout)
+            return self.sequence
+
+    def interrupt(self) -> None:
+        """Wake current waiters without a new frame, e.g. so they notice a stop flag"""
+        with self._cond:
+            self._interrupts += 1
+            self._cond.notify_all()
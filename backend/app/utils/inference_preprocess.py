@@ -0,0 +1,119 @@
+"""
+Inference preprocessing: letterboxing into a reused buffer and SAHI-style tiling.
+
+The model is handed an image that already has its input size, so the single
+resize happens here (from whatever frame the processor received) and the
+model's own letterbox step is a no-op. Tiling runs the model over overlapping
+native-resolution windows plus one full-frame pass so small, distant objects
+survive the downscale. The boxes are merged with class-aware NMS on
+intersection-over-smaller, as SAHI does, so a tiny box from the full-frame
+pass still merges with its tile box.
+"""
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+_STRIDE = 32
+_PAD_VALUE = 114
+
+
+class LetterboxBuffer:
+    """Resizes frames straight into a canvas that is reused between calls.
+
+    The canvas keeps the frame's aspect ratio with its long side at ``size``
+    and the short side padded up to a multiple of the model stride, which is
+    the same minimal-padding layout the model would pick itself.
+    """
+
+    def __init__(self, size: int = 640):
+        self.size = size
+        self._canvas: Optional[np.ndarray] = None
+        self._layout: Optional[Tuple[int, int, int, int, int]] = None
+
+    def __call__(self, frame: np.ndarray) -> Tuple[np.ndarray, float, Tuple[int, int]]:
+        """Return (canvas, scale, (pad_x, pad_y)); the canvas is overwritten on the next call"""
+        height, width = frame.shape[:2]
+        scale = min(self.size / height, self.size / width)
+        new_width, new_height = round(width * scale), round(height * scale)
+        canvas_width = -(-new_width // _STRIDE) * _STRIDE
+        canvas_height = -(-new_height // _STRIDE) * _STRIDE
+        pad_x = (canvas_width - new_width) // 2
+        pad_y = (canvas_height - new_height) // 2
+
+        layout = (new_width, new_height, pad_x, pad_y, frame.shape[2] if frame.ndim == 3 else 1)
+        if layout != self._layout:
+            shape = (canvas_height, canvas_width) + frame.shape[2:]
+            self._canvas = np.full(shape, _PAD_VALUE, dtype=frame.dtype)
+            self._layout = layout
+
+        target = self._canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width]
+        if (new_width, new_height) == (width, height):
+            target[...] = frame
+        else:
+            cv2.resize(frame, (new_width, new_height), dst=target, interpolation=cv2.INTER_LINEAR)
+        return self._canvas, scale, (pad_x, pad_y)
+
+    @staticmethod
+    def to_source(boxes: np.ndarray, scale: float, pad: Tuple[int, int]) -> np.ndarray:
+        """Map xyxy boxes on the canvas back onto the frame that was letterboxed"""
+        pad_x, pad_y = pad
+        return (boxes - np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)) / scale
+
+
+def tile_windows(height: int, width: int, tile: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """Cover the frame with tile x tile windows overlapping by ``overlap``.
+
+    Edge windows are shifted inward rather than shrunk so every tile has the
+    same shape and the whole set can run as one batch.
+    """
+    step = max(1, int(tile * (1.0 - overlap)))
+
+    def starts(length: int) -> List[int]:
+        if length <= tile:
+            return [0]
+        positions = list(range(0, length - tile, step))
+        positions.append(length - tile)
+        return positions
+
+    return [
+        (x0, y0, min(x0 + tile, width), min(y0 + tile, height))
+        for y0 in starts(height)
+        for x0 in starts(width)
+    ]
+
+
+def nms(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    class_ids: np.ndarray,
+    threshold: float,
+    metric: str = "iou",
+) -> np.ndarray:
+    """Class-aware non-maximum suppression; returns the indices to keep.
+
+    ``metric`` is "iou" (intersection over union) or "ios" (intersection over
+    the smaller box).
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Offsetting each class into its own coordinate range keeps classes apart
+    offsets = class_ids.astype(np.float32)[:, None] * (float(boxes.max()) + 1.0)
+    shifted = boxes.astype(np.float32) + offsets
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores)
+    keep = []
+    while order.size:
+        best = order[0]
+        keep.append(best)
+        rest = order[1:]
+        inter_w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        inter_h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = inter_w * inter_h
+        if metric == "ios":
+            overlap = inter / np.maximum(np.minimum(areas[best], areas[rest]), 1e-6)
+        else:
+            overlap = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-6)
+        order = rest[overlap < threshold]
+    return np.array(keep, dtype=np.int64)
@@ -0,0 +1,128 @@
+"""
+Per-camera inference statistics that API routes can read without locks.
+
+The processing thread is the only writer for its camera. Readers receive
+either immutable snapshots (``ResultSnapshot``) or plain dicts built from
+counters. A reader racing a writer may see a value one frame old, but it
+never blocks the pipeline or touches the frame queues.
+"""
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Bucket upper bounds in seconds: 0.1 ms to ~100 s in sqrt(2) steps
+_BUCKET_BOUNDS: Tuple[float, ...] = tuple(0.0001 * (2 ** (i / 2)) for i in range(40))
+
+STAGES = ("queue_wait", "preprocess", "inference", "postprocess")
+
+
+class RollingHistogram:
+    """Log-bucketed latency histogram over a sliding window of time slots"""
+
+    def __init__(self, window_seconds: float = 60.0, slots: int = 6):
+        self.slots = slots
+        self.slot_seconds = window_seconds / slots
+        self._counts: List[List[int]] = [[0] * (len(_BUCKET_BOUNDS) + 1) for _ in range(slots)]
+        self._sums = [0.0] * slots
+        self._maxima = [0.0] * slots
+        self._slot_ids = [-1] * slots
+
+    def record(self, seconds: float, now: Optional[float] = None) -> None:
+        slot_id = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        index = slot_id % self.slots
+        if self._slot_ids[index] != slot_id:
+            # Swap in fresh objects so a concurrent reader sees old or new, never half-cleared
+            self._counts[index] = [0] * (len(_BUCKET_BOUNDS) + 1)
+            self._sums[index] = 0.0
+            self._maxima[index] = 0.0
+            self._slot_ids[index] = slot_id
+        self._counts[index][bisect_left(_BUCKET_BOUNDS, seconds)] += 1
+        self._sums[index] += seconds
+        if seconds > self._maxima[index]:
+            self._maxima[index] = seconds
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, float]:
+        """Count, mean and bucketed percentiles (in ms) over the window"""
+        current = int((time.monotonic() if now is None else now) // self.slot_seconds)
+        totals = [0] * (len(_BUCKET_BOUNDS) + 1)
+        count, total, maximum = 0, 0.0, 0.0
+        for index in range(self.slots):
+            if current - self._slot_ids[index] >= self.slots:
+                continue
+            counts = self._counts[index]
+            for bucket, value in enumerate(counts):
+                totals[bucket] += value
+            count += sum(counts)
+            total += self._sums[index]
+            maximum = max(maximum, self._maxima[index])
+
+        result = {"count": count, "mean_ms": 0.0, "p50_ms": 0.0, "p90_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        if count == 0:
+            return result
+        result["mean_ms"] = round(total / count * 1000, 2)
+        result["max_ms"] = round(maximum * 1000, 2)
+        for key, fraction in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99)):
+            rank = fraction * count
+            seen = 0
+            for bucket, value in enumerate(totals):
+                seen += value
+                if seen >= rank:
+                    bound = _BUCKET_BOUNDS[bucket] if bucket < len(_BUCKET_BOUNDS) else maximum
+                    result[key] = round(min(bound, maximum) * 1000, 2)
+                    break
+        return result
+
+
+class StageTimings:
+    """Rolling histograms for each stage of one camera's processing loop"""
+
+    def __init__(self, window_seconds: float = 60.0):
+        self.histograms = {stage: RollingHistogram(window_seconds) for stage in STAGES}
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.histograms[stage].record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        now = time.monotonic()
+        return {stage: histogram.snapshot(now) for stage, histogram in self.histograms.items()}
+
+
+@dataclass(frozen=True)
+class ResultSnapshot:
+    """JSON-ready copy of a camera's most recent processed frame"""
+    camera_id: Any
+    frame_number: int
+    timestamp: float
+    processed_at: float
+    detections: Tuple[Dict[str, Any], ...]
+
+    @classmethod
+    def from_frame(cls, frame_data, processed_at: float) -> "ResultSnapshot":
+        detections = tuple(
+            {
+                "box": [int(v) for v in detection["box"]],
+                "conf": round(float(detection["conf"]), 4),
+                "cls": int(detection["cls"]),
+                "name": detection["name"],
+                "track_id": detection.get("track_id"),
+            }
+            for detection in frame_data.detections
+        )
+        return cls(
+            camera_id=frame_data.camera_id,
+            frame_number=frame_data.frame_number,
+            timestamp=frame_data.timestamp,
+            processed_at=processed_at,
+            detections=detections,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "camera_id": str(self.camera_id),
+            "timestamp": datetime.fromtimestamp(self.timestamp).isoformat(),
+            "frame_number": self.frame_number,
+            "latency_ms": round((self.processed_at - self.timestamp) * 1000, 1),
+            "detections": list(self.detections),
+        }
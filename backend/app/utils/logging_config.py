@@ -0,0 +1,173 @@
+"""
+Non-blocking, rate-limited, structured logging for the whole process.
+
+``setup_logging()`` installs one ``QueueHandler`` on the root logger. A
+thread logging a message pays for formatting its arguments and one
+``put_nowait``. A ``QueueListener`` thread then serializes records (JSON
+lines or plain text) and writes them to stdout. If the queue is full, the
+record is dropped and counted; the caller never blocks on I/O.
+
+Before a record reaches the queue, ``RateLimitFilter`` throttles repeats of
+the same message key. The key defaults to the call site plus the record's
+``camera_id``, so one dead camera cannot drown out another; a call can set
+its own key with ``extra={"rate_key": ...}``. Each key may log ``burst``
+records, then one per ``interval``. The next record let through for a key
+reports how many were suppressed.
+"""
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..Settings import settings
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per message key"""
+
+    def __init__(self, interval: float, burst: int, max_keys: int = 4096):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> (tokens, last refill, suppressed since last emitted record)
+        self._buckets: Dict[Hashable, Tuple[float, float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.interval <= 0:
+            return True
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            key = (record.pathname, record.lineno, getattr(record, "camera_id", None))
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (float(self.burst), now, 0))
+            tokens = min(float(self.burst), tokens + (now - last) / self.interval)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._buckets.clear()
+            self._buckets[key] = (tokens - 1.0, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and key != "rate_key":
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with ``extra`` fields appended as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(threadName)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = [
+            f"{key}={value}"
+            for key, value in record.__dict__.items()
+            if key not in _RESERVED_ATTRS and key != "rate_key"
+        ]
+        return f"{line} {' '.join(fields)}" if fields else line
+
+
+_traceback_formatter = logging.Formatter()
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of raising when the queue is full"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, since they may change before the listener runs,
+        # but leave the traceback in exc_text so formatters can keep it separate
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[_DroppingQueueHandler] = None
+
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    rate_limit_seconds: float = settings.LOG_RATE_LIMIT_SECONDS,
+    rate_limit_burst: int = settings.LOG_RATE_LIMIT_BURST,
+    queue_size: int = settings.LOG_QUEUE_SIZE,
+) -> None:
+    """Route the root logger through a bounded queue to a background writer (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+    _queue_handler = _DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(rate_limit_seconds, rate_limit_burst))
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_queue_handler)
+    if _queue_handler.dropped:
+        print(f"Logging queue overflowed; {_queue_handler.dropped} records were dropped", file=sys.stderr)
+    _listener = None
+    _queue_handler = None
@@ -0,0 +1,160 @@
+"""
+In-process cache of camera and zone metadata so the capture, detection and
+alert hot paths do not open a database session just to resolve a name.
+
+The camera and zone CRUD routes invalidate entries after every write.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Generic, Iterable, Optional, Type, TypeVar
+
+from sqlalchemy.orm import Session
+
+from ..core.database.connection import SessionLocal
+from ..core.models import Camera, Zone
+
+
+def _freeze_polygons(polygons) -> Optional[tuple]:
+    if not polygons:
+        return None
+    return tuple(tuple((float(x), float(y)) for x, y in polygon) for polygon in polygons)
+
+
+@dataclass(frozen=True)
+class CameraSnapshot:
+    """Immutable copy of the camera columns the pipeline reads"""
+    id: int
+    name: Optional[str]
+    url: str
+    zone_id: Optional[int]
+    location: Optional[str]
+    enabled: bool
+    fps_target: int
+    resolution: tuple
+    last_active: Optional[datetime]
+    roi_polygons: Optional[tuple] = None
+
+    @property
+    def display_name(self) -> str:
+        return self.name or f"Camera {self.id}"
+
+    @classmethod
+    def from_model(cls, camera: Camera) -> "CameraSnapshot":
+        return cls(
+            id=camera.id,
+            name=camera.name,
+            url=camera.url,
+            zone_id=camera.zone_id,
+            location=camera.location,
+            enabled=bool(camera.enabled),
+            fps_target=camera.fps_target,
+            resolution=(camera.resolution_width, camera.resolution_height),
+            last_active=camera.last_active,
+            roi_polygons=_freeze_polygons(camera.roi_polygons),
+        )
+
+
+@dataclass(frozen=True)
+class ZoneSnapshot:
+    """Immutable copy of a zone row"""
+    id: int
+    name: str
+    description: Optional[str]
+
+    @classmethod
+    def from_model(cls, zone: Zone) -> "ZoneSnapshot":
+        return cls(id=zone.id, name=zone.name, description=zone.description)
+
+
+SnapshotType = TypeVar("SnapshotType", CameraSnapshot, ZoneSnapshot)
+
+
+class MetadataCache(Generic[SnapshotType]):
+    """Read-through cache of immutable snapshots keyed by primary key"""
+
+    def __init__(
+        self,
+        model,
+        snapshot_type: Type[SnapshotType],
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self._model = model
+        self._snapshot_type = snapshot_type
+        self._session_factory = session_factory
+        self._entries: Dict[int, SnapshotType] = {}
+        self._missing: set = set()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: int) -> Optional[SnapshotType]:
+        """Return the cached entry, loading it from the database on a miss"""
+        key = int(key)
+        snapshot = self._entries.get(key)
+        if snapshot is not None or key in self._missing:
+            return snapshot
+
+        generation = self._generation
+        with self._session_factory() as db:
+            row = db.query(self._model).filter(self._model.id == key).first()
+            snapshot = self._snapshot_type.from_model(row) if row else None
+
+        with self._lock:
+            if generation != self._generation:
+                # Invalidated while loading; return the fresh row without caching it
+                return snapshot
+            if snapshot is None:
+                self._missing.add(key)
+            else:
+                self._entries[key] = snapshot
+                self._missing.discard(key)
+        return snapshot
+
+    def exists(self, key: int) -> bool:
+        return self.get(key) is not None
+
+    def prime(self, rows: Iterable) -> None:
+        """Seed the cache from rows that were already loaded"""
+        with self._lock:
+            for row in rows:
+                self._entries[row.id] = self._snapshot_type.from_model(row)
+                self._missing.discard(row.id)
+
+    def invalidate(self, key: Optional[int] = None) -> None:
+        """Drop one entry (or every entry) so the next read reloads it"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+                self._missing.clear()
+            else:
+                self._entries.pop(int(key), None)
+                self._missing.discard(int(key))
+
+
+class CameraCache(MetadataCache[CameraSnapshot]):
+    """Read-through cache of CameraSnapshot keyed by camera id"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        super().__init__(Camera, CameraSnapshot, session_factory)
+
+    def display_name(self, camera_id: int) -> str:
+        snapshot = self.get(camera_id)
+        return snapshot.display_name if snapshot else f"Camera {camera_id}"
+
+
+class ZoneCache(MetadataCache[ZoneSnapshot]):
+    """Read-through cache of ZoneSnapshot keyed by zone id"""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        super().__init__(Zone, ZoneSnapshot, session_factory)
+
+    def zone_for_camera(self, camera_id: int) -> Optional[ZoneSnapshot]:
+        camera = camera_cache.get(camera_id)
+        if camera is None or camera.zone_id is None:
+            return None
+        return self.get(camera.zone_id)
+
+
+camera_cache = CameraCache()
+zone_cache = ZoneCache()
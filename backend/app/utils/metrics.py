@@ -0,0 +1,151 @@
+"""
+Prometheus metrics for capture, inference, storage and WebRTC.
+
+Hot paths only increment counters or observe histograms, and callers bind
+each camera's labelled child once outside their loop, so a frame costs one
+locked add. Values that already live in service state (buffer depth,
+inference fps, open peers, pending writes) are not mirrored on every change;
+registered gauge callbacks read them when Prometheus scrapes ``/metrics``.
+
+``prometheus-client`` ships with the ``production`` extra. Without it (or
+with METRICS_ENABLED off) every metric is a no-op and ``/metrics`` reports
+that metrics are unavailable.
+"""
+import logging
+from typing import Callable, Dict, Iterable, Mapping, Optional, Tuple, Union
+
+from ..Settings import settings
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # pragma: no cover - depends on the installed extras
+    REGISTRY = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = settings.METRICS_ENABLED and REGISTRY is not None
+
+GaugeValues = Union[float, Mapping[object, float]]
+
+# Seconds; spans a fast DB flush up to a slow model call on CPU
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NoopMetric:
+    """Stands in for every metric when Prometheus is unavailable"""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+
+class _CallbackCollector:
+    """Builds gauges from registered callbacks at scrape time"""
+
+    def __init__(self):
+        self.gauges: Dict[str, Tuple[str, Optional[str], Callable[[], GaugeValues]]] = {}
+
+    def collect(self) -> Iterable["GaugeMetricFamily"]:
+        for name, (documentation, label, callback) in list(self.gauges.items()):
+            try:
+                values = callback()
+            except Exception as e:
+                logger.warning(f"Metric callback for {name} failed: {e}")
+                continue
+            if label is None:
+                yield GaugeMetricFamily(name, documentation, value=float(values))
+                continue
+            family = GaugeMetricFamily(name, documentation, labels=[label])
+            for key, value in values.items():
+                family.add_metric([str(key)], float(value))
+            yield family
+
+
+_collector = _CallbackCollector()
+
+
+def _counter(name: str, documentation: str, labels: Tuple[str, ...] = ()):
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    return Counter(name, documentation, labels)
+
+
+def _histogram(name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=_LATENCY_BUCKETS):
+    if not METRICS_ENABLED:
+        return _NoopMetric()
+    return Histogram(name, documentation, labels, buckets=buckets)
+
+
+if METRICS_ENABLED:
+    REGISTRY.register(_collector)
+
+
+def register_gauge(
+    name: str,
+    documentation: str,
+    callback: Callable[[], GaugeValues],
+    label: Optional[str] = None,
+) -> None:
+    """Expose a gauge read from ``callback`` on every scrape.
+
+    With ``label`` the callback returns a mapping of label value to gauge
+    value (e.g. camera id to buffer depth); otherwise a single number.
+    Registering a name again replaces its callback.
+    """
+    _collector.gauges[name] = (documentation, label, callback)
+
+
+def render() -> Tuple[bytes, str]:
+    """Serialize every registered metric in the Prometheus text format"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+# Capture
+capture_frames = _counter(
+    "nexguard_capture_frames_total", "Frames read from each camera; rate() gives capture fps", ("camera",)
+)
+capture_decode_failures = _counter(
+    "nexguard_capture_decode_failures_total", "Failed frame reads per camera", ("camera",)
+)
+capture_buffer_drops = _counter(
+    "nexguard_capture_buffer_drops_total", "Frames discarded because the camera buffer was full", ("camera",)
+)
+capture_reconnects = _counter(
+    "nexguard_capture_reconnects_total", "Times a camera stream was reopened after failing", ("camera",)
+)
+
+# Inference
+inference_latency = _histogram(
+    "nexguard_inference_latency_seconds", "Model call duration per frame", ("camera",)
+)
+frame_latency = _histogram(
+    "nexguard_frame_latency_seconds", "Capture-to-published-results latency per frame", ("camera",)
+)
+detections = _counter(
+    "nexguard_detections_total", "Detection events opened", ("camera", "type")
+)
+
+# Alerts
+alerts_sent = _counter("nexguard_alerts_sent_total", "Alerts delivered", ("topic",))
+alerts_dropped = _counter("nexguard_alerts_dropped_total", "Alerts dropped after exhausting retries", ("topic",))
+
+# Storage
+db_write_latency = _histogram(
+    "nexguard_db_write_seconds", "Duration of one batched detection/media transaction"
+)
+db_write_rows = _counter(
+    "nexguard_db_write_rows_total", "Rows written by the batched detection writer", ("kind",)
+)
+cleanup_duration = _histogram(
+    "nexguard_cleanup_duration_seconds", "Duration of one retention cleanup run",
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+)
+cleanup_removed = _counter(
+    "nexguard_cleanup_removed_total", "Records and files removed by retention cleanup", ("kind",)
+)
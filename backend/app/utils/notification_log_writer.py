@@ -0,0 +1,45 @@
+"""
+Buffered writer for notification_logs rows.
+
+Alerts enqueue their log entry and move on; a background thread inserts
+everything that arrived within the flush window with a single statement.
+"""
+import logging
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..core.database.connection import SessionLocal
+from ..core.models import NotificationLog
+from ..Settings import settings
+from .batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationLogWriter(BatchWriter[Dict[str, Any]]):
+    """Groups notification log inserts into one transaction per flush window"""
+
+    thread_name = "notification-log-writer"
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        flush_interval_ms: int = settings.NOTIFICATION_LOG_FLUSH_INTERVAL_MS,
+        max_batch_size: int = settings.DETECTION_FLUSH_MAX_BATCH,
+    ):
+        super().__init__(session_factory, flush_interval_ms, max_batch_size)
+
+    def submit(self, row: Dict[str, Any]) -> None:
+        """Queue a notification_logs row given as column -> value"""
+        self._enqueue(row)
+
+    def _write_batch(self, rows: List[Dict[str, Any]]) -> None:
+        try:
+            with self._session_factory() as db:
+                db.execute(insert(NotificationLog), rows)
+                db.commit()
+            logger.debug(f"Flushed {len(rows)} notification log rows")
+        except Exception as e:
+            logger.error(f"Failed to write {len(rows)} notification log rows: {e}")
@@ -0,0 +1,147 @@
+"""
+Opt-in hot-path span timers and a time-boxed sampling profiler.
+
+``spans.span(name)`` wraps a pipeline step (stream read, resize, model call,
+imwrite, ...). While spans are disabled it hands back one shared no-op
+context manager, so an instrumented step costs a method call. Once enabled,
+every span records its duration into a rolling histogram. Those histograms
+are read through the admin profiling endpoints.
+
+``sample_stacks`` is a py-spy style sampler written in pure Python. At a
+fixed interval it snapshots the stack of every thread through
+``sys._current_frames()`` and counts identical stacks. The result is in the
+collapsed format ("thread;outer;...;inner count") that flamegraph.pl,
+speedscope and inferno read directly. Only the sampler thread does any work:
+the profiled threads run without hooks.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Tuple
+
+from .inference_stats import RollingHistogram
+from ..Settings import settings
+
+_MAX_STACK_DEPTH = 128
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "started")
+
+    def __init__(self, recorder: "SpanRecorder", name: str):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class SpanRecorder:
+    """Collects span durations per name while enabled"""
+
+    def __init__(self, enabled: bool = settings.PROFILING_SPANS_ENABLED, window_seconds: float = 60.0):
+        self.enabled = enabled
+        self.window_seconds = window_seconds
+        self._histograms: Dict[str, RollingHistogram] = {}
+        # Several capture/processing threads share span names
+        self._lock = threading.Lock()
+
+    def span(self, name: str):
+        """Context manager timing the enclosed block as ``name``"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = RollingHistogram(self.window_seconds)
+            histogram.record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        now = time.monotonic()
+        with self._lock:
+            return {name: histogram.snapshot(now) for name, histogram in sorted(self._histograms.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms = {}
+
+
+spans = SpanRecorder()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a sampling run is requested while another is in progress"""
+
+
+_sampling_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    # The last two path components keep package __init__.py files apart
+    path = os.path.join(*code.co_filename.replace("\\", "/").split("/")[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def sample_stacks(duration: float, interval: float = 0.01) -> Tuple[str, int]:
+    """Sample every thread's stack for ``duration`` seconds.
+
+    Returns (collapsed stack text, number of sampling rounds). Raises
+    ProfilerBusyError if a run is already in progress.
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profiling run is already in progress")
+    try:
+        duration = min(max(duration, interval), settings.PROFILING_MAX_SAMPLE_SECONDS)
+        own_ident = threading.get_ident()
+        counts: Counter = Counter()
+        rounds = 0
+        deadline = time.monotonic() + duration
+        next_sample = time.monotonic()
+        while next_sample < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < _MAX_STACK_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                counts[";".join(reversed(stack))] += 1
+            rounds += 1
+            next_sample += interval
+            delay = next_sample - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Walking the stacks took longer than the interval; don't try to catch up
+                next_sample = time.monotonic()
+    finally:
+        _sampling_lock.release()
+
+    lines = [f"{stack} {count}" for stack, count in counts.most_common()]
+    return "\n".join(lines) + ("\n" if lines else ""), rounds
@@ -0,0 +1,173 @@
+"""
+Adaptive inference rate controller shared by the per-camera processing threads.
+
+Every camera reports how long its frames took from capture to published
+results. Once per control interval the controller measures that latency and
+the process's CPU use. It then adjusts one global fps budget (additive
+increase, multiplicative decrease against the latency SLO and CPU target)
+and splits the budget between cameras: cameras with recent detections get
+``active_weight`` times the share of quiet ones. Every camera keeps at least
+``min_fps`` and never exceeds its own fps_target.
+"""
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Union
+
+from ..Settings import settings
+
+CameraId = Union[int, str]
+
+_EWMA_ALPHA = 0.2
+
+
+@dataclass
+class CameraRate:
+    max_fps: float
+    budget_fps: float
+    latency: float = 0.0
+    inference_time: float = 0.0
+    last_activity: float = -math.inf
+    next_due: float = 0.0
+
+
+class InferenceRateController:
+    """Assigns each camera an inference fps budget"""
+
+    def __init__(
+        self,
+        latency_slo_ms: float = settings.INFERENCE_LATENCY_SLO_MS,
+        cpu_target: float = settings.INFERENCE_CPU_TARGET,
+        min_fps: float = settings.INFERENCE_MIN_FPS,
+        active_weight: float = settings.INFERENCE_ACTIVE_WEIGHT,
+        activity_window: float = settings.INFERENCE_ACTIVITY_WINDOW_SECONDS,
+        interval: float = settings.INFERENCE_CONTROL_INTERVAL_SECONDS,
+    ):
+        self.latency_slo = latency_slo_ms / 1000
+        self.cpu_target = cpu_target
+        self.min_fps = min_fps
+        self.active_weight = active_weight
+        self.activity_window = activity_window
+        self.interval = interval
+
+        self.cameras: Dict[CameraId, CameraRate] = {}
+        self.total_budget: Optional[float] = None
+        self.cpu_load = 0.0
+        self._cpu_count = os.cpu_count() or 1
+        self._last_rebalance = time.time()
+        self._last_cpu_time = time.process_time()
+        self._lock = threading.Lock()
+
+    def register(self, camera_id: CameraId, max_fps: float) -> None:
+        with self._lock:
+            self.cameras[camera_id] = CameraRate(max_fps=float(max_fps), budget_fps=float(max_fps))
+            if self.total_budget is not None:
+                self.total_budget += max_fps
+            self._allocate(time.time())
+
+    def unregister(self, camera_id: CameraId) -> None:
+        with self._lock:
+            rate = self.cameras.pop(camera_id, None)
+            if rate is not None and self.total_budget is not None:
+                self.total_budget = max(self.total_budget - rate.budget_fps, 0.0)
+            self._allocate(time.time())
+
+    def delay(self, camera_id: CameraId, now: float) -> float:
+        """Seconds until the camera may run inference again (0 means now)"""
+        rate = self.cameras.get(camera_id)
+        if rate is None:
+            return 0.0
+        return max(rate.next_due - now, 0.0)
+
+    def report(
+        self,
+        camera_id: CameraId,
+        frame_timestamp: float,
+        started: float,
+        finished: float,
+        detections: int,
+    ) -> None:
+        """Record one processed frame and schedule the camera's next slot"""
+        rate = self.cameras.get(camera_id)
+        if rate is None:
+            return
+        rate.latency += _EWMA_ALPHA * ((finished - frame_timestamp) - rate.latency)
+        rate.inference_time += _EWMA_ALPHA * ((finished - started) - rate.inference_time)
+        if detections:
+            rate.last_activity = finished
+        rate.next_due = started + 1.0 / rate.budget_fps
+
+        if finished - self._last_rebalance >= self.interval:
+            with self._lock:
+                if finished - self._last_rebalance >= self.interval:
+                    self._rebalance(finished)
+
+    def stats(self, camera_id: CameraId) -> Dict[str, Any]:
+        """Controller decision for one camera, merged into processing_stats"""
+        rate = self.cameras.get(camera_id)
+        if rate is None:
+            return {}
+        return {
+            "target_fps": round(rate.budget_fps, 2),
+            "latency_ms": round(rate.latency * 1000, 1),
+            "inference_ms": round(rate.inference_time * 1000, 1),
+            "active": self._is_active(rate, time.time()),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_fps_budget": round(self.total_budget or 0.0, 2),
+            "cpu_load": round(self.cpu_load, 3),
+            "latency_slo_ms": self.latency_slo * 1000,
+            "cameras": len(self.cameras),
+        }
+
+    def _is_active(self, rate: CameraRate, now: float) -> bool:
+        return now - rate.last_activity <= self.activity_window
+
+    def _rebalance(self, now: float) -> None:
+        cpu_time = time.process_time()
+        elapsed = max(now - self._last_rebalance, 1e-6)
+        self.cpu_load = (cpu_time - self._last_cpu_time) / (elapsed * self._cpu_count)
+        self._last_cpu_time = cpu_time
+        self._last_rebalance = now
+
+        if not self.cameras:
+            return
+        capacity = sum(rate.max_fps for rate in self.cameras.values())
+        floor = self.min_fps * len(self.cameras)
+        total = capacity if self.total_budget is None else self.total_budget
+        worst_latency = max(rate.latency for rate in self.cameras.values())
+
+        if worst_latency > self.latency_slo or self.cpu_load > self.cpu_target:
+            total *= 0.75
+        elif worst_latency < 0.7 * self.latency_slo and self.cpu_load < 0.9 * self.cpu_target:
+            total += max(1.0, 0.1 * total)
+        self.total_budget = min(max(total, floor), capacity)
+        self._allocate(now)
+
+    def _allocate(self, now: float) -> None:
+        """Split the global budget by activity weight, respecting each camera's min/max"""
+        if self.total_budget is None:
+            return
+        pending = {
+            camera_id: (self.active_weight if self._is_active(rate, now) else 1.0)
+            for camera_id, rate in self.cameras.items()
+        }
+        budget = self.total_budget
+        while pending:
+            weight_sum = sum(pending.values())
+            for camera_id, weight in pending.items():
+                rate = self.cameras[camera_id]
+                share = budget * weight / weight_sum
+                if share <= self.min_fps or share >= rate.max_fps:
+                    rate.budget_fps = min(max(share, self.min_fps), rate.max_fps)
+                    budget -= rate.budget_fps
+                    del pending[camera_id]
+                    break
+            else:
+                for camera_id, weight in pending.items():
+                    self.cameras[camera_id].budget_fps = budget * weight / weight_sum
+                return
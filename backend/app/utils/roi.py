@@ -0,0 +1,98 @@
+"""
+Per-camera region-of-interest masks.
+
+Each camera may store ROI polygons in normalized coordinates. For a given
+frame size they are rasterized once into a mask plus the bounding box of all
+polygons; the processor crops frames to that box before inference and drops
+detections whose ground point falls outside the mask.
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .metadata_cache import camera_cache
+
+
+class RegionOfInterest:
+    """Crop box and rasterized mask for one set of polygons at one frame size"""
+
+    def __init__(self, polygons: tuple, frame_shape: Tuple[int, ...]):
+        height, width = frame_shape[:2]
+        self.polygons = polygons
+        self.shape = (height, width)
+
+        scale = np.array([width - 1, height - 1], dtype=np.float32)
+        points = [
+            np.round(np.asarray(polygon, dtype=np.float32) * scale).astype(np.int32)
+            for polygon in polygons
+        ]
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, points, 1)
+
+        stacked = np.concatenate(points)
+        self.x0 = max(int(stacked[:, 0].min()), 0)
+        self.y0 = max(int(stacked[:, 1].min()), 0)
+        self.x1 = min(int(stacked[:, 0].max()) + 1, width)
+        self.y1 = min(int(stacked[:, 1].max()) + 1, height)
+        self.offset = np.array([self.x0, self.y0, self.x0, self.y0], dtype=np.int32)
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """Return a view of the frame limited to the ROI bounding box"""
+        return frame[self.y0:self.y1, self.x0:self.x1]
+
+    def to_frame(self, boxes: np.ndarray) -> np.ndarray:
+        """Shift xyxy boxes predicted on the crop back into frame coordinates"""
+        return boxes + self.offset
+
+    def contains(self, boxes: np.ndarray) -> np.ndarray:
+        """Boolean mask of boxes whose bottom-centre point lies inside a polygon.
+
+        The bottom centre approximates where an object touches the ground, which
+        is what an area drawn on the floor is meant to capture.
+        """
+        if len(boxes) == 0:
+            return np.zeros(0, dtype=bool)
+        height, width = self.shape
+        xs = np.clip((boxes[:, 0] + boxes[:, 2]) // 2, 0, width - 1)
+        ys = np.clip(boxes[:, 3], 0, height - 1)
+        return self.mask[ys, xs].astype(bool)
+
+
+class RoiMaskCache:
+    """Builds RegionOfInterest objects lazily and rebuilds them when the camera changes"""
+
+    def __init__(self):
+        self._entries: Dict[int, RegionOfInterest] = {}
+        self._lock = threading.Lock()
+
+    def get(self, camera_id: int, frame_shape: Tuple[int, ...]) -> Optional[RegionOfInterest]:
+        """Return the ROI for a camera at this frame size, or None when it has none"""
+        camera_id = int(camera_id)
+        snapshot = camera_cache.get(camera_id)
+        polygons = snapshot.roi_polygons if snapshot else None
+        if not polygons:
+            if camera_id in self._entries:
+                with self._lock:
+                    self._entries.pop(camera_id, None)
+            return None
+
+        roi = self._entries.get(camera_id)
+        if roi is not None and roi.polygons == polygons and roi.shape == tuple(frame_shape[:2]):
+            return roi
+
+        roi = RegionOfInterest(polygons, frame_shape)
+        with self._lock:
+            self._entries[camera_id] = roi
+        return roi
+
+    def invalidate(self, camera_id: Optional[int] = None) -> None:
+        with self._lock:
+            if camera_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(int(camera_id), None)
+
+
+roi_masks = RoiMaskCache()
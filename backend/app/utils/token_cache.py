@@ -0,0 +1,95 @@
+"""
+Bounded TTL cache mapping verified JWTs to user snapshots.
+
+Lets AuthMiddleware skip both the JWT decode and the users query for tokens it
+has already seen. Entries are keyed on a hash of the whole token, so only the
+exact token that passed verification can hit. Entries never outlive the
+token's own expiry, and the auth service drops a user's entries whenever
+their status, role, account or last login changes.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from ..schema.user import UserResponse
+from ..Settings import settings
+
+
+class TokenUserCache:
+    """LRU cache of token hash -> (UserResponse, expires_at)"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.AUTH_CACHE_TTL_SECONDS,
+        max_entries: int = settings.AUTH_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[UserResponse, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """Digest of the full token; header and claims must match too, not just the signature"""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[UserResponse]:
+        if self.ttl_seconds <= 0:
+            return None
+        key = self.digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def put(self, token: str, user: UserResponse, token_expires_at: Optional[float] = None) -> None:
+        """Cache a verified user; token_expires_at is the JWT exp claim (epoch seconds)"""
+        if self.ttl_seconds <= 0:
+            return
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+            if ttl <= 0:
+                return
+
+        key = self.digest(token)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (user, time.monotonic() + ttl)
+            self._by_user.setdefault(user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached token belonging to a user"""
+        with self._lock:
+            for key in list(self._by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry[0].id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry[0].id]
+
+
+token_user_cache = TokenUserCache()
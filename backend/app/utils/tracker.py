@@ -0,0 +1,170 @@
+"""
+Lightweight multi-object tracker for the per-camera inference threads.
+
+A ByteTrack-style association on top of SORT's constant-velocity boxes, using
+greedy IoU matching in numpy instead of a Kalman filter and Hungarian solver:
+
+1. Existing tracks are moved forward by their last velocity.
+2. High-confidence boxes (at or above the detection threshold) are matched
+   to every track.
+3. Low-confidence boxes may only extend tracks left unmatched by step 2, so a
+   briefly occluded person keeps their id without low scores spawning tracks.
+   The model runs at TRACK_LOW_CONFIDENCE while tracking to supply them.
+4. Unmatched high-confidence boxes start tentative tracks, which get confirmed
+   after ``min_hits`` consecutive matches.
+
+Tracks are dropped after ``max_age`` seconds without a match and reported as
+ended so the detection manager can close their events.
+"""
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..Settings import settings
+
+
+@dataclass
+class Track:
+    track_id: int
+    class_id: int
+    box: np.ndarray
+    last_seen: float
+    velocity: np.ndarray = field(default_factory=lambda: np.zeros(4, dtype=np.float32))
+    hits: int = 1
+    confirmed: bool = False
+
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two xyxy box arrays"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+    a = boxes_a[:, None, :]
+    b = boxes_b[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def _greedy_match(iou: np.ndarray, threshold: float) -> List[Tuple[int, int]]:
+    """Pick the highest-IoU pairs first; good enough for the handful of boxes per frame"""
+    pairs = []
+    if iou.size == 0:
+        return pairs
+    iou = iou.copy()
+    while True:
+        row, col = np.unravel_index(np.argmax(iou), iou.shape)
+        if iou[row, col] < threshold:
+            return pairs
+        pairs.append((int(row), int(col)))
+        iou[row, :] = -1
+        iou[:, col] = -1
+
+
+class ObjectTracker:
+    """Assigns stable ids to boxes of one camera across frames"""
+
+    def __init__(
+        self,
+        iou_threshold: float = settings.TRACK_IOU_THRESHOLD,
+        high_confidence: float = settings.MIN_CONFIDENCE,
+        min_hits: int = settings.TRACK_MIN_HITS,
+        max_age: float = settings.TRACK_MAX_AGE_SECONDS,
+    ):
+        self.iou_threshold = iou_threshold
+        self.high_confidence = high_confidence
+        self.min_hits = min_hits
+        self.max_age = max_age
+        self.tracks: List[Track] = []
+        self._next_id = 1
+
+    def update(
+        self,
+        boxes: np.ndarray,
+        confidences: np.ndarray,
+        class_ids: np.ndarray,
+        timestamp: float,
+    ) -> Tuple[List[Optional[int]], List[int]]:
+        """Associate this frame's boxes with tracks.
+
+        Returns the confirmed track id for every box (None while a track is
+        still tentative or the box was not kept) and the ids of confirmed
+        tracks that ended on this frame.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        confidences = np.asarray(confidences, dtype=np.float32).reshape(-1)
+        class_ids = np.asarray(class_ids).reshape(-1)
+        assigned: List[Optional[int]] = [None] * len(boxes)
+
+        predicted = np.array([t.box + t.velocity for t in self.tracks], dtype=np.float32).reshape(-1, 4)
+        unmatched_tracks = list(range(len(self.tracks)))
+        matched_boxes = set()
+
+        high = np.flatnonzero(confidences >= self.high_confidence)
+        low = np.flatnonzero(confidences < self.high_confidence)
+        for candidates in (high, low):
+            if len(candidates) == 0 or not unmatched_tracks:
+                continue
+            iou = iou_matrix(predicted[unmatched_tracks], boxes[candidates])
+            # Never associate boxes of different classes
+            track_classes = np.array([self.tracks[i].class_id for i in unmatched_tracks])
+            iou[track_classes[:, None] != class_ids[candidates][None, :]] = 0
+            used_tracks = set()
+            for row, col in _greedy_match(iou, self.iou_threshold):
+                track_index = unmatched_tracks[row]
+                box_index = int(candidates[col])
+                self._refresh(self.tracks[track_index], boxes[box_index], timestamp)
+                matched_boxes.add(box_index)
+                used_tracks.add(track_index)
+                if self.tracks[track_index].confirmed:
+                    assigned[box_index] = self.tracks[track_index].track_id
+            unmatched_tracks = [i for i in unmatched_tracks if i not in used_tracks]
+
+        # A miss restarts a tentative track's streak, so confirmation needs consecutive matches
+        for track_index in unmatched_tracks:
+            if not self.tracks[track_index].confirmed:
+                self.tracks[track_index].hits = 0
+
+        for box_index in high:
+            if int(box_index) in matched_boxes:
+                continue
+            track = Track(
+                track_id=self._next_id,
+                class_id=int(class_ids[box_index]),
+                box=boxes[box_index].copy(),
+                last_seen=timestamp,
+                confirmed=self.min_hits <= 1,
+            )
+            self._next_id += 1
+            self.tracks.append(track)
+            if track.confirmed:
+                assigned[int(box_index)] = track.track_id
+
+        ended = []
+        alive = []
+        for track in self.tracks:
+            if timestamp - track.last_seen > self.max_age:
+                if track.confirmed:
+                    ended.append(track.track_id)
+            else:
+                alive.append(track)
+        self.tracks = alive
+        return assigned, ended
+
+    def reset(self) -> List[int]:
+        """Drop every track and return the confirmed ids that were still open"""
+        ended = [t.track_id for t in self.tracks if t.confirmed]
+        self.tracks = []
+        return ended
+
+    def _refresh(self, track: Track, box: np.ndarray, timestamp: float) -> None:
+        # Smoothed per-frame displacement used to predict the next position
+        track.velocity = 0.5 * track.velocity + 0.5 * (box - track.box)
+        track.box = box.copy()
+        track.last_seen = timestamp
+        track.hits += 1
+        if track.hits >= self.min_hits:
+            track.confirmed = True
@@ -0,0 +1,136 @@
+"""
+Alert fan-out throughput benchmark.
+
+Starts a local HTTP stand-in for FCM (configurable latency and per-token
+failure rate), points Firebase_FCM_Service at it through HTTPTransport and
+fires alerts from several sender threads. Reports alerts/s and per-alert
+latency for serial chunk dispatch versus parallel chunk dispatch. No network
+access or Firebase credentials are needed.
+
+Usage:
+    python -m scripts.bench_alert_throughput --tokens 2000 --latency-ms 40 --duration 10
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from backend.app.utils.firebase_fcm_service import Firebase_FCM_Service, HTTPTransport
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _make_handler(latency_s, failure_rate):
+    class FakeFCMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            if latency_s:
+                time.sleep(latency_s)
+            if "condition" in request:
+                body = json.dumps({"name": "projects/bench/messages/1"}).encode()
+            else:
+                results = [{"success": random.random() >= failure_rate} for _ in request["tokens"]]
+                body = json.dumps({"results": results}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return FakeFCMHandler
+
+
+def _run(label, endpoint, tokens, senders, duration, max_parallel_chunks):
+    service = Firebase_FCM_Service(
+        None,
+        transport=HTTPTransport(endpoint),
+        max_parallel_chunks=max_parallel_chunks,
+    )
+    stop = threading.Event()
+    lock = threading.Lock()
+    latencies = []
+    failures = {"tokens": 0, "errors": 0}
+
+    def sender():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                failed = service.send_multicast_notification(
+                    tokens, "Security Alert: bench", "benchmark alert", {"detection_id": 1}
+                )
+            except Exception:
+                with lock:
+                    failures["errors"] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                failures["tokens"] += len(failed)
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(senders)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+    elapsed = time.perf_counter() - started
+    service.transport.close()
+
+    print(f"\n== {label} ==")
+    print(f"alerts/s : {len(latencies) / elapsed:10.1f}   ({len(latencies)} alerts, {failures['errors']} errors)")
+    print(f"tokens/s : {len(latencies) * len(tokens) / elapsed:10.0f}   failed tokens: {failures['tokens']}")
+    if latencies:
+        print(
+            f"latency p50 {statistics.median(latencies) * 1000:8.2f} ms"
+            f"  p99 {_percentile(latencies, 99) * 1000:8.2f} ms"
+            f"  max {max(latencies) * 1000:8.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=2000, help="device tokens per alert")
+    parser.add_argument("--senders", type=int, default=2, help="concurrent alert senders")
+    parser.add_argument("--latency-ms", type=float, default=40.0, help="simulated FCM latency per chunk")
+    parser.add_argument("--failure-rate", type=float, default=0.01, help="fraction of tokens reported invalid")
+    parser.add_argument("--parallel-chunks", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    # Per-token failure warnings would drown out the report
+    logging.getLogger("backend.app.utils.firebase_fcm_service").setLevel(logging.ERROR)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(args.latency_ms / 1000, args.failure_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/send"
+    tokens = [f"bench-token-{i}" for i in range(args.tokens)]
+
+    try:
+        _run("serial chunks", endpoint, tokens, args.senders, args.duration, 1)
+        _run(f"parallel chunks (x{args.parallel_chunks})", endpoint, tokens,
+             args.senders, args.duration, args.parallel_chunks)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
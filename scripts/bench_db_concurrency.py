@@ -0,0 +1,133 @@
+"""
+Database concurrency benchmark.
+
+Runs capture-style writers (one commit per detection, like record_detection)
+against API-style readers (count + recent list) on a scratch SQLite file and
+compares the stock engine with the tuned WAL engine pair from
+backend.app.core.database.connection.
+
+Usage:
+    python -m scripts.bench_db_concurrency --writers 4 --readers 8 --duration 10
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, desc, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.database.connection import Base, create_db_engine
+from backend.app.core.models import Camera, Detection
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _run(label, write_engine, read_engine, writers, readers, duration):
+    Base.metadata.create_all(bind=write_engine)
+    WriteSession = sessionmaker(bind=write_engine, autoflush=False)
+    ReadSession = sessionmaker(bind=read_engine, autoflush=False)
+
+    with WriteSession() as db:
+        camera = Camera(url="synthetic://bench", name="bench")
+        db.add(camera)
+        db.commit()
+        camera_id = camera.id
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_latencies = []
+    write_latencies = []
+    errors = {"read_locked": 0, "write_locked": 0}
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with WriteSession() as db:
+                    db.add(Detection(
+                        camera_id=camera_id,
+                        timestamp=time.time(),
+                        detection_type="person",
+                        confidence=0.9,
+                    ))
+                    db.commit()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    write_latencies.append(elapsed)
+            except OperationalError:
+                with lock:
+                    errors["write_locked"] += 1
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                with ReadSession() as db:
+                    db.query(func.count(Detection.id)).scalar()
+                    db.query(Detection).order_by(desc(Detection.timestamp)).limit(50).all()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    read_latencies.append(elapsed)
+            except OperationalError:
+                with lock:
+                    errors["read_locked"] += 1
+
+    threads = [threading.Thread(target=writer, daemon=True) for _ in range(writers)]
+    threads += [threading.Thread(target=reader, daemon=True) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    def fmt_ms(value):
+        return f"{value * 1000:8.2f} ms"
+
+    print(f"\n== {label} ==")
+    print(f"writes/s : {len(write_latencies) / duration:10.1f}   locked errors: {errors['write_locked']}")
+    print(f"reads/s  : {len(read_latencies) / duration:10.1f}   locked errors: {errors['read_locked']}")
+    for name, samples in (("read", read_latencies), ("write", write_latencies)):
+        if samples:
+            print(
+                f"{name:<5} p50 {fmt_ms(statistics.median(samples))}"
+                f"  p99 {fmt_ms(_percentile(samples, 99))}"
+                f"  max {fmt_ms(max(samples))}"
+            )
+
+    write_engine.dispose()
+    if read_engine is not write_engine:
+        read_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline_url = f"sqlite:///{Path(tmp) / 'baseline.db'}"
+        baseline = create_engine(baseline_url, connect_args={"check_same_thread": False})
+        _run("baseline (rollback journal, default pool)", baseline, baseline,
+             args.writers, args.readers, args.duration)
+
+        tuned_url = f"sqlite:///{Path(tmp) / 'tuned.db'}"
+        _run("tuned (WAL, read-only engine)", create_db_engine(tuned_url),
+             create_db_engine(tuned_url, read_only=True),
+             args.writers, args.readers, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Idle CPU benchmark: sleep-polling versus per-camera frame signals.
+
+Each camera runs the three waiting loops the pipeline has:
+- a capture throttle that waits for the next frame slot
+- a processing consumer that waits for a new frame
+- a clip recorder that waits for a new result
+
+The producer emits frames at --fps; a low rate models idle or stalled
+cameras. Two strategies are measured with the same producer:
+
+    poll    the previous loops: 1 ms sleeps while throttling, 10 ms sleeps
+            when no frame is new, 100 ms sleeps in the recorder
+    event   the current loops: sleep until the slot is due, and block in
+            FrameSignal.wait_for_newer until a newer frame number exists
+
+Reports CPU use (cores) and wakeups per second (voluntary context switches)
+for each. With --pipeline it also measures the real VideoCapture and
+YOLOProcessor (stub model) on idle synthetic cameras.
+
+Usage:
+    python -m scripts.bench_idle_wakeups --cameras 32 --duration 10
+    python -m scripts.bench_idle_wakeups --cameras 32 --fps 1 --pipeline
+"""
+import argparse
+import os
+import resource
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def _usage():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return time.process_time(), usage.ru_nvcsw
+
+
+def _measure(duration: float, setup):
+    """Run ``setup()`` (returns a stop callable), and measure CPU and wakeups over ``duration``"""
+    stop = setup()
+    time.sleep(0.5)  # Let threads reach their steady state
+    cpu0, switches0 = _usage()
+    wall0 = time.perf_counter()
+    time.sleep(duration)
+    cpu1, switches1 = _usage()
+    elapsed = time.perf_counter() - wall0
+    stop()
+    return (cpu1 - cpu0) / elapsed, (switches1 - switches0) / elapsed
+
+
+def _patterns(cameras: int, fps: float, target_fps: float, mode: str):
+    from backend.app.utils.frame_signal import FrameSignal
+
+    done = threading.Event()
+    threads = []
+
+    def producer(signal: FrameSignal):
+        # Capture thread: throttled to target_fps, but the source only delivers at fps
+        interval = 1.0 / target_fps
+        source_interval = 1.0 / fps
+        last = next_frame = time.time()
+        number = 0
+        while not done.is_set():
+            now = time.time()
+            if now - last < interval:
+                if mode == "poll":
+                    time.sleep(0.001)
+                else:
+                    done.wait(interval - (now - last))
+                continue
+            if now < next_frame:
+                # Blocking read on a source with no new frame yet
+                done.wait(next_frame - now)
+                continue
+            last = now
+            next_frame = now + source_interval
+            number += 1
+            signal.publish(number)
+
+    signals = []
+    for _ in range(cameras):
+        frames, results = FrameSignal(), FrameSignal()
+        signals += [frames, results]
+        threads.append(threading.Thread(target=producer, args=(frames,), daemon=True))
+        # Processing publishes a result per frame; the recorder waits for results
+        threads.append(threading.Thread(target=_consumer, args=(frames, mode, 0.01, done, results), daemon=True))
+        threads.append(threading.Thread(target=_consumer, args=(results, mode, 0.1, done), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    def stop():
+        done.set()
+        for signal in signals:
+            signal.interrupt()
+        for thread in threads:
+            thread.join(timeout=2.0)
+
+    return stop
+
+
+def _consumer(source, mode: str, poll_interval: float, done: threading.Event, results=None):
+    """Wait for each new sequence on ``source`` (polling or blocking), optionally republishing it"""
+    seen = 0
+    while not done.is_set():
+        if mode == "poll":
+            if source.sequence == seen:
+                time.sleep(poll_interval)
+                continue
+            seen = source.sequence
+        else:
+            sequence = source.wait_for_newer(seen, timeout=1.0)
+            if sequence <= seen:
+                continue
+            seen = sequence
+        if results is not None:
+            results.publish(seen)
+
+
+def _isolate(tmp: Path) -> None:
+    """Point settings at a scratch database and storage before the app is imported"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp / 'bench.db'}"
+    os.environ["DATA_DIR"] = str(tmp / "data")
+    os.environ["MODELS_DIR"] = str(tmp / "data" / "models")
+    for name in ("STORAGE_DIR", "STORAGE_IMG_DIR", "STORAGE_VIDEO_DIR", "STORAGE_UPLOAD_DIR"):
+        os.environ[name] = str(tmp / "storage" / name.lower())
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _pipeline(cameras: int, fps: float, target_fps: float):
+    from scripts.bench_pipeline import StubModel
+
+    from backend.app.core.database.connection import SessionLocal, create_tables
+    from backend.app.core.models import Camera
+    from backend.app.services.inference_engine import YOLOProcessor
+    from backend.app.services.video_capture import CameraConfig, VideoCapture
+    from backend.app.utils.detection_rules import detection_rules
+    from backend.app.utils.metadata_cache import camera_cache
+
+    create_tables()
+    with SessionLocal() as db:
+        db.add_all([
+            Camera(
+                name=f"idle-{index}",
+                url=f"synthetic://?width=320&height=240&fps={fps}&objects=0&seed={index}",
+                fps_target=int(target_fps),
+                resolution_width=320,
+                resolution_height=240,
+                # Read mode exercises the capture throttle
+                stream_options={"capture_mode": "read"},
+            )
+            for index in range(cameras)
+        ])
+        db.commit()
+        rows = db.query(Camera).all()
+        camera_cache.prime(rows)
+        detection_rules.reload(db)
+        configs = [CameraConfig.from_camera(row) for row in rows]
+
+    video_capture = VideoCapture()
+    for config in configs:
+        video_capture.add_camera(config)
+    engine = YOLOProcessor(model_path=None)
+    engine.model = StubModel(latency_ms=5.0, jitter_ms=0.0)
+    video_capture.start_all_cameras()
+    engine.start_processing(list(video_capture.cameras), video_capture)
+
+    def stop():
+        engine.stop_processing()
+        video_capture.stop_all_cameras()
+
+    return stop
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=1.0, help="Frames the (idle) sources deliver per second")
+    parser.add_argument("--target-fps", type=float, default=15.0, help="Camera fps_target")
+    parser.add_argument("--pipeline", action="store_true", help="Also measure the real capture and inference loops")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _isolate(Path(tmp))
+        _run(args)
+
+
+def _run(args):
+    print(f"{args.cameras} cameras, source {args.fps:g} fps, target {args.target_fps:g} fps, {args.duration:g}s each\n")
+    print(f"{'strategy':<10} {'cpu cores':>10} {'wakeups/s':>12}")
+    results = {}
+    for mode in ("poll", "event"):
+        cores, wakeups = _measure(args.duration, lambda: _patterns(args.cameras, args.fps, args.target_fps, mode))
+        results[mode] = (cores, wakeups)
+        print(f"{mode:<10} {cores:>10.3f} {wakeups:>12.0f}")
+    poll, event = results["poll"], results["event"]
+    if event[0] > 0 and event[1] > 0:
+        print(f"\nevent-driven waits: {poll[0] / event[0]:.1f}x less CPU, {poll[1] / event[1]:.1f}x fewer wakeups")
+
+    if args.pipeline:
+        cores, wakeups = _measure(args.duration, lambda: _pipeline(args.cameras, args.fps, args.target_fps))
+        print(f"\n{'pipeline':<10} {cores:>10.3f} {wakeups:>12.0f}   (VideoCapture + YOLOProcessor, stub model)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+End-to-end pipeline benchmark with synthetic cameras.
+
+Spins up N ``synthetic://`` cameras (generated moving boxes, or a looped
+local video with --video) and drives the real pipeline:
+VideoCapture -> YOLOProcessor -> DetectionEventManager (batched DB writes,
+snapshots, clips) -> WebRTC CameraStreamTrack, with optional VP8 encoding
+per viewer. The model is replaced by a stub that finds the synthetic boxes
+by thresholding and then sleeps out a configurable latency, so results
+depend on the pipeline rather than on the model.
+
+Reports per-stage throughput, latency percentiles (end-to-end, per-stage
+spans, WebRTC), CPU and RSS. Use --json to save a run and --baseline to
+compare against one; the script exits with status 1 when a metric regresses
+by more than --tolerance.
+
+Storage and the database live in a temporary directory.
+
+Usage:
+    python -m scripts.bench_pipeline --cameras 4 --duration 20
+    python -m scripts.bench_pipeline --cameras 8 --model-latency-ms 40 --viewers 1 --encode --json run.json
+    python -m scripts.bench_pipeline --cameras 8 --baseline run.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(samples):
+    """Percentiles in ms for a list of durations in seconds"""
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(_percentile(samples, 50) * 1000, 2),
+        "p90_ms": round(_percentile(samples, 90) * 1000, 2),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _isolate(tmp: Path, args) -> None:
+    """Point settings at a scratch database and storage before the app is imported"""
+    storage = tmp / "storage"
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp / 'bench.db'}"
+    os.environ["DATA_DIR"] = str(tmp / "data")
+    os.environ["MODELS_DIR"] = str(tmp / "data" / "models")
+    os.environ["STORAGE_DIR"] = str(storage)
+    os.environ["STORAGE_IMG_DIR"] = str(storage / "images")
+    os.environ["STORAGE_VIDEO_DIR"] = str(storage / "videos")
+    os.environ["STORAGE_UPLOAD_DIR"] = str(storage / "uploads")
+    os.environ["DETECTION_COOLDOWN"] = str(args.cooldown)
+    os.environ["INFERENCE_RATE_CONTROL"] = "false" if args.no_rate_control else "true"
+    os.environ["PROFILING_SPANS_ENABLED"] = "true"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+class _StubBoxes:
+    def __init__(self, xyxy, conf):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = np.zeros(len(conf), dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self
+
+
+class _StubResult:
+    names = {0: "person"}
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class StubModel:
+    """Detects the synthetic sources' bright boxes, then sleeps out the configured latency"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self._rng = np.random.default_rng(seed)
+
+    def __call__(self, images, **kwargs):
+        started = time.perf_counter()
+        batch = images if isinstance(images, list) else [images]
+        results = [_StubResult(self._detect(image)) for image in batch]
+        # Sleeping releases the GIL the way a native inference call does
+        remaining = max(0.0, self._rng.normal(self.latency, self.jitter)) - (time.perf_counter() - started)
+        if remaining > 0:
+            time.sleep(remaining)
+        return results
+
+    @staticmethod
+    def _detect(image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        _, mask = cv2.threshold(gray, 220, 255, cv2.THRESH_BINARY)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = [cv2.boundingRect(c) for c in contours if cv2.contourArea(c) > 64]
+        xyxy = np.array([[x, y, x + w, y + h] for x, y, w, h in boxes], dtype=np.float32).reshape(-1, 4)
+        return _StubBoxes(xyxy, np.full(len(xyxy), 0.9, dtype=np.float32))
+
+
+class _Samples:
+    def __init__(self):
+        self.measuring = False
+        self.end_to_end = []
+        self.webrtc_recv = []
+        self.webrtc_encode = []
+        self.webrtc_frames = 0
+
+
+def _poll_results(engine, samples: _Samples, stop: threading.Event) -> None:
+    """Collect capture-to-published latency from the engine's result snapshots"""
+    last_seen = {}
+    while not stop.is_set():
+        for camera_id, snapshot in list(engine.result_snapshots.items()):
+            if last_seen.get(camera_id) == snapshot.frame_number:
+                continue
+            last_seen[camera_id] = snapshot.frame_number
+            if samples.measuring:
+                samples.end_to_end.append(snapshot.processed_at - snapshot.timestamp)
+        time.sleep(0.002)
+
+
+async def _viewer(track, samples: _Samples, fps: float, encode: bool, stop: threading.Event) -> None:
+    from aiortc.codecs.vpx import Vp8Encoder
+
+    loop = asyncio.get_running_loop()
+    encoder = Vp8Encoder() if encode else None
+    period = 1.0 / fps
+    while not stop.is_set():
+        started = time.perf_counter()
+        frame = await track.recv()
+        received = time.perf_counter()
+        if encoder is not None:
+            # aiortc encodes on an executor thread too
+            await loop.run_in_executor(None, encoder.encode, frame)
+        finished = time.perf_counter()
+        if samples.measuring:
+            samples.webrtc_recv.append(received - started)
+            if encoder is not None:
+                samples.webrtc_encode.append(finished - received)
+            samples.webrtc_frames += 1
+        await asyncio.sleep(max(0.0, period - (finished - started)))
+
+
+async def _run_viewers(tracks, samples, fps, encode, stop):
+    await asyncio.gather(*(_viewer(track, samples, fps, encode, stop) for track in tracks))
+
+
+def run(args) -> dict:
+    from sqlalchemy import func
+
+    from backend.app.core.database.connection import SessionLocal, create_tables
+    from backend.app.core.models import Camera, Detection
+    from backend.app.services.inference_engine import YOLOProcessor
+    from backend.app.services.video_capture import CameraConfig, VideoCapture
+    from backend.app.services.webrtc import CameraStreamTrack
+    from backend.app.utils.detection_manager import DetectionEventManager
+    from backend.app.utils.detection_rules import detection_rules
+    from backend.app.utils.metadata_cache import camera_cache
+    from backend.app.utils.profiling import spans
+
+    if args.video:
+        url = f"synthetic://{Path(args.video).resolve()}"
+    else:
+        url = f"synthetic://?width={args.width}&height={args.height}&fps={args.source_fps}&objects={args.objects}"
+
+    create_tables()
+    with SessionLocal() as db:
+        db.add_all([
+            Camera(
+                name=f"bench-{index}",
+                url=f"{url}{'&' if '?' in url else '?'}seed={index}",
+                fps_target=args.fps,
+                resolution_width=args.width,
+                resolution_height=args.height,
+            )
+            for index in range(args.cameras)
+        ])
+        db.commit()
+        cameras = db.query(Camera).all()
+        camera_cache.prime(cameras)
+        detection_rules.reload(db)
+        configs = [CameraConfig.from_camera(camera) for camera in cameras]
+
+    video_capture = VideoCapture()
+    for config in configs:
+        video_capture.add_camera(config)
+    camera_ids = [config.camera_id for config in configs]
+
+    detection_manager = DetectionEventManager(alert_service=None)
+    if args.clip_seconds > 0:
+        detection_manager.video_duration = args.clip_seconds
+    else:
+        detection_manager._start_video_recording = lambda *a, **k: None
+    engine = YOLOProcessor(model_path=None, detection_manager=detection_manager)
+    engine.model = StubModel(args.model_latency_ms, args.model_jitter_ms)
+
+    samples = _Samples()
+    stop = threading.Event()
+    video_capture.start_all_cameras()
+    engine.start_processing(camera_ids, video_capture)
+    poller = threading.Thread(target=_poll_results, args=(engine, samples, stop), daemon=True)
+    poller.start()
+
+    tracks = [
+        CameraStreamTrack(camera_id, engine, video_capture)
+        for camera_id in camera_ids
+        for _ in range(args.viewers)
+    ]
+    viewer_thread = None
+    if tracks:
+        viewer_thread = threading.Thread(
+            target=lambda: asyncio.run(_run_viewers(tracks, samples, args.viewer_fps, args.encode, stop)),
+            daemon=True,
+        )
+        viewer_thread.start()
+
+    def counters():
+        with SessionLocal() as db:
+            detections = db.query(func.count(Detection.id)).scalar()
+        processed = sum(s.get("processed_frames", 0) for s in engine.processing_stats.values())
+        return sum(video_capture.frame_counts.values()), processed, detections
+
+    print(f"Warming up for {args.warmup:.0f}s with {args.cameras} cameras...")
+    time.sleep(args.warmup)
+    spans.reset()
+    captured0, processed0, detections0 = counters()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    samples.measuring = True
+    print(f"Measuring for {args.duration:.0f}s...")
+    time.sleep(args.duration)
+    samples.measuring = False
+    cpu1, wall1 = time.process_time(), time.perf_counter()
+    detection_manager.detection_writer.flush()
+    captured1, processed1, detections1 = counters()
+    rss = _rss_mb()
+    span_stats = spans.snapshot()
+
+    stop.set()
+    engine.stop_processing()
+    video_capture.stop_all_cameras()
+    if viewer_thread is not None:
+        viewer_thread.join(timeout=5.0)
+    deadline = time.time() + args.clip_seconds + 30
+    while detection_manager.active_recordings and time.time() < deadline:
+        time.sleep(0.2)
+    detection_manager.detection_writer.stop()
+
+    elapsed = wall1 - wall0
+    processed = processed1 - processed0
+    latency = {"end_to_end": _summary(samples.end_to_end)}
+    if tracks:
+        latency["webrtc.recv"] = _summary(samples.webrtc_recv)
+    if args.encode:
+        latency["webrtc.vp8"] = _summary(samples.webrtc_encode)
+    latency.update({f"span.{name}": stats for name, stats in span_stats.items()})
+
+    return {
+        "config": {
+            "cameras": args.cameras, "fps": args.fps, "source_fps": args.source_fps,
+            "resolution": [args.width, args.height], "objects": args.objects,
+            "model_latency_ms": args.model_latency_ms, "viewers": args.viewers, "encode": args.encode,
+            "rate_control": not args.no_rate_control, "duration": args.duration,
+        },
+        "throughput": {
+            "capture_fps": round((captured1 - captured0) / elapsed, 2),
+            "inference_fps": round(processed / elapsed, 2),
+            "detections_per_s": round((detections1 - detections0) / elapsed, 3),
+            "webrtc_fps": round(samples.webrtc_frames / elapsed, 2),
+        },
+        "latency": latency,
+        "resources": {
+            "cpu_cores": round((cpu1 - cpu0) / elapsed, 3),
+            "cpu_ms_per_inferred_frame": round((cpu1 - cpu0) * 1000 / processed, 2) if processed else None,
+            "rss_mb": round(rss, 1),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        },
+    }
+
+
+def _print_report(result: dict) -> None:
+    config = result["config"]
+    print(f"\n== throughput ({config['cameras']} cameras, {config['duration']:.0f}s) ==")
+    for key, value in result["throughput"].items():
+        print(f"{key:<22} {value:10.2f}")
+    print("\n== latency (ms) ==")
+    print(f"{'stage':<26} {'count':>7} {'mean':>8} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for name, stats in result["latency"].items():
+        print(
+            f"{name:<26} {stats['count']:>7} {stats['mean_ms']:>8.2f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p90_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}"
+        )
+    print("\n== resources ==")
+    for key, value in result["resources"].items():
+        print(f"{key:<26} {value}")
+
+
+def _compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Return human-readable regressions of ``result`` against ``baseline``"""
+    regressions = []
+    for key, value in result["throughput"].items():
+        before = baseline.get("throughput", {}).get(key)
+        if before and value < before * (1 - tolerance):
+            regressions.append(f"throughput.{key}: {before} -> {value}")
+    for name in ("end_to_end", "webrtc.recv", "webrtc.vp8"):
+        for pct in ("p50_ms", "p99_ms"):
+            before = baseline.get("latency", {}).get(name, {}).get(pct)
+            value = result["latency"].get(name, {}).get(pct)
+            if before and value is not None and value > before * (1 + tolerance):
+                regressions.append(f"latency.{name}.{pct}: {before} -> {value}")
+    for key in ("cpu_ms_per_inferred_frame", "rss_mb"):
+        before = baseline.get("resources", {}).get(key)
+        value = result["resources"].get(key)
+        if before and value is not None and value > before * (1 + tolerance):
+            regressions.append(f"resources.{key}: {before} -> {value}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds (spans cover the last 60s)")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--fps", type=int, default=15, help="Camera fps_target")
+    parser.add_argument("--source-fps", type=float, default=30.0, help="Frame rate the synthetic camera produces")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--objects", type=int, default=2, help="Moving boxes per generated camera")
+    parser.add_argument("--video", type=Path, help="Loop this file on every camera instead of generating frames")
+    parser.add_argument("--model-latency-ms", type=float, default=25.0)
+    parser.add_argument("--model-jitter-ms", type=float, default=3.0)
+    parser.add_argument("--cooldown", type=float, default=0.0, help="DETECTION_COOLDOWN for the run")
+    parser.add_argument("--clip-seconds", type=float, default=5.0, help="Clip length per event; 0 disables clips")
+    parser.add_argument("--viewers", type=int, default=1, help="WebRTC tracks per camera; 0 disables")
+    parser.add_argument("--viewer-fps", type=float, default=15.0)
+    parser.add_argument("--encode", action="store_true", help="VP8-encode every viewer frame like aiortc does")
+    parser.add_argument("--no-rate-control", action="store_true")
+    parser.add_argument("--json", type=Path, help="Write the results here")
+    parser.add_argument("--baseline", type=Path, help="Compare against a previous --json run")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _isolate(Path(tmp), args)
+        result = run(args)
+
+    _print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2))
+        print(f"\nResults written to {args.json}")
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("config") != result["config"]:
+            print(f"\nWarning: {args.baseline} was recorded with a different configuration")
+        regressions = _compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
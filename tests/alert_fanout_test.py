@@ -0,0 +1,81 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from backend.app.services import alert_service
+from backend.app.services.alert_service import AlertService, Topics
+from backend.app.utils.device_token_cache import DeviceTokenCache
+
+
+class RecordingFCM:
+    """Stands in for Firebase_FCM_Service and records which tokens each send reaches"""
+
+    def __init__(self, subscriptions):
+        self.subscriptions = subscriptions
+        self.deliveries = Counter()
+
+    def send_fcm_to_topics(self, topics, title, body, data=None):
+        assert len(topics) <= 5
+        for token, subscribed in self.subscriptions.items():
+            if subscribed.intersection(topics):
+                self.deliveries[token] += 1
+        return ["message-id"]
+
+    def send_multicast_notification(self, tokens, title, body, data=None):
+        self.deliveries.update(tokens)
+        return []
+
+
+@pytest.fixture
+def service(monkeypatch):
+    tokens = {
+        "default-a": 1, "default-b": 1,
+        "camera-3": 2,
+        "everything": 3,
+        "filtered": 4,
+        "muted": 5,
+    }
+    preferences = {
+        2: {Topics.camera(3): True},
+        3: {Topics.DETECTION_ALERTS: True, Topics.camera(1): True, Topics.zone(10): True},
+        4: {"detection_type_person": True, Topics.camera(1): True},
+        5: {Topics.DETECTION_ALERTS: False},
+    }
+    cache = DeviceTokenCache(session_factory=None)
+    cache._tokens = tokens
+    cache._settings = preferences
+    cache._preferences = {u: frozenset(c for c, on in p.items() if on) for u, p in preferences.items()}
+    cache._loaded = True
+    cache._rebuild()
+    monkeypatch.setattr(alert_service, "device_token_cache", cache)
+
+    cameras = {camera_id: SimpleNamespace(zone_id=10 + camera_id % 2) for camera_id in range(1, 7)}
+    monkeypatch.setattr(alert_service.camera_cache, "get", cameras.get)
+    monkeypatch.setattr(AlertService, "_format_alert", lambda self, detections: ("title", "body"))
+    monkeypatch.setattr(AlertService, "_log_alert", lambda self, *args, **kwargs: None)
+
+    subscriptions = {
+        token: set(AlertService._alert_topics(preferences.get(user_id, {})))
+        for token, user_id in tokens.items()
+    }
+    svc = AlertService(firebase_service=RecordingFCM(subscriptions))
+    return svc
+
+
+def detections(*camera_ids):
+    return [
+        SimpleNamespace(id=i, camera_id=camera_id, detection_type="person", timestamp=float(i), confidence=0.9)
+        for i, camera_id in enumerate(camera_ids, start=1)
+    ]
+
+
+@pytest.mark.parametrize("camera_ids", [(1,), (1, 3), (1, 2, 3, 4, 5, 6)])
+def test_alert_reaches_each_device_once(service, camera_ids):
+    service.send_alerts(None, detections(*camera_ids))
+
+    deliveries = service.firebase_service.deliveries
+    assert max(deliveries.values()) == 1
+    assert {"default-a", "default-b", "everything", "filtered"} <= set(deliveries)
+    assert "muted" not in deliveries
+    assert ("camera-3" in deliveries) == (3 in camera_ids)